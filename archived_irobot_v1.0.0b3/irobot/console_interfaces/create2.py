@@ -52,9 +52,9 @@ def _configure_logger():
                 '\n'.join(['\t{0}'.format(line) for line in lines[1:]]))
 
     logger = logging.getLogger('Create2')
-    logger.setLevel(logging.INFO)
+    logger.setLevel(logging.DEBUG)
     ch = logging.StreamHandler(stdout)
-    ch.setLevel(logging.INFO)
+    ch.setLevel(logging.DEBUG)
     ch.setFormatter(Formatter('%(levelname)s\n%(message)s'))
     logger.addHandler(ch)
     logger.disabled = True
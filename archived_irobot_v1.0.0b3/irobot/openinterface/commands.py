@@ -231,3 +231,17 @@ def play_song(song_number):
 
 def request_sensor_data(packet_id):
     return pack_unsigned_byte(142, packet_id)
+
+
+def request_sensor_list(packet_ids):
+    num_packets = len(packet_ids)
+    return pack('%sB' % (num_packets + 2), 149, num_packets, *packet_ids)
+
+
+def request_stream(packet_ids):
+    num_packets = len(packet_ids)
+    return pack('%sB' % (num_packets + 2), 148, num_packets, *packet_ids)
+
+
+def pause_resume_stream(resume):
+    return pack_unsigned_byte(150, 1 if resume else 0)
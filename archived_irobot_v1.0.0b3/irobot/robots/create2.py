@@ -4,14 +4,15 @@ import types
 from time import sleep, time
 import logging
 import serial
-from six import raise_from, iterbytes
+from six import raise_from
 
 from irobot.openinterface.commands import set_mode_full, set_mode_passive, set_mode_safe, power_down, reset, start, stop, \
     drive, drive_direct, drive_pwm, seek_dock, set_baud, set_day_time, set_schedule, clean, clean_max, clean_spot, \
     set_motors, set_motors_pwm, set_leds, set_ascii_leds, trigger_buttons, set_song, play_song, request_sensor_data, \
-    set_scheduling_leds, set_raw_leds
+    request_sensor_list, set_scheduling_leds, set_raw_leds
 from irobot.openinterface.constants import BAUD_RATE, DRIVE, RESPONSE_SIZES, ROBOT, MODES, POWER_SAVE_TIME
 from serial.serialutil import SerialException
+from irobot.robots.serial_trace import SerialTrace, LazyFormattedData, LazySummary, format_data
 
 from irobot.openinterface.response_parsers import binary_response, byte_response, unsigned_byte_response, short_response, \
     unsigned_short_response, BumpsAndWheelDrop, WheelOvercurrents, Buttons, ChargingSources, LightBumper, Stasis, \
@@ -22,10 +23,14 @@ _error_msg_range = 'Argument {0} out of range'
 
 
 class Create2(object):
-    def __init__(self, port, baud_rate=115200, timeout=1, auto_wake=True, enable_quirks=True):
+    # interval in seconds in which a summary of the serial traffic is logged
+    TRACE_SUMMARY_INTERVAL = 60
+
+    def __init__(self, port, baud_rate=115200, timeout=1, auto_wake=True, enable_quirks=True, trace_capacity=1024):
         self._auto_wake = auto_wake
         self._oi_mode = MODES.OFF
         self._last_command_time = time()
+        self._trace = SerialTrace(trace_capacity)
 
         self._enable_quirks = enable_quirks
         self._toggle_quirks()
@@ -60,23 +65,35 @@ class Create2(object):
 
     def _send(self, data):
         self._log_send(data)
+        self._trace.record_sent(data)
 
         self._handle_auto_wake()
         self._last_command_time = time()
         self._serial_port.write(data)
 
-    def _read_sensor_data(self, id):
-        self._send(request_sensor_data(id))
-        size = RESPONSE_SIZES[id]
+        if self._trace.elapsed >= self.TRACE_SUMMARY_INTERVAL:
+            self._log_trace_summary()
+
+    def _read(self, size):
         data = self._serial_port.read(size)
+        self._trace.record_received(data)
 
         if len(data) != size:
+            self.logger.error('Did not receive data, last serial traffic:\n%s', self._trace)
             raise Exception("Did not receive data")
 
-        self.logger.info('Received\n{0}'.format(self._format_data(data)))
+        self.logger.debug('Received\n%s', LazyFormattedData(data))
 
         return data
 
+    def _read_sensor_data(self, id):
+        self._send(request_sensor_data(id))
+        return self._read(RESPONSE_SIZES[id])
+
+    def _read_sensor_list(self, ids):
+        self._send(request_sensor_list(ids))
+        return self._read(sum(RESPONSE_SIZES[id] for id in ids))
+
     def _handle_auto_wake(self):
         if not self._auto_wake or self._oi_mode != MODES.PASSIVE:
             return
@@ -87,19 +104,22 @@ class Create2(object):
             self.wake()
 
     def _log_send(self, data):
-        self.logger.info('Last command sent {0:.2f} seconds ago\nSending Command\n{1}'.format(
-            time() - self._last_command_time,
-            self._format_data(data)
-        ))
+        # the data is only formatted if the message is emitted, the summary replaces the per call messages otherwise
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Last command sent %.2f seconds ago\nSending Command\n%s',
+                              time() - self._last_command_time, LazyFormattedData(data))
+
+    def _log_trace_summary(self):
+        self.logger.info('Serial traffic summary\n%s', LazySummary(self._trace))
+        self._trace.reset_counters()
 
     @staticmethod
     def _format_data(data):
-        data = iterbytes(data)
-        return 'Decimal:\t[{0}]\nHex:\t\t[{1}]\nBin:\t\t[{2}]'.format(
-            '|'.join(('{0:d}'.format(b)) for b in data),
-            '|'.join(('{0:X}'.format(b)) for b in data),
-            '|'.join(('{0:08b}'.format(b)) for b in data)
-        )
+        return format_data(data)
+
+    @property
+    def serial_trace(self):
+        return self._trace
 
     def _toggle_quirks(self):
         if self._enable_quirks:
@@ -164,7 +184,9 @@ class Create2(object):
         self._send(start())
 
         # read data waiting on start
-        welcome_message = self._serial_port.read(1024).decode('utf-8')
+        welcome_message = self._serial_port.read(1024)
+        self._trace.record_received(welcome_message)
+        welcome_message = welcome_message.decode('utf-8')
         if welcome_message is not None:
             self.logger.info('First 1024 characters of welcome message: {0}'.format(welcome_message))
         # flush anything after the first 1024 bytes
@@ -349,6 +371,26 @@ class Create2(object):
             pass
         self._send(play_song(song_number))
 
+    def read_sensor_list(self, packet_ids):
+        """
+        Reads several sensor packets with a single Query List command
+        Returns the raw data of each packet, parse it with the matching response parser
+        """
+        if not 0 < len(packet_ids) <= 255:
+            raise ValueError('Length of packet_ids out of range')
+
+        return self._split_sensor_list(packet_ids, self._read_sensor_list(packet_ids))
+
+    @staticmethod
+    def _split_sensor_list(packet_ids, data):
+        packets = []
+        offset = 0
+        for packet_id in packet_ids:
+            size = RESPONSE_SIZES[packet_id]
+            packets.append(data[offset:offset + size])
+            offset += size
+        return packets
+
     @property
     def bumps_and_wheel_drops(self):
         return BumpsAndWheelDrop(self._read_sensor_data(7))
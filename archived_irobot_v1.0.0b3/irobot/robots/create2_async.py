@@ -0,0 +1,466 @@
+"""
+Asyncio variant of Create2, requires Python 3.5 or newer
+
+Commands are queued and written by a writer task, so they return immediately
+Sensor reads and all waits are coroutines, which can be cancelled
+
+Example:
+    robot = await AsyncCreate2.connect('/dev/ttyUSB0')
+    await robot.set_oi_mode(MODES.FULL)
+    robot.drive_straight(200)
+    while not (await robot.bumps_and_wheel_drops()).bump_left:
+        await asyncio.sleep(0.05)
+    robot.drive_straight(0)
+    await robot.close()
+"""
+
+import asyncio
+from time import time
+
+import serial
+from serial.serialutil import SerialException
+from six import raise_from
+
+from irobot.openinterface.commands import start, stop, reset, clean, clean_max, clean_spot, seek_dock, \
+    set_mode_passive, set_mode_safe, set_mode_full, request_sensor_data, request_sensor_list, request_stream, \
+    pause_resume_stream
+from irobot.openinterface.constants import MODES, POWER_SAVE_TIME, RESPONSE_SIZES, ROBOT
+from irobot.openinterface.response_parsers import binary_response, byte_response, unsigned_byte_response, \
+    short_response, unsigned_short_response, BumpsAndWheelDrop, WheelOvercurrents, Buttons, ChargingSources, \
+    LightBumper, Stasis, SensorGroup0, SensorGroup1, SensorGroup2, SensorGroup3, SensorGroup4, SensorGroup5, \
+    SensorGroup6, SensorGroup100, SensorGroup101, SensorGroup106, SensorGroup107
+from irobot.robots.create2 import Create2, ModeChangeError, RobotConnectionError
+from irobot.robots.serial_trace import LazyFormattedData
+
+# name of the coroutine, packet id and parser of every sensor
+SENSORS = (
+    ('bumps_and_wheel_drops', 7, BumpsAndWheelDrop),
+    ('wall_sensor', 8, binary_response),
+    ('cliff_left', 9, binary_response),
+    ('cliff_front_left', 10, binary_response),
+    ('cliff_front_right', 11, binary_response),
+    ('cliff_right', 12, binary_response),
+    ('virtual_wall', 13, binary_response),
+    ('wheel_overcurrents', 14, WheelOvercurrents),
+    ('dirt_detect', 15, byte_response),
+    ('ir_char_omni', 17, unsigned_byte_response),
+    ('ir_char_left', 52, unsigned_byte_response),
+    ('ir_char_right', 53, unsigned_byte_response),
+    ('buttons', 18, Buttons),
+    ('charging_state', 21, unsigned_byte_response),
+    ('voltage', 22, unsigned_short_response),
+    ('current', 23, short_response),
+    ('temperature', 24, byte_response),
+    ('battery_charge', 25, unsigned_short_response),
+    ('battery_capacity', 26, unsigned_short_response),
+    ('wall_signal', 27, unsigned_short_response),
+    ('cliff_left_signal', 28, unsigned_short_response),
+    ('cliff_front_left_signal', 29, unsigned_short_response),
+    ('cliff_front_right_signal', 30, unsigned_short_response),
+    ('cliff_right_signal', 31, unsigned_short_response),
+    ('charging_sources', 34, ChargingSources),
+    ('song_number', 36, unsigned_byte_response),
+    ('is_song_playing', 37, binary_response),
+    ('number_stream_packets', 38, unsigned_byte_response),
+    ('requested_velocity', 39, short_response),
+    ('requested_radius', 40, short_response),
+    ('requested_right_velocity', 41, short_response),
+    ('requested_left_velocity', 42, short_response),
+    ('left_encoder_counts', 43, short_response),
+    ('right_encoder_counts', 44, short_response),
+    ('light_bumper', 45, LightBumper),
+    ('light_bump_left_signal', 46, unsigned_short_response),
+    ('light_bump_front_left_signal', 47, unsigned_short_response),
+    ('light_bump_center_left_signal', 48, unsigned_short_response),
+    ('light_bump_center_right_signal', 49, unsigned_short_response),
+    ('light_bump_front_right_signal', 50, unsigned_short_response),
+    ('light_bump_right_signal', 51, unsigned_short_response),
+    ('left_motor_current', 54, short_response),
+    ('right_motor_current', 55, short_response),
+    ('main_brush_motor_current', 56, short_response),
+    ('side_brush_motor_current', 57, short_response),
+    ('stasis', 58, Stasis),
+    ('sensor_group0', 0, SensorGroup0),
+    ('sensor_group1', 1, SensorGroup1),
+    ('sensor_group2', 2, SensorGroup2),
+    ('sensor_group3', 3, SensorGroup3),
+    ('sensor_group4', 4, SensorGroup4),
+    ('sensor_group5', 5, SensorGroup5),
+    ('sensor_group6', 6, SensorGroup6),
+    ('sensor_group100', 100, SensorGroup100),
+    ('sensor_group101', 101, SensorGroup101),
+    ('sensor_group106', 106, SensorGroup106),
+    ('sensor_group107', 107, SensorGroup107),
+)
+
+STREAM_HEADER = 19
+STREAM_PERIOD = 0.015  # seconds
+
+
+class AsyncCreate2(Create2):
+    """
+    Create2 for asyncio event loops with non-blocking serial I/O
+
+    The drive, song, LED, ... commands are inherited from Create2 and only queue
+    the command. Everything that waits for the robot is a coroutine, including
+    the sensors, which are read with e.g. await robot.battery_charge()
+
+    Create instances with the connect coroutine
+    """
+    def __init__(self, port, baud_rate=115200, timeout=1, auto_wake=True, enable_quirks=True, trace_capacity=1024):
+        self._timeout = timeout
+        self._loop = asyncio.get_event_loop()
+        self._buffer = bytearray()
+        self._data_event = asyncio.Event()
+        self._query_lock = asyncio.Lock()
+        self._write_queue = asyncio.Queue()
+        self._writer_task = None
+
+        self._stream_packet_ids = []
+        self._streaming = False
+        self._stream_values = {}
+        self._stream_frame = {}
+        self._stream_frame_event = asyncio.Event()
+
+        super(AsyncCreate2, self).__init__(port, baud_rate, timeout, auto_wake, enable_quirks, trace_capacity)
+
+    @classmethod
+    async def connect(cls, port, baud_rate=115200, timeout=1, auto_wake=True, enable_quirks=True,
+                      trace_capacity=1024):
+        robot = cls(port, baud_rate, timeout, auto_wake, enable_quirks, trace_capacity)
+
+        # wait for the robot to wake up on connection opened
+        await asyncio.sleep(1)
+
+        await robot.start()
+        return robot
+
+    def __del__(self):
+        # the writer task does not run anymore, so the robot is stopped directly
+        if getattr(self, '_serial_port', None) is not None and self._serial_port.is_open:
+            try:
+                self._serial_port.write(stop())
+            except SerialException:
+                pass
+            self._serial_port.close()
+
+    def _attach_to_robot(self, port, baud_rate, timeout):
+        try:
+            self._serial_port = serial.Serial(port=port,
+                                              baudrate=baud_rate,
+                                              bytesize=serial.EIGHTBITS,
+                                              parity=serial.PARITY_NONE,
+                                              stopbits=serial.STOPBITS_ONE,
+                                              timeout=0,
+                                              writeTimeout=timeout,
+                                              xonxoff=False,
+                                              rtscts=False,
+                                              dsrdtr=False)
+        except SerialException as e:
+            raise_from(RobotConnectionError(port, baud_rate), e)
+
+        self._loop.add_reader(self._serial_port.fileno(), self._on_readable)
+        self._writer_task = self._loop.create_task(self._write_commands())
+
+    async def close(self):
+        """
+        Stops the robot and closes the serial port after all queued commands were written
+        """
+        self.stop()
+        self._write_queue.put_nowait(None)
+        await self._writer_task
+        self._loop.remove_reader(self._serial_port.fileno())
+        self._serial_port.close()
+
+    def _toggle_quirks(self):
+        # distance and angle are coroutines that check the quirks themselves
+        pass
+
+    def _send(self, data):
+        self._log_send(data)
+        self._write_queue.put_nowait(data)
+
+    async def _write_commands(self):
+        while True:
+            data = await self._write_queue.get()
+            try:
+                if data is None:
+                    return
+
+                await self._handle_auto_wake()
+                self._trace.record_sent(data)
+                self._last_command_time = time()
+                self._serial_port.write(data)
+
+                if self._trace.elapsed >= self.TRACE_SUMMARY_INTERVAL:
+                    self._log_trace_summary()
+            finally:
+                self._write_queue.task_done()
+
+    async def drain(self):
+        """
+        Waits until all queued commands were written
+        """
+        await self._write_queue.join()
+
+    def _on_readable(self):
+        try:
+            data = self._serial_port.read(self._serial_port.in_waiting or 1)
+        except SerialException:
+            self.logger.error('Could not read from the serial port, last serial traffic:\n%s', self._trace)
+            return
+
+        self._trace.record_received(data)
+        self._buffer.extend(data)
+        if self._streaming:
+            self._parse_stream()
+        self._data_event.set()
+
+    async def _read(self, size):
+        t_end = self._loop.time() + self._timeout
+        while len(self._buffer) < size:
+            remaining = t_end - self._loop.time()
+            if remaining <= 0:
+                self.logger.error('Did not receive data, last serial traffic:\n%s', self._trace)
+                raise Exception("Did not receive data")
+
+            self._data_event.clear()
+            try:
+                await asyncio.wait_for(self._data_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self.logger.debug('Received\n%s', LazyFormattedData(data))
+        return data
+
+    async def _query(self, command, size):
+        async with self._query_lock:
+            resume_stream = self._streaming
+            if resume_stream:
+                await self.pause_stream()
+
+            try:
+                # responses to queries that timed out must not be mistaken for this one
+                del self._buffer[:]
+                self._send(command)
+                return await self._read(size)
+            finally:
+                if resume_stream:
+                    await self.resume_stream()
+
+    async def _read_sensor_data(self, id):
+        if self._streaming and id in self._stream_packet_ids:
+            if id not in self._stream_values:
+                await self.next_stream_frame()
+            return self._stream_values[id]
+        return await self._query(request_sensor_data(id), RESPONSE_SIZES[id])
+
+    async def _read_sensor_list(self, ids):
+        return await self._query(request_sensor_list(ids), sum(RESPONSE_SIZES[id] for id in ids))
+
+    async def read_sensor_list(self, packet_ids):
+        """
+        Reads several sensor packets with a single Query List command
+        Returns the raw data of each packet, parse it with the matching response parser
+        """
+        if not 0 < len(packet_ids) <= 255:
+            raise ValueError('Length of packet_ids out of range')
+
+        return self._split_sensor_list(packet_ids, await self._read_sensor_list(packet_ids))
+
+    async def _handle_auto_wake(self):
+        if not self._auto_wake or self._oi_mode != MODES.PASSIVE:
+            return
+
+        # wake the robot if the last command was sent any time after power save minus 15 seconds
+        if (time() - self._last_command_time) >= POWER_SAVE_TIME - 15:
+            await self.wake()
+
+    async def wake(self):
+        self.logger.info('Waking robot after {0:.2f} seconds of inactivity'.format(time() - self._last_command_time))
+        self._serial_port.setRTS(True)  # rts in pyserial 3.0
+        await asyncio.sleep(1)
+        self._serial_port.setRTS(False)
+        await asyncio.sleep(1)
+        self._serial_port.setRTS(True)
+        await asyncio.sleep(1)
+
+    async def start(self):
+        self._send(start())
+        await self.drain()
+
+        # read data waiting on start
+        await asyncio.sleep(self._timeout)
+        welcome_message = bytes(self._buffer[:1024]).decode('utf-8', 'replace')
+        if welcome_message:
+            self.logger.info('First 1024 characters of welcome message: {0}'.format(welcome_message))
+        del self._buffer[:]
+
+        await self._verify_mode(MODES.PASSIVE)
+
+    async def _change_mode(self, mode):
+        if mode == MODES.PASSIVE:
+            mode_cmd = set_mode_passive()
+        elif mode == MODES.SAFE:
+            mode_cmd = set_mode_safe()
+        elif mode == MODES.FULL:
+            mode_cmd = set_mode_full()
+        else:
+            raise ValueError('Invalid mode')
+
+        self._send(mode_cmd)
+        await self._verify_mode(mode)
+
+    async def _verify_mode(self, mode):
+        if await self.oi_mode() != mode:
+            raise ModeChangeError(mode, self._oi_mode)
+
+    async def oi_mode(self):
+        self._oi_mode = unsigned_byte_response(await self._read_sensor_data(35))
+        return self._oi_mode
+
+    async def set_oi_mode(self, mode):
+        await self._change_mode(mode)
+
+    async def clean(self):
+        self._send(clean())
+        await self._verify_mode(MODES.PASSIVE)
+
+    async def clean_max(self):
+        self._send(clean_max())
+        await self._verify_mode(MODES.PASSIVE)
+
+    async def clean_spot(self):
+        self._send(clean_spot())
+        await self._verify_mode(MODES.PASSIVE)
+
+    async def seek_dock(self):
+        self._send(seek_dock())
+        await self._verify_mode(MODES.PASSIVE)
+
+    async def distance(self):
+        if not self._enable_quirks:
+            return short_response(await self._read_sensor_data(19))
+
+        # firmware versions prior to 3.3.0 return an incorrect distance, see Create2._get_distance_quirks
+        left, right = await self._read_encoder_counts()
+        return (left * ROBOT.TICK_TO_DISTANCE + right * ROBOT.TICK_TO_DISTANCE) / 2
+
+    async def angle(self):
+        if not self._enable_quirks:
+            return short_response(await self._read_sensor_data(20))
+
+        # firmware versions 3.4.0 and earlier return an incorrect angle, see Create2._get_angle_quirks
+        left, right = await self._read_encoder_counts()
+        return (right * ROBOT.TICK_TO_DISTANCE - left * ROBOT.TICK_TO_DISTANCE) / ROBOT.WHEEL_BASE
+
+    async def _read_encoder_counts(self):
+        left = await self._read_sensor_data(43)
+        right = await self._read_sensor_data(44)
+        return short_response(left), short_response(right)
+
+    async def firmware_version(self):
+        self.reset()
+        await self.drain()
+        await asyncio.sleep(5)
+        msg = bytes(self._buffer).decode('utf-8', 'replace')
+        del self._buffer[:]
+        await self.start()
+        return msg
+
+    async def start_stream(self, packet_ids):
+        """
+        Lets the robot send the packets every 15 ms
+        Sensor reads of these packets return the last streamed values from then on
+        """
+        if not 0 < len(packet_ids) <= 255:
+            raise ValueError('Length of packet_ids out of range')
+
+        del self._buffer[:]
+        self._stream_packet_ids = list(packet_ids)
+        self._stream_values = {}
+        self._streaming = True
+        self._send(request_stream(packet_ids))
+        await self.drain()
+
+    async def pause_stream(self):
+        self._streaming = False
+        self._send(pause_resume_stream(False))
+        await self.drain()
+
+        # discard the frame that might have been on its way
+        await asyncio.sleep(2 * STREAM_PERIOD)
+        del self._buffer[:]
+
+    async def resume_stream(self):
+        self._stream_values = {}
+        self._streaming = True
+        self._send(pause_resume_stream(True))
+        await self.drain()
+
+    async def next_stream_frame(self, timeout=None):
+        """
+        Waits for the next frame of the stream
+        Returns a dictionary of the raw data of the streamed packets
+        """
+        if timeout is None:
+            timeout = self._timeout
+
+        self._stream_frame_event.clear()
+        await asyncio.wait_for(self._stream_frame_event.wait(), timeout)
+        return self._stream_frame
+
+    def _parse_stream(self):
+        buffer = self._buffer
+        while True:
+            header = buffer.find(STREAM_HEADER)
+            if header < 0:
+                del buffer[:]
+                return
+            del buffer[:header]
+
+            if len(buffer) < 2:
+                return
+            length = buffer[1] + 3
+            if len(buffer) < length:
+                return
+
+            frame = self._decode_stream_frame(buffer[:length])
+            if frame is None:
+                # the header byte was part of a packet, so search for the next one
+                del buffer[0]
+                continue
+
+            del buffer[:length]
+            self._stream_values.update(frame)
+            self._stream_frame = frame
+            self._stream_frame_event.set()
+
+    @staticmethod
+    def _decode_stream_frame(frame):
+        if sum(frame) & 0xFF:
+            return None
+
+        packets = {}
+        data = frame[2:-1]
+        offset = 0
+        while offset < len(data):
+            packet_id = data[offset]
+            size = RESPONSE_SIZES.get(packet_id)
+            if size is None or offset + 1 + size > len(data):
+                return None
+            packets[packet_id] = bytes(data[offset + 1:offset + 1 + size])
+            offset += 1 + size
+        return packets
+
+
+def _sensor_reader(packet_id, parser):
+    async def read(self):
+        return parser(await self._read_sensor_data(packet_id))
+    return read
+
+
+for _name, _packet_id, _parser in SENSORS:
+    setattr(AsyncCreate2, _name, _sensor_reader(_packet_id, _parser))
@@ -0,0 +1,165 @@
+from struct import Struct
+from time import time
+from six import indexbytes
+
+SENT = 0
+RECEIVED = 1
+
+# every record holds a timestamp, the direction, the original length and the first bytes of the data
+_record_header = Struct('<dBH')
+RECORD_DATA_SIZE = 117
+RECORD_SIZE = _record_header.size + RECORD_DATA_SIZE
+
+
+def format_data(data):
+    data = bytearray(data)
+    return 'Decimal:\t[{0}]\nHex:\t\t[{1}]\nBin:\t\t[{2}]'.format(
+        '|'.join(('{0:d}'.format(b)) for b in data),
+        '|'.join(('{0:X}'.format(b)) for b in data),
+        '|'.join(('{0:08b}'.format(b)) for b in data)
+    )
+
+
+class LazyFormattedData(object):
+    """
+    Defers formatting the data until a log message is actually emitted
+    """
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __str__(self):
+        return format_data(self._data)
+
+
+class SerialTrace(object):
+    """
+    Records the raw serial traffic with timestamps into a preallocated ring buffer
+    and counts the commands per opcode, so that nothing has to be formatted per call
+    """
+    def __init__(self, capacity=1024):
+        self._capacity = capacity
+        self._buffer = bytearray(capacity * RECORD_SIZE)
+        self._num_records = 0
+
+        self._opcode_counts = [0] * 256
+        self._bytes_sent = 0
+        self._bytes_received = 0
+        self._counter_start = time()
+
+    def __len__(self):
+        return min(self._num_records, self._capacity)
+
+    def __str__(self):
+        return '\n'.join('{0:.3f} {1}\n{2}'.format(timestamp, 'Sent' if direction == SENT else 'Received',
+                                                 format_data(data))
+                         for timestamp, direction, data in self.records())
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def elapsed(self):
+        """
+        Seconds since the counters were reset
+        """
+        return time() - self._counter_start
+
+    def _record(self, direction, data, timestamp=None):
+        if timestamp is None:
+            timestamp = time()
+
+        offset = (self._num_records % self._capacity) * RECORD_SIZE
+        length = min(len(data), RECORD_DATA_SIZE)
+        _record_header.pack_into(self._buffer, offset, timestamp, direction, len(data))
+        data_offset = offset + _record_header.size
+        self._buffer[data_offset:data_offset + length] = data[:length]
+        self._num_records += 1
+
+    def record_sent(self, data):
+        self._record(SENT, data)
+        if len(data):
+            self._opcode_counts[indexbytes(data, 0)] += 1
+        self._bytes_sent += len(data)
+
+    def record_received(self, data):
+        self._record(RECEIVED, data)
+        self._bytes_received += len(data)
+
+    def records(self):
+        """
+        Yields (timestamp, direction, data) from the oldest to the newest record
+        Data that was longer than RECORD_DATA_SIZE is truncated
+        """
+        first = max(self._num_records - self._capacity, 0)
+        for i in range(first, self._num_records):
+            offset = (i % self._capacity) * RECORD_SIZE
+            timestamp, direction, length = _record_header.unpack_from(self._buffer, offset)
+            data_offset = offset + _record_header.size
+            yield timestamp, direction, bytes(self._buffer[data_offset:data_offset + min(length, RECORD_DATA_SIZE)])
+
+    def clear(self):
+        self._num_records = 0
+
+    def save(self, filename):
+        """
+        Writes the records in chronological order as fixed size binary records
+        """
+        first = max(self._num_records - self._capacity, 0)
+        start = (first % self._capacity) * RECORD_SIZE
+        end = (self._num_records % self._capacity) * RECORD_SIZE
+        with open(filename, 'wb') as f:
+            if len(self) == self._capacity:
+                f.write(self._buffer[start:])
+                f.write(self._buffer[:end])
+            else:
+                f.write(self._buffer[:end])
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'rb') as f:
+            data = f.read()
+
+        trace = cls(capacity=max(len(data) // RECORD_SIZE, 1))
+        trace._buffer[:len(data)] = data
+        trace._num_records = len(data) // RECORD_SIZE
+        return trace
+
+    def summary(self):
+        """
+        Returns the elapsed time since the counters were reset, the number of
+        commands per opcode and the number of bytes sent and received
+        """
+        counts = dict((opcode, count) for opcode, count in enumerate(self._opcode_counts) if count)
+        return self.elapsed, counts, self._bytes_sent, self._bytes_received
+
+    def format_summary(self):
+        elapsed, counts, bytes_sent, bytes_received = self.summary()
+        elapsed = max(elapsed, 1e-9)
+        lines = ['{0:d} bytes sent ({1:.1f}/s), {2:d} bytes received ({3:.1f}/s) in {4:.1f} seconds'.format(
+            bytes_sent, bytes_sent / elapsed, bytes_received, bytes_received / elapsed, elapsed)]
+        for opcode in sorted(counts):
+            lines.append('Opcode {0:d}:\t{1:d} commands ({2:.1f}/s)'.format(opcode, counts[opcode],
+                                                                           counts[opcode] / elapsed))
+        return '\n'.join(lines)
+
+    def reset_counters(self):
+        self._opcode_counts = [0] * 256
+        self._bytes_sent = 0
+        self._bytes_received = 0
+        self._counter_start = time()
+
+
+class LazySummary(object):
+    """
+    Formats the summary of a trace only when a log message is actually emitted
+    """
+    __slots__ = ('_trace',)
+
+    def __init__(self, trace):
+        self._trace = trace
+
+    def __str__(self):
+        return self._trace.format_summary()
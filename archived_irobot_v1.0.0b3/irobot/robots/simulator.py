@@ -0,0 +1,424 @@
+import math
+import os
+import select
+import threading
+import tty
+from struct import Struct, pack
+from time import sleep, time
+
+from irobot.openinterface.constants import BUMPS_WHEEL_DROPS, MODES, RESPONSE_SIZES, ROBOT
+
+ROBOT_RADIUS = 174  # mm
+
+# number of argument bytes of every opcode, None for commands with a variable length
+_argument_sizes = {7: 0, 128: 0, 129: 1, 130: 0, 131: 0, 132: 0, 133: 0, 134: 0, 135: 0, 136: 0, 137: 4, 138: 1,
+                   139: 3, 140: None, 141: 1, 142: 1, 143: 0, 144: 3, 145: 4, 146: 4, 147: 1, 148: None, 149: None,
+                   150: 1, 151: 1, 162: 2, 163: 4, 164: 4, 165: 1, 167: 15, 168: 3, 173: 0}
+
+# packets of the sensor groups, the unused packets 32 and 33 have a length of 1 and 2 bytes within the groups
+_group_packets = {0: range(7, 27), 1: range(7, 17), 2: range(17, 21), 3: range(21, 27), 4: range(27, 35),
+                  5: range(35, 43), 6: range(7, 43), 100: range(7, 59), 101: range(43, 59), 106: range(46, 52),
+                  107: range(54, 59)}
+_group_packet_sizes = {32: 1, 33: 2}
+
+_unpack_drive = Struct('>hh').unpack
+_pack_signed_short = Struct('>h').pack
+_pack_unsigned_short = Struct('>H').pack
+
+_boot_message = b'bl-start\r\nSimulated Create 2\r\nbattery-current-zero 258\r\n'
+
+
+def _distance_to_segment(x, y, start, end):
+    """
+    Returns the distance of the point to the segment and the closest point on the segment
+    """
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    length = dx * dx + dy * dy
+    t = 0. if length == 0 else max(0., min(1., ((x - start[0]) * dx + (y - start[1]) * dy) / length))
+    closest_x = start[0] + t * dx
+    closest_y = start[1] + t * dy
+    return math.hypot(x - closest_x, y - closest_y), closest_x, closest_y
+
+
+def _ray_to_segment(x, y, angle, start, end):
+    """
+    Returns the distance along the ray to the segment or None, if the ray does not hit it
+    """
+    direction_x = math.cos(angle)
+    direction_y = math.sin(angle)
+    segment_x = end[0] - start[0]
+    segment_y = end[1] - start[1]
+    denominator = direction_x * segment_y - direction_y * segment_x
+    if abs(denominator) < 1e-12:
+        return None
+
+    t = ((start[0] - x) * segment_y - (start[1] - y) * segment_x) / denominator
+    u = ((start[0] - x) * direction_y - (start[1] - y) * direction_x) / denominator
+    if t >= 0 and 0 <= u <= 1:
+        return t
+    return None
+
+
+class Create2Simulator(object):
+    """
+    Simulates a Create 2 behind a pseudo-terminal, so that Create2 and everything
+    built on top of it can be run and benchmarked without a robot
+
+    The robot is a disk that drives with a kinematic differential drive model in
+    a room given as polygon in mm. Collisions block the movement and set the bump
+    sensors, the wheels keep turning like on a real robot pushing against a wall.
+    Responses are delayed by their transmission time at the baud rate.
+
+    Example:
+        with Create2Simulator() as simulator:
+            robot = Create2(simulator.port)
+    """
+    UPDATE_INTERVAL = 0.002  # seconds
+    STREAM_INTERVAL = 0.015  # seconds
+    LIGHT_BUMP_RANGE = 150.  # mm between the edge of the robot and an obstacle at which the signals start to rise
+    LIGHT_BUMP_ANGLES = (65, 35, 10, -10, -35, -65)  # degrees, left to right
+    LIGHT_BUMP_THRESHOLD = 100  # signal above which the light bumper bits are set
+
+    def __init__(self, room=None, pose=(0, 0, 0), baud_rate=115200, latency=True, battery_charge=2500,
+                 battery_capacity=2696):
+        """
+        Arguments - room: corners of the room in mm, a 4x4 m square around the
+        origin by default; pose: x and y in mm and heading in degrees
+        """
+        if room is None:
+            room = [(-2000, -2000), (2000, -2000), (2000, 2000), (-2000, 2000)]
+        self._walls = [(room[i], room[(i + 1) % len(room)]) for i in range(len(room))]
+        self._byte_time = 10. / baud_rate if latency else 0.  # start, 8 data and stop bit
+
+        self._lock = threading.RLock()
+        self._x = float(pose[0])
+        self._y = float(pose[1])
+        self._heading = math.radians(pose[2])
+
+        self._oi_mode = MODES.OFF
+        self._velocity = 0
+        self._radius = 0
+        self._right_velocity = 0
+        self._left_velocity = 0
+        self._left_ticks = 0.
+        self._right_ticks = 0.
+        self._distance = 0.
+        self._angle = 0.
+        self._bumps = 0
+        self._light_bump_signals = [0] * 6
+        self._battery_charge = float(battery_charge)
+        self._battery_capacity = battery_capacity
+
+        self._songs = {}
+        self._song_number = 0
+        self._song_end = 0.
+
+        self._stream_packets = []
+        self._stream_enabled = False
+        self._last_stream_time = 0.
+
+        self._buffer = bytearray()
+        self._running = False
+        self._thread = None
+
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        self._update_sensors()
+        self._running = True
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        os.close(self._master)
+        os.close(self._slave)
+
+    @property
+    def pose(self):
+        """
+        The true pose of the robot: x and y in mm and heading in degrees
+        """
+        with self._lock:
+            return self._x, self._y, math.degrees(self._heading)
+
+    @pose.setter
+    def pose(self, value):
+        with self._lock:
+            self._x = float(value[0])
+            self._y = float(value[1])
+            self._heading = math.radians(value[2])
+            self._update_sensors()
+
+    @property
+    def oi_mode(self):
+        return self._oi_mode
+
+    @property
+    def battery_charge(self):
+        return self._battery_charge
+
+    @battery_charge.setter
+    def battery_charge(self, value):
+        self._battery_charge = float(value)
+
+    def _run(self):
+        last_update = time()
+        while self._running:
+            readable, _, _ = select.select([self._master], [], [], self.UPDATE_INTERVAL)
+            if readable:
+                try:
+                    data = os.read(self._master, 1024)
+                except OSError:
+                    data = b''
+                # the bytes need time to arrive at the robot
+                sleep(len(data) * self._byte_time)
+                self._buffer.extend(data)
+
+            now = time()
+            with self._lock:
+                self._step(now - last_update)
+                last_update = now
+                self._process_commands()
+            if self._stream_enabled and now - self._last_stream_time >= self.STREAM_INTERVAL:
+                self._last_stream_time = now
+                self._write(self._stream_frame())
+
+    def _write(self, data):
+        sleep(len(data) * self._byte_time)
+        try:
+            os.write(self._master, data)
+        except OSError:
+            pass
+
+    def _step(self, dt):
+        if self._oi_mode in (MODES.SAFE, MODES.FULL):
+            left_velocity = self._left_velocity
+            right_velocity = self._right_velocity
+        else:
+            left_velocity = right_velocity = 0
+
+        dist_left_wheel = left_velocity * dt
+        dist_right_wheel = right_velocity * dt
+        distance = (dist_left_wheel + dist_right_wheel) / 2
+        delta_heading = (dist_right_wheel - dist_left_wheel) / ROBOT.WHEEL_BASE
+
+        x = self._x + distance * math.cos(self._heading + delta_heading / 2)
+        y = self._y + distance * math.sin(self._heading + delta_heading / 2)
+        if not self._collides(x, y):
+            self._x = x
+            self._y = y
+        self._heading += delta_heading
+
+        self._left_ticks += dist_left_wheel / ROBOT.TICK_TO_DISTANCE
+        self._right_ticks += dist_right_wheel / ROBOT.TICK_TO_DISTANCE
+        self._distance += distance
+        self._angle += math.degrees(delta_heading)
+
+        # discharge with about 1.5 A while driving and 0.2 A otherwise
+        current = 1500 if left_velocity or right_velocity else 200
+        self._battery_charge = max(self._battery_charge - current * dt / 3600, 0)
+
+        self._update_sensors()
+
+    def _collides(self, x, y):
+        return any(_distance_to_segment(x, y, start, end)[0] < ROBOT_RADIUS for start, end in self._walls)
+
+    def _update_sensors(self):
+        self._bumps = 0
+        for start, end in self._walls:
+            distance, closest_x, closest_y = _distance_to_segment(self._x, self._y, start, end)
+            if distance > ROBOT_RADIUS + 2:
+                continue
+            # the bumper covers the front half of the robot
+            contact_angle = math.atan2(closest_y - self._y, closest_x - self._x) - self._heading
+            contact_angle = math.degrees((contact_angle + math.pi) % (2 * math.pi) - math.pi)
+            if abs(contact_angle) > 90:
+                continue
+            if contact_angle > -10:
+                self._bumps |= BUMPS_WHEEL_DROPS.BUMP_LEFT
+            if contact_angle < 10:
+                self._bumps |= BUMPS_WHEEL_DROPS.BUMP_RIGHT
+
+        for i, angle in enumerate(self.LIGHT_BUMP_ANGLES):
+            ray_angle = self._heading + math.radians(angle)
+            hits = [_ray_to_segment(self._x, self._y, ray_angle, start, end) for start, end in self._walls]
+            hits = [hit for hit in hits if hit is not None]
+            gap = (min(hits) - ROBOT_RADIUS) if hits else float('inf')
+            if gap >= self.LIGHT_BUMP_RANGE:
+                self._light_bump_signals[i] = 0
+            else:
+                self._light_bump_signals[i] = int(4095 * (1 - max(gap, 0) / self.LIGHT_BUMP_RANGE) ** 2)
+
+    def _set_drive(self, velocity, radius):
+        self._velocity = velocity
+        self._radius = radius
+        if radius in (-32768, 32767):
+            self._left_velocity = self._right_velocity = velocity
+        elif radius == -1:
+            self._left_velocity = velocity
+            self._right_velocity = -velocity
+        elif radius == 1:
+            self._left_velocity = -velocity
+            self._right_velocity = velocity
+        else:
+            self._left_velocity = velocity * (radius - ROBOT.WHEEL_BASE / 2.) / radius
+            self._right_velocity = velocity * (radius + ROBOT.WHEEL_BASE / 2.) / radius
+
+    def _set_drive_direct(self, right_velocity, left_velocity):
+        self._velocity = (right_velocity + left_velocity) // 2
+        self._radius = 0
+        self._right_velocity = right_velocity
+        self._left_velocity = left_velocity
+
+    def _command_length(self, buffer):
+        """
+        Returns the length of the command at the start of the buffer or None, if it is incomplete
+        """
+        opcode = buffer[0]
+        size = _argument_sizes[opcode]
+        if size is not None:
+            length = size + 1
+        elif opcode == 140:
+            if len(buffer) < 3:
+                return None
+            length = 3 + 2 * buffer[2]
+        else:
+            if len(buffer) < 2:
+                return None
+            length = 2 + buffer[1]
+        return length if len(buffer) >= length else None
+
+    def _process_commands(self):
+        while self._buffer:
+            if self._buffer[0] not in _argument_sizes:
+                # unknown opcodes are ignored like on the robot
+                del self._buffer[0]
+                continue
+
+            length = self._command_length(self._buffer)
+            if length is None:
+                return
+            command = bytes(self._buffer[:length])
+            del self._buffer[:length]
+            self._execute(bytearray(command))
+
+    def _execute(self, command):
+        opcode = command[0]
+        arguments = command[1:]
+
+        if opcode == 7:
+            self._oi_mode = MODES.OFF
+            self._stream_enabled = False
+            self._set_drive(0, 32767)
+            self._write(_boot_message)
+        elif opcode == 128:
+            self._oi_mode = MODES.PASSIVE
+        elif opcode in (130, 131):
+            self._oi_mode = MODES.SAFE
+        elif opcode == 132:
+            self._oi_mode = MODES.FULL
+        elif opcode in (133, 134, 135, 136, 143):
+            self._oi_mode = MODES.PASSIVE
+            self._set_drive(0, 32767)
+        elif opcode == 173:
+            self._oi_mode = MODES.OFF
+            self._stream_enabled = False
+            self._set_drive(0, 32767)
+        elif opcode == 137:
+            self._set_drive(*_unpack_drive(bytes(arguments)))
+        elif opcode == 145:
+            self._set_drive_direct(*_unpack_drive(bytes(arguments)))
+        elif opcode == 140:
+            notes = arguments[2:]
+            self._songs[arguments[0]] = sum(notes[1::2]) / 64.
+        elif opcode == 141:
+            self._song_number = arguments[0]
+            self._song_end = time() + self._songs.get(arguments[0], 0)
+        elif opcode == 142:
+            self._write(self._sensor_data(arguments[0]))
+        elif opcode == 149:
+            self._write(b''.join(self._sensor_data(packet_id) for packet_id in arguments[1:]))
+        elif opcode == 148:
+            self._stream_packets = list(arguments[1:])
+            self._stream_enabled = True
+        elif opcode == 150:
+            self._stream_enabled = bool(arguments[0])
+
+    def _encoder_counts(self, ticks):
+        return _pack_signed_short((int(ticks) + 32768) % 65536 - 32768)
+
+    def _packet(self, packet_id):
+        if packet_id == 7:
+            return pack('B', self._bumps)
+        if packet_id == 19:
+            data = _pack_signed_short(int(max(min(self._distance, 32767), -32768)))
+            self._distance = 0.
+            return data
+        if packet_id == 20:
+            data = _pack_signed_short(int(max(min(self._angle, 32767), -32768)))
+            self._angle = 0.
+            return data
+        if packet_id == 22:
+            return _pack_unsigned_short(int(14000 + 2800 * self._battery_charge / self._battery_capacity))
+        if packet_id == 23:
+            return _pack_signed_short(-1500 if self._left_velocity or self._right_velocity else -200)
+        if packet_id == 24:
+            return pack('b', 25)
+        if packet_id == 25:
+            return _pack_unsigned_short(int(self._battery_charge))
+        if packet_id == 26:
+            return _pack_unsigned_short(self._battery_capacity)
+        if packet_id == 35:
+            return pack('B', self._oi_mode)
+        if packet_id == 36:
+            return pack('B', self._song_number)
+        if packet_id == 37:
+            return pack('B', time() < self._song_end)
+        if packet_id == 38:
+            return pack('B', len(self._stream_packets))
+        if packet_id in (39, 40, 41, 42):
+            values = {39: self._velocity, 40: self._radius, 41: self._right_velocity, 42: self._left_velocity}
+            return _pack_signed_short(int(values[packet_id]))
+        if packet_id == 43:
+            return self._encoder_counts(self._left_ticks)
+        if packet_id == 44:
+            return self._encoder_counts(self._right_ticks)
+        if packet_id == 45:
+            bits = 0
+            for i, signal in enumerate(self._light_bump_signals):
+                if signal > self.LIGHT_BUMP_THRESHOLD:
+                    bits |= 1 << i
+            return pack('B', bits)
+        if 46 <= packet_id <= 51:
+            return _pack_unsigned_short(self._light_bump_signals[packet_id - 46])
+
+        # everything else is not simulated
+        return b'\x00' * RESPONSE_SIZES.get(packet_id, 0)
+
+    def _sensor_data(self, packet_id):
+        if packet_id in _group_packets:
+            return b''.join(self._packet(i) if i not in _group_packet_sizes else b'\x00' * _group_packet_sizes[i]
+                            for i in _group_packets[packet_id])
+        return self._packet(packet_id)
+
+    def _stream_frame(self):
+        with self._lock:
+            data = b''.join(pack('B', packet_id) + self._sensor_data(packet_id) for packet_id in self._stream_packets)
+        frame = bytearray(pack('BB', 19, len(data)) + data)
+        frame.append((256 - sum(frame) % 256) % 256)
+        return bytes(frame)
@@ -40,3 +40,12 @@ class TestCommands(unittest.TestCase):
     def test_set_song(self):
         cmd = set_song(0, [(31, 32), (85, 100)])
         self.assertEqual(to_str(cmd), '[0x8C|0x00|0x02|0x1F|0x20|0x55|0x64]')
+
+    def test_request_sensor_list(self):
+        cmd = request_sensor_list([7, 43, 44])
+        self.assertEqual(to_str(cmd), '[0x95|0x03|0x07|0x2B|0x2C]')
+
+    def test_request_stream(self):
+        cmd = request_stream([7, 43, 44])
+        self.assertEqual(to_str(cmd), '[0x94|0x03|0x07|0x2B|0x2C]')
+        self.assertEqual(to_str(pause_resume_stream(False)), '[0x96|0x00]')
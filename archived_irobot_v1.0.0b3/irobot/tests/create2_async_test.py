@@ -0,0 +1,73 @@
+import asyncio
+import unittest
+
+from irobot.openinterface.constants import MODES
+from irobot.robots.create2_async import AsyncCreate2
+from irobot.robots.simulator import Create2Simulator
+
+
+class TestAsyncCreate2(unittest.TestCase):
+    def setUp(self):
+        self.simulator = Create2Simulator(latency=False)
+        self.simulator.start()
+
+    def tearDown(self):
+        self.simulator.close()
+
+    def run_with_robot(self, test):
+        async def run():
+            robot = await AsyncCreate2.connect(self.simulator.port, timeout=0.1)
+            try:
+                await test(robot)
+            finally:
+                await robot.close()
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.close()
+
+    def test_sensors(self):
+        async def test(robot):
+            await robot.set_oi_mode(MODES.FULL)
+            self.assertEqual(self.simulator.oi_mode, MODES.FULL)
+            self.assertEqual(await robot.battery_capacity(), 2696)
+            self.assertFalse(await robot.bumps_and_wheel_drops())
+
+            packets = await robot.read_sensor_list([7, 43, 44])
+            self.assertEqual(len(packets[1]), 2)
+
+        self.run_with_robot(test)
+
+    def test_stream_and_drive(self):
+        async def test(robot):
+            await robot.set_oi_mode(MODES.FULL)
+            await robot.start_stream([7, 43, 44])
+            robot.drive_straight(200)
+            await asyncio.sleep(0.3)
+
+            frame = await robot.next_stream_frame()
+            self.assertEqual(sorted(frame), [7, 43, 44])
+            self.assertGreater(await robot.left_encoder_counts(), 0)
+
+            # packets that are not streamed are queried while the stream is paused
+            self.assertEqual(await robot.oi_mode(), MODES.FULL)
+
+            robot.drive_straight(0)
+            await robot.pause_stream()
+
+        self.run_with_robot(test)
+
+    def test_cancel_wait(self):
+        async def test(robot):
+            robot.drive_straight(0)
+            # there is no stream, so the wait only ends when it is cancelled
+            task = asyncio.ensure_future(robot.next_stream_frame(timeout=10))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.run_with_robot(test)
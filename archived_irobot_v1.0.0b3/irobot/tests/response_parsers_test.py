@@ -0,0 +1,49 @@
+import unittest
+
+from irobot.openinterface.constants import RESPONSE_SIZES
+from irobot.openinterface.response_parsers import BumpsAndWheelDrop, LightBumper, SensorGroup0, SensorGroup1, \
+    SensorGroup2, SensorGroup3, SensorGroup4, SensorGroup5, SensorGroup6, SensorGroup100, SensorGroup101, \
+    SensorGroup106, SensorGroup107
+
+
+class TestResponseParsers(unittest.TestCase):
+    def test_group_sizes(self):
+        groups = {0: SensorGroup0, 1: SensorGroup1, 2: SensorGroup2, 3: SensorGroup3, 4: SensorGroup4,
+                  5: SensorGroup5, 6: SensorGroup6, 100: SensorGroup100, 101: SensorGroup101, 106: SensorGroup106,
+                  107: SensorGroup107}
+        for packet_id, group in groups.items():
+            self.assertEqual(group.size(), RESPONSE_SIZES[packet_id])
+
+    def test_packed_binary_data(self):
+        bumps = BumpsAndWheelDrop(b'\x02')
+        self.assertTrue(bumps)
+        self.assertTrue(bumps.bump_left)
+        self.assertFalse(bumps.bump_right)
+        self.assertFalse(BumpsAndWheelDrop(b'\x00'))
+        self.assertTrue(LightBumper(0x3F).right)
+
+    def test_sensor_group_100(self):
+        data = bytearray(80)
+        data[0] = 0x01  # bump right
+        data[10] = 42  # ir character omni
+        data[12:14] = b'\xFF\x38'  # distance -200
+        data[22:24] = b'\x0A\x8C'  # battery charge 2700
+        data[52:54] = b'\xFF\xFE'  # left encoder counts
+        data[61:63] = b'\x01\x00'  # light bump center left signal 256
+        data[79] = 0x01  # stasis toggling
+
+        group = SensorGroup100(bytes(data))
+        self.assertTrue(group.bumps_and_wheel_drops.bump_right)
+        self.assertEqual(group.ir_char_omni_sensor, 42)
+        self.assertEqual(group.distance, -200)
+        self.assertEqual(group.battery_charge, 2700)
+        self.assertEqual(group.left_encoder_counts, 65534)
+        self.assertEqual(group.light_bump_center_left_signal, 256)
+        self.assertTrue(group.stasis.toggling)
+
+    def test_iter_decode(self):
+        data = b'\x00\x01\x00\x02\x00\x03\x00\x04\x00\x05\x00\x06' * 3
+        groups = list(SensorGroup106.iter_decode(data))
+        self.assertEqual(len(groups), 3)
+        self.assertEqual(groups[2].light_bump_right_signal, 6)
+        self.assertEqual(groups[0]._asdict()['light_bump_left_signal'], 1)
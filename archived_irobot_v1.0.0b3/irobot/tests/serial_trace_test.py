@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from irobot.openinterface.commands import request_sensor_data, drive
+from irobot.robots.serial_trace import SerialTrace, LazyFormattedData, SENT, RECEIVED, RECORD_DATA_SIZE
+
+
+class TestSerialTrace(unittest.TestCase):
+    def test_records(self):
+        trace = SerialTrace(capacity=4)
+        trace.record_sent(request_sensor_data(7))
+        trace.record_received(b'\x03')
+
+        records = list(trace.records())
+        self.assertEqual(len(trace), 2)
+        self.assertEqual([(direction, data) for _, direction, data in records],
+                         [(SENT, b'\x8E\x07'), (RECEIVED, b'\x03')])
+
+    def test_ring_buffer_keeps_newest_records(self):
+        trace = SerialTrace(capacity=3)
+        for i in range(5):
+            trace.record_received(bytes(bytearray([i])))
+
+        self.assertEqual(len(trace), 3)
+        self.assertEqual([data for _, _, data in trace.records()], [b'\x02', b'\x03', b'\x04'])
+
+    def test_long_data_is_truncated(self):
+        trace = SerialTrace(capacity=2)
+        trace.record_received(b'\x01' * (RECORD_DATA_SIZE + 10))
+        self.assertEqual(len(list(trace.records())[0][2]), RECORD_DATA_SIZE)
+
+    def test_summary(self):
+        trace = SerialTrace()
+        trace.record_sent(request_sensor_data(7))
+        trace.record_sent(request_sensor_data(43))
+        trace.record_sent(drive(100, 0))
+        trace.record_received(b'\x00\x00\x00')
+
+        _, counts, bytes_sent, bytes_received = trace.summary()
+        self.assertEqual(counts, {137: 1, 142: 2})
+        self.assertEqual(bytes_sent, 9)
+        self.assertEqual(bytes_received, 3)
+
+        trace.reset_counters()
+        self.assertEqual(trace.summary()[1], {})
+
+    def test_save_and_load(self):
+        trace = SerialTrace(capacity=3)
+        for i in range(4):
+            trace.record_sent(request_sensor_data(i))
+
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            trace.save(filename)
+            loaded = SerialTrace.load(filename)
+        finally:
+            os.remove(filename)
+
+        self.assertEqual(list(loaded.records()), list(trace.records()))
+
+    def test_lazy_formatting(self):
+        self.assertEqual(str(LazyFormattedData(b'\x8E\x07')),
+                         'Decimal:\t[142|7]\nHex:\t\t[8E|7]\nBin:\t\t[10001110|00000111]')
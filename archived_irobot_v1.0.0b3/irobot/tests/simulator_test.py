@@ -0,0 +1,48 @@
+import gc
+import time
+import unittest
+
+from irobot.openinterface.constants import MODES
+from irobot.robots.create2 import Create2
+from irobot.robots.simulator import Create2Simulator
+
+
+class TestSimulator(unittest.TestCase):
+    def setUp(self):
+        self.simulator = Create2Simulator(latency=False)
+        self.simulator.start()
+        self.robot = Create2(self.simulator.port, timeout=0.1)
+
+    def tearDown(self):
+        # the robot is stopped when it is garbage collected, so this has to happen before the simulator is closed
+        del self.robot
+        gc.collect()
+        self.simulator.close()
+
+    def test_modes(self):
+        self.assertEqual(self.robot.oi_mode, MODES.PASSIVE)
+        self.robot.oi_mode = MODES.FULL
+        self.assertEqual(self.simulator.oi_mode, MODES.FULL)
+
+    def test_drive_straight(self):
+        self.robot.oi_mode = MODES.FULL
+        self.robot.drive_straight(200)
+        time.sleep(0.5)
+        self.robot.drive_straight(0)
+
+        x, y, heading = self.simulator.pose
+        self.assertAlmostEqual(x, 100, delta=10)
+        self.assertAlmostEqual(heading, 0)
+        self.assertAlmostEqual(self.robot.left_encoder_counts * 0.444565, x, delta=1)
+
+    def test_bump(self):
+        self.simulator.pose = (1800, 0, 0)
+        self.robot.oi_mode = MODES.FULL
+        self.robot.drive_straight(200)
+        time.sleep(0.3)
+        self.robot.drive_straight(0)
+
+        bumps = self.robot.bumps_and_wheel_drops
+        self.assertTrue(bumps.bump_left and bumps.bump_right)
+        self.assertLess(self.simulator.pose[0], 2000 - 174 + 1)
+        self.assertGreater(self.robot.light_bump_center_left_signal, 1000)
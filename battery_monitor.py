@@ -0,0 +1,151 @@
+import irobot.openinterface.response_parsers as roboparsers
+import csv
+import os
+import time
+import numpy as np
+
+import measurement_params as parameters
+import measurement_utils as utils
+
+
+# charging state, voltage, current, temperature, battery charge and battery capacity
+BATTERY_PACKETS = [21, 22, 23, 24, 25, 26]
+
+
+class BatteryMonitor(object):
+    """
+    Samples the battery telemetry of a Create 2 robot into a time series and estimates how much charge a measurement
+    takes, so that the client can predict how many more measurements fit into the remaining battery charge.
+    """
+    def __init__(self, robot):
+        """
+        :param robot: Create2 instance of the robot
+        """
+        self.logger = utils.init_logger('BatteryMonitor')
+        self.rob = robot
+
+        self.samples = []
+        self.reachable = True  # False if the telemetry could not be read the last time
+
+        # samples that were already appended to the telemetry file by save
+        self._saved_filename = None
+        self._n_saved_samples = 0
+
+        # battery charge at the beginning of each measurement [in mAh]
+        self._measurement_start_charges = {}
+
+    def sample(self, measurement_id=None, measurement_start=False):
+        """
+        Reads the battery telemetry with a single Query List command and adds it to the time series.
+
+        :param measurement_id: ID of the current measurement
+        :param measurement_start: marks the sample as the beginning of the measurement, which is used to estimate the
+        charge that one measurement takes
+        :return: the sample or None, if the telemetry could not be read
+        """
+        try:
+            packets = self.rob.read_sensor_list(BATTERY_PACKETS)
+        except Exception:
+            self.logger.warning('Could not read the battery telemetry. The robot might have powered off.')
+            self.reachable = False
+            return None
+        self.reachable = True
+
+        battery_sample = {'time': time.time(),
+                          'measurement_id': measurement_id,
+                          'charging_state': roboparsers.unsigned_byte_response(packets[0]),
+                          'voltage': roboparsers.unsigned_short_response(packets[1]),  # mV
+                          'current': roboparsers.short_response(packets[2]),  # mA, negative values when discharging
+                          'temperature': roboparsers.byte_response(packets[3]),  # degrees Celsius
+                          'charge': roboparsers.unsigned_short_response(packets[4]),  # mAh
+                          'capacity': roboparsers.unsigned_short_response(packets[5])}  # mAh
+        self.samples.append(battery_sample)
+
+        if measurement_start and measurement_id is not None:
+            self._measurement_start_charges[measurement_id] = battery_sample['charge']
+        return battery_sample
+
+    def get_charge_per_measurement(self):
+        """
+        Estimates the charge that one measurement cycle takes from the charge differences between the beginnings of the
+        last measurements. The median makes the estimate robust against jumps of the reported charge.
+
+        :return: charge per measurement [in mAh] or None, if less than two measurements were sampled
+        """
+        measurement_ids = sorted(self._measurement_start_charges)[-(parameters.BATTERY_ESTIMATION_WINDOW + 1):]
+        charges = np.array([self._measurement_start_charges[measurement_id] for measurement_id in measurement_ids])
+        charge_differences = -np.diff(charges)
+
+        # increasing charges mean that the robot was charged in between
+        charge_differences = charge_differences[charge_differences >= 0]
+        if len(charge_differences) == 0:
+            return None
+        return float(np.median(charge_differences))
+
+    def get_status(self):
+        """
+        :return: dictionary with the last battery sample, the estimated charge and energy per measurement and the
+        predicted number of remaining measurements, which is None if it cannot be estimated yet. If the last sample
+        could not be read, only reachable=False and the time of the last valid sample are returned, so that no decision
+        is made on outdated telemetry.
+        """
+        if not self.reachable:
+            return {'reachable': False, 'time': self.samples[-1]['time'] if self.samples else None}
+        if not self.samples:
+            return None
+
+        status = dict(self.samples[-1])
+        status['reachable'] = True
+        status['charge_ratio'] = status['charge'] / status['capacity'] if status['capacity'] > 0 else 0
+
+        charge_per_measurement = self.get_charge_per_measurement()
+        status['charge_per_measurement'] = charge_per_measurement  # mAh
+        if charge_per_measurement is None:
+            status['energy_per_measurement'] = None
+            status['remaining_measurements'] = None
+        else:
+            status['energy_per_measurement'] = charge_per_measurement * status['voltage'] / 1e6  # Wh
+            usable_charge = max(status['charge'] - parameters.BATTERY_RESERVE_CHARGE, 0)
+            status['remaining_measurements'] = int(usable_charge / charge_per_measurement) \
+                if charge_per_measurement > 0 else None
+        return status
+
+    def save(self, filename):
+        """
+        Appends the samples since the last call to the telemetry file, so that the cost does not grow with the session
+        length and the telemetry from before a restart of the RobotServer is kept. The header is only written to new
+        files.
+        """
+        filename = str(filename)
+        if filename != self._saved_filename:
+            self._saved_filename = filename
+            self._n_saved_samples = 0
+        new_samples = self.samples[self._n_saved_samples:]
+        if not new_samples:
+            return
+
+        write_header = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        with open(filename, 'a', newline='') as battery_file:
+            writer = csv.DictWriter(battery_file, fieldnames=list(new_samples[0]))
+            if write_header:
+                writer.writeheader()
+            writer.writerows(new_samples)
+        self._n_saved_samples = len(self.samples)
+
+
+def needs_charging(battery_status):
+    """
+    Decides on the client, whether a robot has to be parked and charged before the next measurement.
+
+    :param battery_status: battery status as returned by BatteryMonitor.get_status
+    """
+    if battery_status is None:
+        return False
+    if not battery_status['reachable']:
+        # the robot might have powered off, because its battery is depleted
+        return True
+    if battery_status['charge'] <= parameters.BATTERY_RESERVE_CHARGE:
+        return True
+
+    remaining_measurements = battery_status['remaining_measurements']
+    return remaining_measurements is not None and remaining_measurements < parameters.BATTERY_MIN_REMAINING_MEASUREMENTS
@@ -0,0 +1,38 @@
+import numpy as np
+
+import position_tracking as tracking
+import room_calibration as calibration
+
+import measurement_utils as utils
+import measurement_params as parameters
+
+# Start logging server
+logging_server = utils.start_logging_server()
+
+logger = utils.init_logger('Calibration', add_logserver_handler=False)
+
+tracking_controller = tracking.PositionTracker()
+
+input('Please go and turn on the tracker on the receiver robot. After that you can continue by pressing any key.')
+tracking_controller.connect_tracker(parameters.ROBOT_TYPE_RECEIVER)
+
+# The receiver robot is placed at every reference point, the tracker positions are measured in the tracking universe
+tracked_positions = []
+for room_point in parameters.ROOM_REFERENCE_POINTS:
+    input('Please place the receiver robot at the room coordinates {} m. After that you can continue by pressing any '
+          'key.'.format(room_point))
+    tracking_controller.wait_until_settled()
+    position_rcv = tracking_controller.measure_all_positions(adaptive=True)[parameters.ROBOT_TYPE_RECEIVER]
+    tracked_positions.append(position_rcv.position)
+    logger.info('Measured the reference point {} m at {}.'.format(room_point, position_rcv.position))
+
+room_calibration = calibration.RoomCalibration.from_reference_points(np.array(tracked_positions),
+                                                                    np.array(parameters.ROOM_REFERENCE_POINTS),
+                                                                    room_name=parameters.ROOM_NAME)
+room_calibration.save_for_room()
+logger.info('Saved the calibration of room \"{}\". The RMS error at the reference points is {:.1f} mm.'
+            .format(parameters.ROOM_NAME, 1000 * room_calibration.rms_error))
+
+tracking_controller.close()
+logging_server.shutdown()
+logging_server.server_close()
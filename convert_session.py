@@ -0,0 +1,14 @@
+import argparse
+import pathlib
+
+import session_store
+
+parser = argparse.ArgumentParser(description='Converts the RIR wav files and the metadata CSV of a measurement session '
+                                             'into a session store.')
+parser.add_argument('session_path', help='directory of the session, e.g., ../../measurements/<session name>')
+parser.add_argument('--metadata', default=None, help='metadata CSV, by default <session name>_metadata.csv in the '
+                                                     'session directory')
+args = parser.parse_args()
+
+store = session_store.convert_session(pathlib.Path(args.session_path), metadata_filename=args.metadata)
+print('Converted {} measurements into \"{}\".'.format(len(store), store.path))
@@ -0,0 +1,187 @@
+import atexit
+import collections
+import logging
+import logging.handlers
+import queue
+import socket
+import threading
+import time
+
+import log_transport
+
+import measurement_params as parameters
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts log records into a bounded queue without ever blocking the logging thread. Records that do not fit into the
+    queue are dropped and counted per level, so that the LogShipper can report them later.
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.n_dropped = collections.Counter()
+
+    def emit(self, record):
+        # records that were received by the LoggingServer are not shipped again, otherwise a logger with the same name
+        # on the measurement laptop would send them back to the server in an endless loop
+        if getattr(record, 'shipped', False):
+            return
+        super().emit(record)
+
+    def prepare(self, record):
+        return log_transport.prepare_record(record, self.formatter or logging.Formatter())
+
+    def enqueue(self, record):
+        # the handler lock is held by Handler.handle, so the counters are only modified by one thread at a time
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.n_dropped[logging.getLevelName(record.levelno)] += 1
+
+    def pop_dropped(self):
+        """
+        :return: number of dropped records per level since the last call
+        """
+        with self.lock:
+            n_dropped, self.n_dropped = self.n_dropped, collections.Counter()
+        return n_dropped
+
+
+class LogShipper(threading.Thread):
+    """
+    Background thread that takes the records of a DroppingQueueHandler from the queue and sends them to the
+    LoggingServer in compact batches of the log_transport, i.e., one send per batch instead of one pickle per record.
+    While the server cannot be reached, batches are dropped and connecting is retried with an exponential backoff, like
+    the SocketHandler does.
+    """
+    def __init__(self, queue_handler, host=parameters.IP_MAIN, port=logging.handlers.DEFAULT_TCP_LOGGING_PORT,
+                 batch_size=parameters.LOG_BATCH_SIZE, flush_interval=parameters.LOG_FLUSH_INTERVAL):
+        """
+        :param batch_size: maximum number of records per batch
+        :param flush_interval: maximum time that a record waits for a batch to fill up [in seconds]
+        """
+        super().__init__(name='LogShipper', daemon=True)
+
+        self.queue_handler = queue_handler
+        self.queue = queue_handler.queue
+        self.address = (host, port)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.n_sent = 0
+        self.n_dropped = collections.Counter()
+
+        self._socket = None
+        self._encoder = None
+        self._retry_time = 0
+        self._retry_delay = 1  # seconds
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self._ship(self._get_batch())
+
+        # send the records that were logged until the shutdown
+        while not self.queue.empty():
+            self._ship(self._get_batch())
+        self._close_socket()
+
+    def stop(self, timeout=2):
+        self._stop_event.set()
+        self.join(timeout)
+
+    def _get_batch(self):
+        try:
+            batch = [self.queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _ship(self, batch):
+        # the records that were dropped since the last batch are reported by a single warning within the next batch
+        n_dropped = self.queue_handler.pop_dropped()
+        if n_dropped:
+            self.n_dropped.update(n_dropped)
+            batch.append(self._make_drop_record(n_dropped))
+        if not batch:
+            return
+
+        if not self._connect():
+            self.n_dropped['UNSENT'] += len(batch)
+            return
+
+        try:
+            self._socket.sendall(self._encoder.encode_batch(batch))
+            self.n_sent += len(batch)
+        except OSError:
+            self._close_socket()
+            self._schedule_retry()
+            self.n_dropped['UNSENT'] += len(batch)
+
+    @staticmethod
+    def _make_drop_record(n_dropped):
+        return log_transport.WireRecord(time.time(), logging.WARNING, 'LogShipper',
+                                        'Dropped {} log records, because the log queue was full: {}.'
+                                        .format(sum(n_dropped.values()), dict(n_dropped)), (), None)
+
+    def _connect(self):
+        if self._socket is not None:
+            return True
+        if time.monotonic() < self._retry_time:
+            return False
+
+        try:
+            self._socket = socket.create_connection(self.address, timeout=self._retry_delay)
+            self._socket.settimeout(5)
+
+            # the names and templates are interned per connection, so a new connection starts with empty tables
+            self._encoder = log_transport.LogBatchEncoder()
+            self._socket.sendall(self._encoder.encode_handshake())
+            self._retry_delay = 1
+            return True
+        except OSError:
+            self._close_socket()
+            self._schedule_retry()
+            return False
+
+    def _schedule_retry(self):
+        self._retry_time = time.monotonic() + self._retry_delay
+        self._retry_delay = min(2 * self._retry_delay, 30)
+
+    def _close_socket(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+_queue_handler = None
+_log_shipper = None
+_init_lock = threading.Lock()
+
+
+def get_queue_handler():
+    """
+    :return: the queue handler that ships the records of all loggers to the LoggingServer. The handler and the
+    LogShipper thread are created on the first call and the remaining records are sent when the interpreter exits.
+    """
+    global _queue_handler, _log_shipper
+
+    with _init_lock:
+        if _queue_handler is None:
+            _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=parameters.LOG_QUEUE_SIZE))
+            _log_shipper = LogShipper(_queue_handler)
+            _log_shipper.start()
+            atexit.register(_log_shipper.stop)
+    return _queue_handler
+
+
+def get_log_shipper():
+    return _log_shipper
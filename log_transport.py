@@ -0,0 +1,194 @@
+import collections
+import json
+import logging
+import numbers
+import struct
+
+import numpy as np
+
+
+# Every connection starts with the magic bytes, after that the client sends frames, each of which is a 4-byte length
+# followed by a batch. A batch holds the names and message templates that appear for the first time on the connection,
+# followed by the records, which only refer to them by their IDs.
+MAGIC = b'LOGB'
+FRAME_HEADER = struct.Struct('>L')
+BATCH_HEADER = struct.Struct('<HH')  # number of definitions, number of records
+DEFINITION_HEADER = struct.Struct('<BII')  # kind, ID, length of the string
+RECORD_HEADER = struct.Struct('<dBHIIII')  # created, level, logger ID, template ID, lengths of inline message, args, exc
+
+KIND_LOGGER = 0
+KIND_TEMPLATE = 1
+INLINE_TEMPLATE = 0  # the message is sent with the record instead of a template ID
+
+MAX_FRAME_LENGTH = 16 * 1024 * 1024
+MAX_TEMPLATES = 4096
+MAX_RECORDS_PER_BATCH = 2 ** 16 - 1
+
+PRIMITIVE_TYPES = (int, float, str, bool, type(None))
+_json_encoder = json.JSONEncoder(separators=(',', ':'), check_circular=False)
+
+
+# The fields of a log record that are transported. The logging thread only builds this tuple instead of copying the
+# whole LogRecord.
+WireRecord = collections.namedtuple('WireRecord', ['created', 'levelno', 'name', 'msg', 'args', 'exc_text'])
+
+
+class LogTransportError(Exception):
+    pass
+
+
+def to_wire_arg(arg):
+    """
+    Converts a log message argument into a value that can be encoded as JSON without losing its format specifiers, e.g.,
+    numpy scalars still work with %d and %f.
+
+    :return: the converted argument or None, if the argument is neither a number nor a string
+    """
+    if isinstance(arg, np.generic):
+        arg = arg.item()
+    if isinstance(arg, numbers.Integral):
+        return int(arg)
+    if isinstance(arg, numbers.Real):
+        return float(arg)
+    if isinstance(arg, str):
+        return str(arg)
+    return None
+
+
+def prepare_record(record, formatter):
+    """
+    Converts a record into a WireRecord in the thread that logged it, so that later changes of the arguments do not
+    change the message. Unlike QueueHandler.prepare, the message template and the arguments are kept apart.
+    """
+    msg = str(record.msg)
+    args = record.args
+    if not args:
+        args = ()
+    elif isinstance(args, tuple) and all(type(arg) in PRIMITIVE_TYPES for arg in args):
+        pass
+    else:
+        wire_args = tuple(to_wire_arg(arg) for arg in args) if isinstance(args, tuple) else (None,)
+        if None in wire_args:
+            # other objects, e.g., arrays, and mappings of %(name)s templates are formatted right away like by the
+            # logging module, so the server only has to format numbers and strings
+            msg = record.getMessage()
+            args = ()
+        else:
+            args = wire_args
+
+    exc_text = record.exc_text
+    if record.exc_info and not exc_text:
+        exc_text = formatter.formatException(record.exc_info)
+    if record.stack_info:
+        exc_text = '\n'.join(text for text in [exc_text, record.stack_info] if text)
+    return WireRecord(record.created, record.levelno, record.name, msg, args, exc_text)
+
+
+class LogBatchEncoder(object):
+    """
+    Encodes batches of WireRecords for one connection. Logger names are always interned. Templates are interned
+    if they have arguments or when they repeat, so that messages that were formatted by the caller, e.g., with
+    str.format, do not fill the table.
+    """
+    def __init__(self):
+        self._ids = {KIND_LOGGER: {}, KIND_TEMPLATE: {}}
+        self._seen_templates = set()
+
+    def encode_handshake(self):
+        return MAGIC
+
+    def encode_batch(self, records):
+        definitions = []
+        encoded_records = []
+        for record in records[:MAX_RECORDS_PER_BATCH]:
+            logger_id = self._get_id(KIND_LOGGER, record.name, definitions)
+
+            template_id = INLINE_TEMPLATE
+            msg = record.msg
+            args = record.args
+            if self._should_intern(msg, args):
+                template_id = self._get_id(KIND_TEMPLATE, msg, definitions)
+
+            inline = msg.encode('utf-8') if template_id == INLINE_TEMPLATE else b''
+            args = _json_encoder.encode(args).encode('utf-8') if args else b''
+            exc_text = record.exc_text.encode('utf-8') if record.exc_text else b''
+            encoded_records.append(RECORD_HEADER.pack(record.created, record.levelno, logger_id, template_id,
+                                                      len(inline), len(args), len(exc_text)))
+            encoded_records += [inline, args, exc_text]
+
+        payload = b''.join([BATCH_HEADER.pack(len(definitions) // 2, min(len(records), MAX_RECORDS_PER_BATCH))] +
+                           definitions + encoded_records)
+        return FRAME_HEADER.pack(len(payload)) + payload
+
+    def _should_intern(self, template, args):
+        if template in self._ids[KIND_TEMPLATE]:
+            return True
+        if len(self._ids[KIND_TEMPLATE]) >= MAX_TEMPLATES:
+            return False
+        if args or template in self._seen_templates:
+            return True
+
+        if len(self._seen_templates) >= MAX_TEMPLATES:
+            self._seen_templates.clear()
+        self._seen_templates.add(template)
+        return False
+
+    def _get_id(self, kind, string, definitions):
+        ids = self._ids[kind]
+        string_id = ids.get(string)
+        if string_id is None:
+            # the IDs start at 1, because 0 marks inline templates
+            string_id = len(ids) + 1
+            ids[string] = string_id
+            encoded = string.encode('utf-8')
+            definitions += [DEFINITION_HEADER.pack(kind, string_id, len(encoded)), encoded]
+        return string_id
+
+
+class LogBatchDecoder(object):
+    """
+    Decodes the batches of one connection into log records. Only strings, numbers and JSON arguments are decoded, so
+    unlike unpickling, a malicious client cannot execute code on the server.
+    """
+    def __init__(self):
+        self._strings = {KIND_LOGGER: {}, KIND_TEMPLATE: {}}
+
+    def decode_batch(self, payload):
+        try:
+            n_definitions, n_records = BATCH_HEADER.unpack_from(payload, 0)
+            offset = BATCH_HEADER.size
+
+            for _ in range(n_definitions):
+                kind, string_id, length = DEFINITION_HEADER.unpack_from(payload, offset)
+                offset += DEFINITION_HEADER.size
+                self._strings[kind][string_id] = self._read_string(payload, offset, length)
+                offset += length
+
+            records = []
+            for _ in range(n_records):
+                created, levelno, logger_id, template_id, inline_length, args_length, exc_length = \
+                    RECORD_HEADER.unpack_from(payload, offset)
+                offset += RECORD_HEADER.size
+
+                msg = self._read_string(payload, offset, inline_length)
+                offset += inline_length
+                if template_id != INLINE_TEMPLATE:
+                    msg = self._strings[KIND_TEMPLATE][template_id]
+                args = tuple(json.loads(self._read_string(payload, offset, args_length))) if args_length else ()
+                offset += args_length
+                exc_text = self._read_string(payload, offset, exc_length) if exc_length else None
+                offset += exc_length
+
+                records.append(logging.makeLogRecord({
+                    'name': self._strings[KIND_LOGGER][logger_id], 'levelno': levelno,
+                    'levelname': logging.getLevelName(levelno), 'msg': msg, 'args': args, 'exc_text': exc_text,
+                    'created': created, 'msecs': (created - int(created)) * 1000, 'shipped': True}))
+            return records
+        except (struct.error, KeyError, TypeError, ValueError, UnicodeDecodeError) as e:
+            raise LogTransportError('Could not decode the log batch: {}'.format(e)) from None
+
+    @staticmethod
+    def _read_string(payload, offset, length):
+        if offset + length > len(payload):
+            raise ValueError('The string exceeds the batch.')
+        return payload[offset:offset + length].decode('utf-8')
@@ -0,0 +1,119 @@
+import argparse
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import threading
+import time
+
+import log_shipping
+import log_transport
+import logging_server as logs
+
+MESSAGE = 'Measured position %d at %.3f m with %s.'
+
+
+class CountingHandler(logging.Handler):
+    """
+    Counts the records that the logging server received and signals when all records arrived.
+    """
+    def __init__(self, n_expected):
+        super().__init__()
+        self.n_received = 0
+        self.n_expected = n_expected
+        self.complete = threading.Event()
+
+    def emit(self, record):
+        record.getMessage()
+        self.n_received += 1
+        if self.n_received >= self.n_expected:
+            self.complete.set()
+
+
+def run_server(port, handler_name, n_records, connection):
+    """
+    Runs the logging server in its own process, like on the measurement laptop, and reports to the connection when all
+    records arrived.
+    """
+    server = logs.LoggingServer(host='127.0.0.1', port=port, handler=getattr(logs, handler_name))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    counting_handler = CountingHandler(n_records)
+    server_logger = logging.getLogger('BenchmarkServer')
+    server_logger.addHandler(counting_handler)
+    server_logger.propagate = False
+    server.logname = server_logger.name
+
+    connection.send('ready')
+    counting_handler.complete.wait(120)
+    connection.send(counting_handler.n_received)
+    server.shutdown()
+    server.server_close()
+
+
+def run_transport(name, port, handler_name, client_handler, n_records):
+    """
+    :return: records per second from the first log call until the server has handled all records, log calls per second
+    in the logging thread
+    """
+    parent_connection, child_connection = multiprocessing.Pipe()
+    server_process = multiprocessing.Process(target=run_server, args=(port, handler_name, n_records, child_connection))
+    server_process.start()
+    parent_connection.recv()
+
+    client_logger = logging.getLogger('{}Client'.format(name))
+    client_logger.setLevel(logging.INFO)
+    client_logger.propagate = False
+    client_logger.addHandler(client_handler)
+
+    t_start = time.perf_counter()
+    for i in range(n_records):
+        client_logger.info(MESSAGE, i, 0.001 * i, 'receiver')
+    t_logged = time.perf_counter()
+    n_received = parent_connection.recv()
+    t_received = time.perf_counter()
+
+    server_process.join()
+    if n_received < n_records:
+        print('{}: only {} of {} records arrived.'.format(name, n_received, n_records))
+    return n_records / (t_received - t_start), n_records / (t_logged - t_start)
+
+
+def get_record_sizes():
+    """
+    :return: bytes per record of the pickled records and of the log batches
+    """
+    records = [logging.LogRecord('Benchmark', logging.INFO, __file__, 0, MESSAGE, (i, 0.001 * i, 'receiver'), None)
+               for i in range(100)]
+
+    socket_handler = logging.handlers.SocketHandler('127.0.0.1', 0)
+    pickle_size = sum(len(socket_handler.makePickle(record)) for record in records) / len(records)
+    encoder = log_transport.LogBatchEncoder()
+    formatter = logging.Formatter()
+    batch_size = len(encoder.encode_batch([log_transport.prepare_record(record, formatter) for record in records]))
+    return pickle_size, batch_size / len(records)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compares the throughput of the log batch transport with the pickled '
+                                                 'records of the SocketHandler on localhost.')
+    parser.add_argument('--records', type=int, default=50000, help='Number of log records per transport')
+    parser.add_argument('--port', type=int, default=19020, help='First of two free ports for the logging servers')
+    args = parser.parse_args()
+
+    pickle_rate, pickle_call_rate = run_transport('Pickle', args.port, 'LogRecordStreamHandler',
+                                                  logging.handlers.SocketHandler('127.0.0.1', args.port), args.records)
+
+    queue_handler = log_shipping.DroppingQueueHandler(queue.Queue(maxsize=args.records + 1))
+    shipper = log_shipping.LogShipper(queue_handler, host='127.0.0.1', port=args.port + 1)
+    shipper.start()
+    batch_rate, batch_call_rate = run_transport('Batch', args.port + 1, 'LogBatchStreamHandler', queue_handler,
+                                                args.records)
+    shipper.stop()
+
+    pickle_size, batch_size = get_record_sizes()
+    print('{:<32} {:>10} {:>12} {:>13}'.format('Transport', 'Records/s', 'Log calls/s', 'Bytes/record'))
+    print('{:<32} {:>10.0f} {:>12.0f} {:>13.1f}'.format('Pickled records (SocketHandler)', pickle_rate,
+                                                        pickle_call_rate, pickle_size))
+    print('{:<32} {:>10.0f} {:>12.0f} {:>13.1f}'.format('Log batches (LogShipper)', batch_rate, batch_call_rate,
+                                                        batch_size))
@@ -4,6 +4,8 @@ import logging.handlers
 import socketserver
 import struct
 
+import log_transport
+
 import measurement_params as parameters
 
 
@@ -11,7 +13,9 @@ class LogRecordStreamHandler(socketserver.StreamRequestHandler):
     """Handler for a streaming logging request.
 
     This basically logs the record using whatever logging policy is
-    configured locally.
+    configured locally. The records are sent one by one as pickles, like
+    by logging.handlers.SocketHandler, so only use this handler in trusted
+    networks.
     """
 
     def handle(self):
@@ -21,13 +25,15 @@ class LogRecordStreamHandler(socketserver.StreamRequestHandler):
         according to whatever policy is configured locally.
         """
         while True:
-            chunk = self.connection.recv(4)
+            # a single recv might return only a part of the length prefix, the buffered rfile reads until the requested
+            # bytes are complete
+            chunk = self.rfile.read(4)
             if len(chunk) < 4:
                 break
             slen = struct.unpack('>L', chunk)[0]
-            chunk = self.connection.recv(slen)
-            while len(chunk) < slen:
-                chunk = chunk + self.connection.recv(slen - len(chunk))
+            chunk = self.rfile.read(slen)
+            if len(chunk) < slen:
+                break
             obj = self.unpickle(chunk)
             record = logging.makeLogRecord(obj)
             self.handle_log(record)
@@ -52,6 +58,42 @@ class LogRecordStreamHandler(socketserver.StreamRequestHandler):
         logger.handle(record)
 
 
+class LogBatchStreamHandler(LogRecordStreamHandler):
+    """
+    Handler for the compact log batches of the LogShipper, see log_transport. The logger names and message templates
+    are interned per connection, so every connection has its own decoder.
+    """
+
+    def handle(self):
+        if self.rfile.read(len(log_transport.MAGIC)) != log_transport.MAGIC:
+            logging.getLogger('LoggingServer').warning('Closing the connection from {}, because it does not speak the '
+                                                       'log batch protocol.'.format(self.client_address))
+            return
+
+        decoder = log_transport.LogBatchDecoder()
+        while True:
+            chunk = self.rfile.read(log_transport.FRAME_HEADER.size)
+            if len(chunk) < log_transport.FRAME_HEADER.size:
+                break
+            frame_length = log_transport.FRAME_HEADER.unpack(chunk)[0]
+            if frame_length > log_transport.MAX_FRAME_LENGTH:
+                logging.getLogger('LoggingServer').warning('Closing the connection from {}, because its log batch is '
+                                                           'too large.'.format(self.client_address))
+                break
+            chunk = self.rfile.read(frame_length)
+            if len(chunk) < frame_length:
+                break
+
+            try:
+                records = decoder.decode_batch(chunk)
+            except log_transport.LogTransportError as e:
+                logging.getLogger('LoggingServer').warning('Closing the connection from {}: {}'
+                                                           .format(self.client_address, e))
+                break
+            for record in records:
+                self.handle_log(record)
+
+
 class LoggingServer(socketserver.ThreadingTCPServer):
     """
     Simple TCP socket-based logging receiver suitable for testing.
@@ -59,9 +101,13 @@ class LoggingServer(socketserver.ThreadingTCPServer):
 
     allow_reuse_address = True
 
+    # the connections of the log shippers are only closed when their processes exit, so they must not keep the process
+    # of the server alive
+    daemon_threads = True
+
     def __init__(self, host=parameters.IP_MAIN,
                  port=logging.handlers.DEFAULT_TCP_LOGGING_PORT,
-                 handler=LogRecordStreamHandler):
+                 handler=LogBatchStreamHandler):
         socketserver.ThreadingTCPServer.__init__(self, (host, port), handler)
         self.abort = 0
         self.timeout = 1
@@ -9,12 +9,42 @@ INIT_ROBOT = True  # can be turned off for debugging purposes
 
 SPEED_SPIN = 200  # Speed parameters. Suggested parameters: w/o carpet 150, carpet 200-250
 SPEED_MOVE = 200  # Please keep move and turn parameters at the same speed.
+SPEED_APPROACH = 50  # minimal speed when approaching an obstacle that was detected by the light bumpers
+SPEED_RAMP_STEP = 10  # speed changes smaller than this are not sent to the robot
+
+# The light bump signals (0-4095) rise when the robot approaches an obstacle. Above the slowdown signal, the speed is
+# reduced linearly and the robot stops before touching an obstacle when the stop signal is reached.
+LIGHT_BUMP_SIGNAL_SLOWDOWN = 100
+LIGHT_BUMP_SIGNAL_STOP = 1000
+# Distance between the robot and the obstacle when the stop signal is reached [in m]. It depends on the reflectivity of
+# the obstacle, so measure it with the obstacles of your room, e.g., a wall.
+LIGHT_BUMP_STOP_DISTANCE = 0.03
 
 MIN_RAND_SPIN_TIME = 0.5
 MAX_RAND_SPIN_TIME = 4
 MIN_RAND_DRIVE_TIME = 1
 MAX_RAND_DRIVE_TIME = 15
 
+# Occupancy map parameters. The map is stored per room, so set the room name whenever you measure in a new room.
+ROOM_NAME = 'room'
+USE_OCCUPANCY_MAP = True  # plan robot movements on the client such that known obstacles are avoided
+OCCUPANCY_MAP_SIZE = 20  # edge length of the square map around the origin of the tracking space [in m]
+OCCUPANCY_CELL_SIZE = 0.1  # [in m]
+OCCUPANCY_LOGODDS_HIT = 0.85  # added to a cell when a bump occurred in it
+OCCUPANCY_LOGODDS_FREE = -0.4  # added to a cell when a robot has driven through it
+OCCUPANCY_LOGODDS_THRESHOLD = 0.5  # cells with higher log-odds are considered as occupied
+OCCUPANCY_PLANNING_ATTEMPTS = 20  # number of random movements that are checked against the map
+ROBOT_RADIUS = 0.17  # [in m]
+ROBOT_SAFETY_MARGIN = 0.1  # minimal distance that planned movements keep from known obstacles [in m]
+TRACKER_HEADING_OFFSET = 0  # angle between the tracker x-axis and the forward driving direction [in degrees]
+# Serial numbers of the trackers per robot, e.g., {ROBOT_TYPE_RECEIVER: 'LHR-0A1B2C3D'}. The serial numbers are shown in
+# the device settings of SteamVR. Trackers of robots that are not listed have to be switched on one by one instead.
+TRACKER_SERIALS = {}
+# Room coordinates of the reference points [in m], at which the receiver robot is placed by calibrate_room.py. The room
+# coordinate system is right-handed with a vertical z-axis, z = 0 is the height of the trackers on the robots. At least
+# three points that are not on a line are required, e.g., a room corner and points along two walls.
+ROOM_REFERENCE_POINTS = [(0.5, 0.5, 0), (2.5, 0.5, 0), (0.5, 2.5, 0)]
+
 # Set up all IP Addresses
 IP_MAIN = '111.111.111.111'  # measurement laptop
 IP_RASPBERRY1 = '111.111.111.111'  # raspberry 1, usually receiver
@@ -24,6 +54,7 @@ STANDARD_ROBOT_PORT = 1234  # choose anything you want
 # Set up sweep parameters
 SWEEP_LENGTH = 10  # seconds
 SWEEP_FS = 48000  # Hz
+SWEEP_CACHE_ENABLED = True  # the sweep is computed once per set of sweep parameters and then loaded from a cache file
 
 # Set up your sound devices. Use sounddevice.query_devices() to get a list of supported devices.
 SD_IN_MAC = 'H3-VR'  # sound device name of microphone array (Mac workstation)
@@ -38,9 +69,59 @@ MAX_RIR_LENGTH = 4  # in seconds, RIRs are cut to this length
 TRACKING_TIME_INTERVAL = 1  # currently not used
 TRACKING_FREQUENCY = 250  # Hz
 TRACKING_N_AVERAGES = 50  # position data is averaged over multiple returned values of HTC Vive
+TRACKING_BUFFER_LENGTH = 500  # number of most recent poses per tracker that are kept by the background sampler
+# Source of the tracker poses: 'openvr' for the HTC Vive, 'replay' for a recorded trajectory file or 'synthetic' for
+# simulated robots, the last two do not require any VR hardware
+TRACKING_BACKEND = 'openvr'
+TRACKING_REPLAY_FILE = ''  # trajectory file of a previous session, which is replayed by the 'replay' backend
+TRACKING_SYNTHETIC_NOISE = 0.0003  # standard deviation of the synthetic tracker positions [in m]
+TRACKING_SYNTHETIC_HEIGHT = 0.3  # height of the synthetic trackers in the tracking universe [in m]
+TRACKING_LOG_TRAJECTORY = True  # log all sampled poses of the session to a binary trajectory file
+# In the adaptive mode, poses are sampled until the standard error of the mean position falls below the tolerance or the
+# maximum number of samples or the maximum time is reached. Otherwise, TRACKING_N_AVERAGES poses are averaged.
+TRACKING_ADAPTIVE = True
+TRACKING_STANDARD_ERROR_TOLERANCE = 0.0002  # in m
+TRACKING_MIN_SAMPLES = 10
+TRACKING_MAX_SAMPLES = 500  # must not exceed TRACKING_BUFFER_LENGTH
+TRACKING_MAX_TIME = 3  # in seconds
+# Poses are rejected as outliers if they deviate from the median by more than TRACKING_OUTLIER_FACTOR times the median
+# deviation, but deviations below the minimum thresholds are always accepted
+TRACKING_OUTLIER_FACTOR = 3
+TRACKING_OUTLIER_MIN_DISTANCE = 0.002  # in m
+TRACKING_OUTLIER_MIN_ANGLE = 0.5  # in degrees
+
+# The robots are considered to be at rest as soon as the standard deviations of the tracked positions and orientations
+# over the last SETTLE_WINDOW_LENGTH samples fall below the tolerances
+SETTLE_WINDOW_LENGTH = 25
+SETTLE_POSITION_TOLERANCE = 0.001  # in m
+SETTLE_ORIENTATION_TOLERANCE = 0.2  # in degrees
+SETTLE_TIMEOUT = 5  # in seconds
+SETTLE_ENCODER_READS = 3  # number of subsequent equal wheel encoder readings after which the wheels are at rest
+SETTLE_ENCODER_TIMEOUT = 1  # in seconds
+
+# Battery parameters. The robots are parked for charging as soon as their battery charge falls to the reserve or the
+# remaining charge is predicted to last for less than BATTERY_MIN_REMAINING_MEASUREMENTS measurements.
+BATTERY_RESERVE_CHARGE = 300  # in mAh
+BATTERY_MIN_REMAINING_MEASUREMENTS = 2
+BATTERY_ESTIMATION_WINDOW = 10  # number of last measurements over which the charge per measurement is estimated
+
+METADATA_FSYNC_INTERVAL = 1  # number of measurements after which the metadata file is synced to the disk
+
+# The RIRs of a session are also appended to a session store, i.e., memory-mapped chunk files, which can be sliced by
+# measurement ID without reading the individual wav files. Existing sessions can be converted with convert_session.py.
+SESSION_STORE_ENABLED = True
+SESSION_STORE_CHUNK_SIZE = 32  # number of measurements per chunk file
+
+# In the pipelined measurement cycle, the robots move to their next positions at the same time while the receiver
+# converts the recording of the previous measurement into RIRs in the background. Otherwise, every step of a measurement
+# waits for the previous one.
+PIPELINE_MEASUREMENTS = True
 
 LOGGING_LEVEL = logging.DEBUG
 LOGGING_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_QUEUE_SIZE = 10000  # records that are waiting to be sent to the logging server, further records are dropped
+LOG_BATCH_SIZE = 100  # maximum number of records that are sent to the logging server at once
+LOG_FLUSH_INTERVAL = 0.05  # maximum time that a record waits for its batch to fill up [in seconds]
 
 ROBOT_TYPE_RECEIVER = 'RCV'
 ROBOT_TYPE_SOURCE = 'SRC'
@@ -1,17 +1,13 @@
 import logging
-import logging.handlers
 import threading
 import time
 import sys
-import scipy.signal as sig
-import scipy.io.wavfile as wav
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 import pathlib
 
 import measurement_params as parameters
 import logging_server as logs
+import log_shipping
 
 
 def initialize_session_env():
@@ -22,6 +18,7 @@ def initialize_session_env():
     s_path = pathlib.Path('..', '..', 'measurements', s_name)
 
     overwrite = False
+    resume = False
     try:
         s_path.mkdir(parents=True)
 
@@ -30,9 +27,17 @@ def initialize_session_env():
         _logger.info('Creating the session directory \"{}\"'.format(s_path))
     except FileExistsError:
         _logger.warning('There is already a directory with the name \"{}\"'.format(s_path))
-        cont_prompt = input('Should the script be continued? This might overwrite previously measured data. (y/n)\n')
+        cont_prompt = input('Should the script be continued? This might overwrite previously measured data. Answer '
+                            '\"r\" to resume the session after its last completed measurement instead. (y/n/r)\n')
 
-        if cont_prompt == 'y':
+        if cont_prompt == 'r':
+            resume = True
+            overwrite = True
+
+            add_logging_file_handler(s_path, s_name)
+
+            _logger.info('Resuming the session in the directory "{}" as requested by the user.'.format(s_path))
+        elif cont_prompt == 'y':
             overwrite = True
             s_path.mkdir(parents=True, exist_ok=True)
 
@@ -44,36 +49,9 @@ def initialize_session_env():
             raise SystemExit('You did not want to overwrite data. Good choice. Therefore this script will end now.')
         else:
             _logger.error('Invalid user answer.')
-            raise SystemExit('Your answer must be either \"y\" or \"n\".')
-
-    return s_name, overwrite
-
-
-def init_metadata_frame():
-    df = pd.DataFrame(columns=['Measurement_ID', 'Timestamp', 'Position_Receiver', 'Orientation_Receiver',
-                               'Position_Source', 'Orientation_Source'])
-    return df
-
+            raise SystemExit('Your answer must be either \"y\", \"n\" or \"r\".')
 
-def add_measurement_to_frame(frame, measurement_id, localtime_obj, position_rcv, position_src):
-    # Convert time object to a format that can be easily handled in pandas
-    ts = pd.Timestamp(year=localtime_obj.tm_year, month=localtime_obj.tm_mon, day=localtime_obj.tm_mday,
-                      hour=localtime_obj.tm_hour, minute=localtime_obj.tm_min, second=localtime_obj.tm_sec)
-
-    # Convert measurement ID to string
-    measurement_id = '{:05}'.format(measurement_id)
-
-    # Store data into pandas frame
-    frame = frame.append({'Measurement_ID': measurement_id, 'Timestamp': ts,
-                          'Position_Receiver': position_rcv.position, 'Orientation_Receiver': position_rcv.orientation,
-                          'Position_Source': position_src.position, 'Orientation_Source': position_src.orientation},
-                         ignore_index=True)
-    return frame
-
-
-def save_metadata(frame, session_name):
-    filename = str(pathlib.Path('..', '..', 'measurements', session_name, '{}_metadata.csv'.format(session_name)))
-    frame.to_csv(filename, index=False)
+    return s_name, overwrite, resume
 
 
 def add_logging_file_handler(m_path, m_name):
@@ -93,13 +71,13 @@ def start_logging_server():
 
 
 def init_logger(logger_name, add_logserver_handler=True):
-    # initialize logger that can communicate via TCP with the client
+    # initialize logger that can communicate via TCP with the client. The records are only put into a queue by the
+    # logging thread, a single background thread ships them to the LoggingServer, so that logging never blocks.
     logger = logging.getLogger(logger_name)
     logger.setLevel(parameters.LOGGING_LEVEL)
 
     if add_logserver_handler:
-        socket_handler = logging.handlers.SocketHandler(parameters.IP_MAIN, logging.handlers.DEFAULT_TCP_LOGGING_PORT)
-        logger.addHandler(socket_handler)
+        logger.addHandler(log_shipping.get_queue_handler())
     return logger
 
 
@@ -143,7 +121,12 @@ def get_operating_system():
     return this_os
 
 
+# scipy.signal and matplotlib take more than a second to import on the RaspberryPi, which never plots, so they are only
+# imported by the functions that use them
 def plot_spectrogram(signal, fs=48000):
+    import scipy.signal as sig
+    import matplotlib.pyplot as plt
+
     f, t, spec = sig.spectrogram(signal, fs)
     plt.pcolormesh(t, f, spec)
     plt.ylabel('Frequency [Hz]')
@@ -152,6 +135,8 @@ def plot_spectrogram(signal, fs=48000):
 
 
 def plot_spectrum(signal, fs=48000):
+    import matplotlib.pyplot as plt
+
     n_fft = len(signal)
     signal_f = np.fft.fft(signal)
     f = np.fft.fftfreq(n_fft) * fs
@@ -163,6 +148,8 @@ def plot_spectrum(signal, fs=48000):
 
 
 def get_first_channel_wav_file(filename):
+    import scipy.io.wavfile as wav
+
     __, all_channels = wav.read(filename)
     first_channel = all_channels[:, 0]
     return first_channel
@@ -0,0 +1,262 @@
+import bisect
+import contextlib
+import csv
+import logging
+import pathlib
+import socket
+import threading
+import time
+
+import measurement_utils as utils
+
+
+# Metric events are log records of the Metrics logger with this template. Its arguments are kept apart from the
+# template by the log transport, so the MetricsWriter on the measurement laptop reads them without parsing the message.
+LOGGER_NAME = 'Metrics'
+METRIC_TEMPLATE = '%s %s.%s = %r in measurement %s on %s'
+
+# Phases of a measurement, which are timed by the component that executes them
+PHASE_MOVE = 'move'
+PHASE_SETTLE = 'settle'
+PHASE_TRACK = 'track'
+PHASE_RECORD = 'record'
+PHASE_DECONVOLVE = 'deconvolve'
+PHASE_WRITE = 'write'
+PHASES = [PHASE_MOVE, PHASE_SETTLE, PHASE_TRACK, PHASE_RECORD, PHASE_DECONVOLVE, PHASE_WRITE]
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # upper bounds of the timer buckets [in seconds]
+
+KIND_COUNTER = 'counter'
+KIND_GAUGE = 'gauge'
+KIND_TIMER = 'timer'
+
+CSV_COLUMNS = ['time', 'host', 'component', 'kind', 'name', 'measurement_id', 'value']
+
+
+def get_metrics_filename(session_name):
+    return pathlib.Path('..', '..', 'measurements', session_name, '{}_metrics.csv'.format(session_name))
+
+
+class Counter(object):
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+
+class Timer(object):
+    """
+    Keeps the number, sum, minimum and maximum of the observed durations and a histogram with fixed buckets, so that the
+    summary of a session does not need to keep all durations.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # the last bucket counts the durations above all bounds
+        self.count = 0
+        self.sum = 0
+        self.min = float('inf')
+        self.max = 0
+
+    def observe(self, duration):
+        self.bucket_counts[bisect.bisect_left(self.buckets, duration)] += 1
+        self.count += 1
+        self.sum += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+
+    def format_summary(self):
+        if self.count == 0:
+            return 'no observations'
+
+        histogram = ', '.join('<={}s: {}'.format(bound, n) for bound, n in zip(self.buckets, self.bucket_counts) if n)
+        if self.bucket_counts[-1]:
+            histogram += '{}>{}s: {}'.format(', ' if histogram else '', self.buckets[-1], self.bucket_counts[-1])
+        return '{} observations, mean {:.3f} s, min {:.3f} s, max {:.3f} s ({})'.format(
+            self.count, self.sum / self.count, self.min, self.max, histogram)
+
+
+class Metrics(object):
+    """
+    Counters, gauges and timers of one component, e.g., the SweepMeasurement. Every observed duration and every gauge
+    value is sent as a metric event of the current measurement through the logging channel. Counters are only sent when
+    the measurement ID changes, so that they can be incremented in control loops.
+    """
+    def __init__(self, component):
+        self.component = component
+        self.counters = {}
+        self.gauges = {}
+        self.timers = {}
+
+        self._lock = threading.Lock()
+        self._sent_counter_values = {}
+
+    def inc(self, name, n=1):
+        with self._lock:
+            self.counters.setdefault(name, Counter()).inc(n)
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+        _send_event(KIND_GAUGE, self.component, name, value)
+
+    def observe(self, name, duration, buckets=DEFAULT_BUCKETS, measurement_id=None):
+        """
+        :param measurement_id: measurement of the duration, by default the current measurement of this process, e.g.,
+        the RIRs of a measurement might be written in the background while the next measurement has already started
+        """
+        with self._lock:
+            self.timers.setdefault(name, Timer(buckets)).observe(duration)
+        _send_event(KIND_TIMER, self.component, name, duration, measurement_id)
+
+    @contextlib.contextmanager
+    def time(self, name, buckets=DEFAULT_BUCKETS):
+        """
+        Times the duration of the with block, e.g., of a phase of the measurement. Blocks that raise an exception are
+        not observed.
+        """
+        t_start = time.perf_counter()
+        yield
+        self.observe(name, time.perf_counter() - t_start, buckets)
+
+    def send_counters(self):
+        with self._lock:
+            changed = {name: counter.value for name, counter in self.counters.items()
+                       if self._sent_counter_values.get(name) != counter.value}
+            self._sent_counter_values.update(changed)
+        for name, value in changed.items():
+            _send_event(KIND_COUNTER, self.component, name, value)
+
+    def log_summary(self, logger):
+        with self._lock:
+            for name, timer in sorted(self.timers.items()):
+                logger.info('Timer {}.{}: {}.'.format(self.component, name, timer.format_summary()))
+            for name, counter in sorted(self.counters.items()):
+                logger.info('Counter {}.{}: {}.'.format(self.component, name, counter.value))
+
+
+class MetricsWriter(logging.Handler):
+    """
+    Writes the metric events of all hosts, which are received by the LoggingServer, into the metrics file of a session.
+    Records of the local Metrics logger reach the writer a second time through the LoggingServer, so only the received
+    ones are written.
+    """
+    def __init__(self, session_name):
+        super().__init__()
+
+        filename = get_metrics_filename(session_name)
+        write_header = not filename.exists() or filename.stat().st_size == 0
+        self._file = open(str(filename), 'a', newline='')
+        self._writer = csv.writer(self._file)
+        if write_header:
+            self._writer.writerow(CSV_COLUMNS)
+            self._file.flush()
+
+    def emit(self, record):
+        if record.msg != METRIC_TEMPLATE or not getattr(record, 'shipped', False):
+            return
+
+        try:
+            kind, component, name, value, measurement_id, host = record.args
+            self._writer.writerow([record.created, host, component, kind, name,
+                                   '' if measurement_id is None else measurement_id, value])
+            self._file.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        with self.lock:
+            if not self._file.closed:
+                self._file.close()
+        super().close()
+
+
+def load_metrics(filename):
+    """
+    :return: DataFrame with the columns CSV_COLUMNS
+    """
+    import pandas as pd
+
+    return pd.read_csv(filename)
+
+
+def get_phase_durations(metrics_frame):
+    """
+    :param metrics_frame: DataFrame as returned by load_metrics
+    :return: DataFrame with the duration of every phase per measurement ID [in seconds]. The durations are summed up per
+    host, e.g., the spin and the straight movement of a robot, and the longest duration of all hosts is taken, because
+    both robots move at the same time.
+    """
+    phases = metrics_frame[(metrics_frame['kind'] == KIND_TIMER) & metrics_frame['name'].isin(PHASES)]
+    host_durations = phases.groupby(['measurement_id', 'name', 'host'])['value'].sum()
+    durations = host_durations.groupby(level=['measurement_id', 'name']).max().unstack('name')
+    return durations.reindex(columns=[phase for phase in PHASES if phase in durations.columns])
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+_measurement_id = None
+_host = socket.gethostname()
+_logger = None
+
+
+def get_metrics(component):
+    """
+    :return: the Metrics of the component, which are shared by all objects of the component within this process
+    """
+    global _logger
+
+    with _registry_lock:
+        if _logger is None:
+            # metric events are written to the metrics file of the session instead of the log file
+            _logger = utils.init_logger(LOGGER_NAME)
+            _logger.propagate = False
+        if component not in _registry:
+            _registry[component] = Metrics(component)
+        return _registry[component]
+
+
+def set_measurement_id(measurement_id):
+    """
+    Assigns all subsequent metric events of this process to the measurement. The counters of the previous measurement
+    are sent before.
+    """
+    global _measurement_id
+
+    if measurement_id == _measurement_id:
+        return
+    send_counters()
+    _measurement_id = measurement_id
+
+
+def send_counters():
+    with _registry_lock:
+        registered_metrics = list(_registry.values())
+    for component_metrics in registered_metrics:
+        component_metrics.send_counters()
+
+
+def log_summary(logger):
+    with _registry_lock:
+        registered_metrics = list(_registry.values())
+    for component_metrics in registered_metrics:
+        component_metrics.log_summary(logger)
+
+
+def add_session_writer(session_name):
+    """
+    Writes the metric events of all hosts, which are received by the LoggingServer of this process, into the metrics
+    file of the session.
+
+    :return: the MetricsWriter, which has to be closed at the end of the session
+    """
+    get_metrics('Main')
+    writer = MetricsWriter(session_name)
+    logging.getLogger(LOGGER_NAME).addHandler(writer)
+    return writer
+
+
+def _send_event(kind, component, name, value, measurement_id=None):
+    if measurement_id is None:
+        measurement_id = _measurement_id
+    _logger.info(METRIC_TEMPLATE, kind, component, name, value, measurement_id, _host)
@@ -0,0 +1,254 @@
+import irobot.openinterface.constants as roboconsts
+import pathlib
+import numpy as np
+
+import measurement_params as params
+import measurement_utils as utils
+
+
+class OccupancyMapError(Exception):
+    pass
+
+
+def tracked_pose_to_map_pose(tracked_position):
+    """
+    Converts a position returned by the PositionTracker into a pose on the occupancy map. The map lies in the
+    horizontal plane of the tracking space, i.e., map x is tracker x and map y is the negative tracker z axis. This
+    makes the map frame right-handed when looking at the floor from above, so counterclockwise rotations of the robot
+    increase the heading, just like in the odometry of the RobotController. Positions in room coordinates of a
+    RoomCalibration are already right-handed with a vertical z-axis, so the map is the x/y plane of the room.
+
+    :param tracked_position: namespace with position and orientation as returned by PositionTracker.measure_positions
+    :return: x [in m], y [in m], heading [in degrees]
+    """
+    if getattr(tracked_position, 'room_frame', False):
+        # the yaw angle is the angle of the tracker x-axis around the vertical axis of the room
+        x, y = tracked_position.position[0:2]
+        heading = tracked_position.orientation[0] + params.TRACKER_HEADING_OFFSET
+        return x, y, heading
+
+    x = tracked_position.position[0]
+    y = -tracked_position.position[1]
+
+    # the pitch angle of pose_to_position is the angle of the tracker x-axis in the horizontal plane
+    heading = -tracked_position.orientation[1] + params.TRACKER_HEADING_OFFSET
+    return x, y, heading
+
+
+def get_move_path(map_pose, spin_angle, distance, step=params.OCCUPANCY_CELL_SIZE / 2):
+    """
+    :param map_pose: map pose (x [in m], y [in m], heading [in degrees]) of the robot before the movement
+    :param spin_angle: spin in place before the straight movement [in degrees]
+    :param distance: length of the straight movement [in m]
+    :return: (x, y) map positions along the path of the robot from the start to the end of the movement
+    """
+    x, y, heading = map_pose
+    heading = np.deg2rad(heading + spin_angle)
+    distances = np.append(np.arange(0, distance, step), distance)
+    return [(x + np.cos(heading) * d, y + np.sin(heading) * d) for d in distances]
+
+
+class OccupancyMap(object):
+    """
+    Grid occupancy map of a room, which is built from the bump events of the robots. Every cell holds the log-odds of
+    being occupied: bumps increase them, cells that the robots drove through decrease them.
+    """
+    def __init__(self, room_name=params.ROOM_NAME, size=params.OCCUPANCY_MAP_SIZE,
+                 cell_size=params.OCCUPANCY_CELL_SIZE, logodds=None):
+        self.logger = utils.get_logger('OccupancyMap')
+
+        self.room_name = room_name
+        self.cell_size = cell_size
+        self.n_cells = int(np.ceil(size / cell_size))
+        self.origin = -self.n_cells * cell_size / 2  # map coordinate of the lower left corner of the grid
+
+        if logodds is None:
+            logodds = np.zeros((self.n_cells, self.n_cells), dtype=np.float32)
+        elif logodds.shape != (self.n_cells, self.n_cells):
+            raise OccupancyMapError('The log-odds grid has shape {}, but {} was expected.'
+                                    .format(logodds.shape, (self.n_cells, self.n_cells)))
+        self.logodds = logodds
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as data:
+            occupancy_map = cls(room_name=str(data['room_name']), size=float(data['size']),
+                                cell_size=float(data['cell_size']), logodds=data['logodds'])
+        occupancy_map.logger.info('Loaded occupancy map of room \"{}\" from \"{}\".'.format(occupancy_map.room_name,
+                                                                                          filename))
+        return occupancy_map
+
+    @classmethod
+    def load_for_room(cls, room_name=params.ROOM_NAME):
+        """
+        Loads the occupancy map of previous sessions in the same room or creates an empty map if there is none.
+        """
+        filename = cls.get_room_filename(room_name)
+        if filename.exists():
+            return cls.load(str(filename))
+
+        occupancy_map = cls(room_name=room_name)
+        occupancy_map.logger.info('There is no occupancy map of room \"{}\" yet, starting with an empty '
+                                  'one.'.format(room_name))
+        return occupancy_map
+
+    @staticmethod
+    def get_room_filename(room_name):
+        return pathlib.Path('..', '..', 'measurements', 'rooms', '{}_occupancy_map.npz'.format(room_name))
+
+    def save(self, filename):
+        np.savez_compressed(filename, room_name=self.room_name, size=self.n_cells * self.cell_size,
+                            cell_size=self.cell_size, logodds=self.logodds)
+
+    def save_with_session(self, session_name):
+        """
+        Saves the map into the session directory and updates the map of the room for subsequent sessions.
+        """
+        session_filename = pathlib.Path('..', '..', 'measurements', session_name,
+                                        '{}_occupancy_map.npz'.format(session_name))
+        self.save(str(session_filename))
+
+        room_filename = self.get_room_filename(self.room_name)
+        room_filename.parent.mkdir(parents=True, exist_ok=True)
+        self.save(str(room_filename))
+
+    def _to_cell(self, x, y):
+        col = int(np.floor((x - self.origin) / self.cell_size))
+        row = int(np.floor((y - self.origin) / self.cell_size))
+        if 0 <= row < self.n_cells and 0 <= col < self.n_cells:
+            return row, col
+        return None
+
+    def _update_cell(self, x, y, logodds_change):
+        cell = self._to_cell(x, y)
+        if cell is not None:
+            self.logodds[cell] += logodds_change
+
+    def is_occupied(self, x, y):
+        cell = self._to_cell(x, y)
+        if cell is None:
+            # everything outside of the map is treated as an obstacle
+            return True
+        return self.logodds[cell] > params.OCCUPANCY_LOGODDS_THRESHOLD
+
+    def add_bump_event(self, start_pose, bump_event, robot_positions=()):
+        """
+        Adds a bump event reported by the RobotServer to the map.
+
+        :param start_pose: map pose (x [in m], y [in m], heading [in degrees]) of the robot when the movement started
+        :param bump_event: dictionary with the odometry of the robot relative to the start of the movement, i.e., x and
+        y [in mm] and heading [in degrees], and the states of the bump sensors. Light bump events, at which the robot
+        stopped in front of an obstacle, are placed LIGHT_BUMP_STOP_DISTANCE further ahead.
+        :param robot_positions: (x, y) map positions of other robots. Bumps into other robots are not added to the map,
+        because the robots are no permanent obstacles.
+        :return: map coordinates of the obstacle
+        """
+        x_start, y_start, heading_start = start_pose
+        heading_start = np.deg2rad(heading_start)
+
+        # transform odometry of the robot into the map frame
+        dx = bump_event['x'] / 1000
+        dy = bump_event['y'] / 1000
+        x_robot = x_start + np.cos(heading_start) * dx - np.sin(heading_start) * dy
+        y_robot = y_start + np.sin(heading_start) * dx + np.cos(heading_start) * dy
+
+        # the obstacle is located at the edge of the robot, slightly rotated towards the side of the bump sensor
+        bump_angle = heading_start + np.deg2rad(bump_event['heading'])
+        if bump_event['bump_left'] and not bump_event['bump_right']:
+            bump_angle += np.pi / 6
+        elif bump_event['bump_right'] and not bump_event['bump_left']:
+            bump_angle -= np.pi / 6
+        obstacle_distance = params.ROBOT_RADIUS + self.cell_size / 2
+        if bump_event.get('light_bump', False):
+            obstacle_distance += params.LIGHT_BUMP_STOP_DISTANCE
+        x_obstacle = x_robot + np.cos(bump_angle) * obstacle_distance
+        y_obstacle = y_robot + np.sin(bump_angle) * obstacle_distance
+
+        for x_other, y_other in robot_positions:
+            if np.hypot(x_obstacle - x_other, y_obstacle - y_other) < 2 * params.ROBOT_RADIUS:
+                self.logger.info('The robot most likely bumped into another robot at ({:.2f}, {:.2f}), so the bump is '
+                                 'not added to the occupancy map.'.format(x_other, y_other))
+                return x_obstacle, y_obstacle
+
+        self._update_cell(x_obstacle, y_obstacle, params.OCCUPANCY_LOGODDS_HIT)
+        self.logger.info('Added an obstacle at ({:.2f}, {:.2f}) to the occupancy map.'.format(x_obstacle, y_obstacle))
+        return x_obstacle, y_obstacle
+
+    def add_traversal(self, start_pose, end_pose):
+        """
+        Marks all cells on the line between two robot poses as free. The robots always spin in place and then drive
+        straight, so the line between two subsequently tracked positions is the path that the robot took.
+        """
+        x_start, y_start = start_pose[0:2]
+        x_end, y_end = end_pose[0:2]
+
+        n_steps = max(int(np.ceil(np.hypot(x_end - x_start, y_end - y_start) / (self.cell_size / 2))), 1)
+        cells = set()
+        for step in np.linspace(0, 1, n_steps + 1):
+            cell = self._to_cell(x_start + step * (x_end - x_start), y_start + step * (y_end - y_start))
+            if cell is not None:
+                cells.add(cell)
+
+        for cell in cells:
+            self.logodds[cell] += params.OCCUPANCY_LOGODDS_FREE
+
+    def get_free_distance(self, x, y, heading, max_distance, avoid_positions=()):
+        """
+        Casts a ray from the given position into the direction of the heading and returns the distance that the robot
+        can drive before it gets closer than its radius plus the safety margin to a known obstacle.
+
+        :param avoid_positions: (x, y) map positions of other robots, e.g., their current positions or the points of
+        their planned paths. The robots touch each other at twice the robot radius, so the center of the driving robot
+        keeps twice the radius plus the safety margin from these positions. Positions that are already closer at the
+        start only block the movement if the robot would get even closer to them.
+        """
+        clearance = params.ROBOT_RADIUS + params.ROBOT_SAFETY_MARGIN
+        robot_clearance = 2 * params.ROBOT_RADIUS + params.ROBOT_SAFETY_MARGIN
+        heading = np.deg2rad(heading)
+        step = self.cell_size / 2
+
+        avoid_positions = np.asarray(avoid_positions, dtype=float).reshape(-1, 2)
+        start_distances = np.hypot(avoid_positions[:, 0] - x, avoid_positions[:, 1] - y)
+
+        for distance in np.arange(0, max_distance + clearance + step, step):
+            x_ray = x + np.cos(heading) * distance
+            y_ray = y + np.sin(heading) * distance
+            if self.is_occupied(x_ray, y_ray):
+                return max(distance - clearance, 0)
+
+            # the ray looks ahead for static obstacles, but other robots only matter where the center of the robot is
+            if distance <= max_distance and len(avoid_positions):
+                robot_distances = np.hypot(avoid_positions[:, 0] - x_ray, avoid_positions[:, 1] - y_ray)
+                if np.any((robot_distances < robot_clearance) & (robot_distances < start_distances)):
+                    return max(distance - step, 0)
+        return max_distance
+
+    def plan_random_move(self, map_pose, avoid_positions=(), rng=np.random):
+        """
+        Draws random movements (spin in place, then drive straight) like RobotController.move_robot_randomly and keeps
+        the first one that does not lead the robot into a known obstacle. If there is no such movement, the movement
+        with the longest free distance is taken.
+
+        :param map_pose: current map pose (x [in m], y [in m], heading [in degrees]) of the robot
+        :return: spin angle [in degrees, positive values are counterclockwise] and drive distance [in m]
+        """
+        x, y, heading = map_pose
+
+        # convert the random spin and drive times of the server-side random movement into angles and distances
+        spin_rate = np.rad2deg(params.SPEED_SPIN / (roboconsts.ROBOT.WHEEL_BASE / 2))  # degrees per second
+        best_move = (0, 0)
+        for attempt in range(params.OCCUPANCY_PLANNING_ATTEMPTS):
+            spin_angle = rng.uniform(params.MIN_RAND_SPIN_TIME, params.MAX_RAND_SPIN_TIME) * spin_rate
+            spin_angle = (spin_angle + 180) % 360 - 180
+            drive_distance = rng.uniform(params.MIN_RAND_DRIVE_TIME, params.MAX_RAND_DRIVE_TIME) * \
+                params.SPEED_MOVE / 1000
+
+            free_distance = self.get_free_distance(x, y, heading + spin_angle, drive_distance, avoid_positions)
+            if free_distance >= drive_distance:
+                return spin_angle, drive_distance
+            if free_distance > best_move[1]:
+                best_move = (spin_angle, free_distance)
+
+        self.logger.info('Could not find a random movement without known obstacles, will drive {:.2f} m after a '
+                         'spin of {:.1f} degrees.'.format(best_move[1], best_move[0]))
+        return best_move
@@ -1,8 +1,12 @@
-import openvr
 import numpy as np
+import threading
 import time
 import types
 
+import metrics
+import trajectory_log
+import tracking_backends
+
 import measurement_params as params
 import measurement_utils as utils
 
@@ -11,54 +15,389 @@ class PositionTrackingError(BaseException):
     pass
 
 
+def poses_to_positions(poses, room_frame=False):
+    """
+    Converts stacked 3x4 pose matrices of the tracker into positions and Euler angles in one pass.
+
+    :param poses: array of shape (N, 3, 4)
+    :param room_frame: True for poses that were transformed by a RoomCalibration, whose positions are used as they
+    are. Otherwise, the vertical y-axis of the tracking universe is swapped to the last position coordinate.
+    :return: positions [in m] and orientations (yaw, pitch, roll) [in degrees], both of shape (N, 3)
+    """
+    poses = np.asarray(poses, dtype=float)
+    positions = poses[:, :, 3] if room_frame else poses[:, [0, 2, 1], 3]
+    return positions, rotations_to_euler_angles(poses[:, :, :3])
+
+
+def rotations_to_euler_angles(rotations):
+    """
+    :param rotations: array of shape (N, 3, 3)
+    :return: yaw, pitch and roll [in degrees] of shape (N, 3)
+    """
+    yaw = np.arctan2(rotations[:, 1, 0], rotations[:, 0, 0])
+    pitch = np.arctan2(rotations[:, 2, 0], rotations[:, 0, 0])
+    roll = np.arctan2(rotations[:, 2, 1], rotations[:, 2, 2])
+    return np.rad2deg(np.stack([yaw, pitch, roll], axis=1))
+
+
+def rotations_to_quaternions(rotations):
+    """
+    Converts stacked rotation matrices into unit quaternions (w, x, y, z). For every matrix, the quaternion component
+    with the largest magnitude is computed first, which keeps the conversion numerically stable.
+
+    :param rotations: array of shape (N, 3, 3)
+    :return: array of shape (N, 4)
+    """
+    m = np.asarray(rotations, dtype=float)
+    trace = m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2]
+    largest = np.argmax(np.stack([trace, m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]], axis=1), axis=1)
+
+    quaternions = np.empty((len(m), 4))
+
+    r = m[largest == 0]
+    s = 2 * np.sqrt(1 + r[:, 0, 0] + r[:, 1, 1] + r[:, 2, 2])
+    quaternions[largest == 0] = np.stack([s / 4, (r[:, 2, 1] - r[:, 1, 2]) / s, (r[:, 0, 2] - r[:, 2, 0]) / s,
+                                          (r[:, 1, 0] - r[:, 0, 1]) / s], axis=1)
+    r = m[largest == 1]
+    s = 2 * np.sqrt(1 + r[:, 0, 0] - r[:, 1, 1] - r[:, 2, 2])
+    quaternions[largest == 1] = np.stack([(r[:, 2, 1] - r[:, 1, 2]) / s, s / 4, (r[:, 0, 1] + r[:, 1, 0]) / s,
+                                          (r[:, 0, 2] + r[:, 2, 0]) / s], axis=1)
+    r = m[largest == 2]
+    s = 2 * np.sqrt(1 + r[:, 1, 1] - r[:, 0, 0] - r[:, 2, 2])
+    quaternions[largest == 2] = np.stack([(r[:, 0, 2] - r[:, 2, 0]) / s, (r[:, 0, 1] + r[:, 1, 0]) / s, s / 4,
+                                          (r[:, 1, 2] + r[:, 2, 1]) / s], axis=1)
+    r = m[largest == 3]
+    s = 2 * np.sqrt(1 + r[:, 2, 2] - r[:, 0, 0] - r[:, 1, 1])
+    quaternions[largest == 3] = np.stack([(r[:, 1, 0] - r[:, 0, 1]) / s, (r[:, 0, 2] + r[:, 2, 0]) / s,
+                                          (r[:, 1, 2] + r[:, 2, 1]) / s, s / 4], axis=1)
+    return quaternions
+
+
+def quaternion_to_rotation(quaternion):
+    w, x, y, z = quaternion
+    return np.array([[1 - 2 * (y ** 2 + z ** 2), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+                     [2 * (x * y + z * w), 1 - 2 * (x ** 2 + z ** 2), 2 * (y * z - x * w)],
+                     [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x ** 2 + y ** 2)]])
+
+
+def average_quaternions(quaternions):
+    """
+    Averages unit quaternions after Markley et al., "Averaging Quaternions" (2007): the average is the eigenvector of
+    the largest eigenvalue of the sum of the outer products. Unlike averaging Euler angles, this does not depend on the
+    signs of the quaternions and does not break at the wrap-around of the angles.
+    """
+    quaternions = np.asarray(quaternions, dtype=float)
+    _, eigenvectors = np.linalg.eigh(quaternions.T @ quaternions)
+    average = eigenvectors[:, -1]
+    return average if average[0] >= 0 else -average
+
+
+def quaternion_angles(quaternions, reference):
+    """
+    :return: rotation angles between the quaternions and the reference quaternion [in degrees]
+    """
+    return np.rad2deg(2 * np.arccos(np.clip(np.abs(quaternions @ reference), 0, 1)))
+
+
+def _inlier_mask(deviations, min_deviation, factor=params.TRACKING_OUTLIER_FACTOR):
+    return deviations <= max(factor * np.median(deviations), min_deviation)
+
+
+def average_poses(poses, room_frame=False):
+    """
+    Rejects outliers among stacked pose matrices and averages the remaining ones. Positions are rejected by their
+    distance to the median position, orientations by their rotation angle to the average orientation of all poses.
+
+    :param poses: array of shape (N, 3, 4) without invalid poses
+    :param room_frame: True for poses that were transformed by a RoomCalibration
+    :return: namespace with the mean position [in m] and orientation (yaw, pitch, roll) [in degrees], the average
+    quaternion, the standard deviations of the positions and Euler angles of the inliers, the number of inliers and
+    the standard error of the mean position [in m]
+    """
+    poses = np.asarray(poses, dtype=float)
+    positions, orientations = poses_to_positions(poses, room_frame)
+    quaternions = rotations_to_quaternions(poses[:, :, :3])
+
+    position_deviations = np.linalg.norm(positions - np.median(positions, axis=0), axis=1)
+    angle_deviations = quaternion_angles(quaternions, average_quaternions(quaternions))
+    inliers = _inlier_mask(position_deviations, params.TRACKING_OUTLIER_MIN_DISTANCE) & \
+        _inlier_mask(angle_deviations, params.TRACKING_OUTLIER_MIN_ANGLE)
+
+    average_quaternion = average_quaternions(quaternions[inliers])
+    average_orientation = rotations_to_euler_angles(quaternion_to_rotation(average_quaternion)[np.newaxis])
+
+    # Euler angles are unwrapped, because they jump between -180 and 180 degrees
+    inlier_orientations = np.rad2deg(np.unwrap(np.deg2rad(orientations[inliers]), axis=0))
+
+    tracked_position = types.SimpleNamespace()
+    tracked_position.room_frame = room_frame
+    tracked_position.position = np.mean(positions[inliers], axis=0)
+    tracked_position.orientation = average_orientation[0]
+    tracked_position.quaternion = average_quaternion
+    tracked_position.position_std = np.std(positions[inliers], axis=0)
+    tracked_position.orientation_std = np.std(inlier_orientations, axis=0)
+    tracked_position.n_samples = int(np.count_nonzero(inliers))
+    tracked_position.standard_error = np.max(tracked_position.position_std) / np.sqrt(tracked_position.n_samples)
+    return tracked_position
+
+
+class SettleDetector(object):
+    """
+    Detects when a tracked device has come to rest, i.e., when the standard deviations of its position and orientation
+    over a short window of the most recent samples fall below the given tolerances.
+    """
+    def __init__(self, window_length=params.SETTLE_WINDOW_LENGTH, position_tolerance=params.SETTLE_POSITION_TOLERANCE,
+                 orientation_tolerance=params.SETTLE_ORIENTATION_TOLERANCE):
+        self.window_length = window_length
+        self.position_tolerance = position_tolerance
+        self.orientation_tolerance = orientation_tolerance
+
+        self.positions = np.zeros((window_length, 3))
+        self.orientations = np.zeros((window_length, 3))
+        self.n_samples = 0
+
+    def reset(self):
+        self.n_samples = 0
+
+    def add_sample(self, position, orientation):
+        idx = self.n_samples % self.window_length
+        self.positions[idx] = position
+        self.orientations[idx] = orientation
+        self.n_samples += 1
+
+    def is_settled(self):
+        if self.n_samples < self.window_length:
+            return False
+        return self.is_window_settled(self.positions, self.orientations)
+
+    def is_window_settled(self, positions, orientations):
+        # orientations are unwrapped, because the angles jump between -180 and 180 degrees
+        orientations = np.rad2deg(np.unwrap(np.deg2rad(orientations), axis=0))
+        return np.max(np.std(positions, axis=0)) < self.position_tolerance and \
+            np.max(np.std(orientations, axis=0)) < self.orientation_tolerance
+
+
+class PoseSampler(object):
+    """
+    Polls the poses of the connected trackers in a background thread at the tracking frequency and keeps the most
+    recent pose matrices of each tracker in a preallocated ring buffer. Averaging and settle detection then work on the
+    buffered poses instead of blocking the main loop with polling.
+    """
+    def __init__(self, backend, buffer_length=params.TRACKING_BUFFER_LENGTH, frequency=params.TRACKING_FREQUENCY,
+                 device_change_callback=None):
+        """
+        :param device_change_callback: called by the sampler thread when devices were activated or deactivated
+        """
+        self.logger = utils.get_logger('PoseSampler')
+        self.backend = backend
+        self.device_change_callback = device_change_callback
+        self.buffer_length = buffer_length
+        self.frequency = frequency
+
+        # device indices and ring buffers of 3x4 pose matrices per tracker type, invalid poses are stored as NaN
+        self.tracker_indices = {}
+        self.poses = {}
+        self.timestamps = np.zeros(buffer_length)
+        self.n_samples = 0
+
+        # all samples are additionally appended to the trajectory log, if there is one
+        self.trajectory_writer = None
+        self.measurement_id = 0
+
+        # exception that stopped the sampler thread, which is raised again to the threads that wait for samples
+        self.error = None
+
+        self._new_samples = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add_tracker(self, tracker_type, tracker_idx):
+        with self._new_samples:
+            self.tracker_indices[tracker_type] = tracker_idx
+            self.poses[tracker_type] = np.full((self.buffer_length, 3, 4), np.nan)
+
+        if self._thread is None:
+            self.start()
+
+    def update_tracker_index(self, tracker_type, tracker_idx):
+        with self._new_samples:
+            self.tracker_indices[tracker_type] = tracker_idx
+
+    def start(self):
+        self.error = None
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._sampling_loop, daemon=True)
+        self._thread.start()
+        self.logger.info('Started sampling the tracker poses at {} Hz.'.format(self.frequency))
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def start_trajectory_log(self, filename, overwrite=False):
+        with self._new_samples:
+            self.trajectory_writer = trajectory_log.TrajectoryWriter(filename, overwrite)
+        self.logger.info('Logging the trajectories of the trackers to \"{}\".'.format(filename))
+
+    def stop_trajectory_log(self):
+        with self._new_samples:
+            if self.trajectory_writer is not None:
+                self.trajectory_writer.close()
+                self.trajectory_writer = None
+
+    def set_measurement_id(self, measurement_id):
+        with self._new_samples:
+            self.measurement_id = measurement_id
+            # the samples of the previous measurement are written, so they can be read while the session is running
+            if self.trajectory_writer is not None:
+                self.trajectory_writer.flush()
+
+    def _sampling_loop(self):
+        try:
+            self._sample_poses()
+        except Exception as e:
+            self.logger.error('The sampling of the tracker poses stopped: {}'.format(e))
+            with self._new_samples:
+                self.error = e
+                self._new_samples.notify_all()
+
+    def _sample_poses(self):
+        period = 1 / self.frequency
+        t_next = time.time()
+        while not self._stop_event.is_set():
+            if self.backend.poll_device_events() and self.device_change_callback is not None:
+                self.device_change_callback()
+
+            with self._new_samples:
+                tracker_types = list(self.tracker_indices)
+                tracker_indices = [self.tracker_indices[tracker_type] for tracker_type in tracker_types]
+
+            poses, pose_is_valid, device_is_connected = self.backend.get_poses(tracker_indices)
+            timestamp = time.time()
+
+            with self._new_samples:
+                buffer_idx = self.n_samples % self.buffer_length
+                self.timestamps[buffer_idx] = timestamp
+                for i, tracker_type in enumerate(tracker_types):
+                    if pose_is_valid[i]:
+                        self.poses[tracker_type][buffer_idx] = poses[i]
+                    else:
+                        self.poses[tracker_type][buffer_idx] = np.nan
+
+                    if self.trajectory_writer is not None:
+                        self.trajectory_writer.append(timestamp, self.measurement_id, tracker_indices[i], tracker_type,
+                                                      poses[i], pose_is_valid[i], device_is_connected[i])
+                self.n_samples += 1
+                self._new_samples.notify_all()
+
+            # the sampling times are kept on a fixed grid, unless the loop fell behind
+            t_next += period
+            t_sleep = t_next - time.time()
+            if t_sleep > 0:
+                self._stop_event.wait(t_sleep)
+            else:
+                t_next = time.time()
+
+    def wait_for_samples(self, n_samples, timeout=None):
+        """
+        Blocks until the sampler has acquired at least n_samples poses since it was started.
+
+        :return: True if the samples were acquired, False if the timeout was reached
+        :raises PositionTrackingError: if the sampler thread stopped because of an error
+        """
+        with self._new_samples:
+            acquired = self._new_samples.wait_for(lambda: self.n_samples >= n_samples or self.error is not None,
+                                                  timeout)
+            if self.error is not None:
+                raise PositionTrackingError('The sampling of the tracker poses stopped: {}'.format(self.error)) \
+                    from self.error
+            return acquired
+
+    def get_window(self, tracker_type, n_samples):
+        """
+        :return: copy of the most recent n_samples pose matrices of the tracker in chronological order, the window is
+        shorter if fewer poses have been sampled yet
+        """
+        with self._new_samples:
+            n_samples = min(n_samples, self.n_samples, self.buffer_length)
+            buffer_indices = np.arange(self.n_samples - n_samples, self.n_samples) % self.buffer_length
+            return self.poses[tracker_type][buffer_indices]
+
+
 class PositionTracker:
-    def __init__(self):
+    def __init__(self, backend=None, tracker_serials=None):
+        """
+        :param backend: TrackingBackend that provides the tracker poses. By default, the backend that is configured by
+        TRACKING_BACKEND is created.
+        :param tracker_serials: serial numbers of the trackers per robot, by default TRACKER_SERIALS
+        """
         self.logger = utils.get_logger('PositionTracker')
+        self.metrics = metrics.get_metrics('PositionTracker')
 
-        try:
-            openvr.init(openvr.VRApplication_Other)
-        except openvr.error_code.InitError:
-            self.logger.error('Could not init OpenVR. Please make sure that the Link box and HMD is connected and the '
-                              'Link box is powered on.')
-            raise
-        self.logger.info('Successfully initialized OpenVR for the position tracking.')
+        self.backend = backend if backend is not None else tracking_backends.create_backend()
+        self.tracker_serials = dict(tracker_serials if tracker_serials is not None else params.TRACKER_SERIALS)
+
+        # device indices of the connected trackers per robot and the cached device indices of all serial numbers, which
+        # are only scanned again when devices are activated or deactivated
+        self.tracker_indices = {}
+        self._serial_indices = None
 
-        # get the VR System, that is an object to access all connected VR devices
-        self.vr_system = openvr.VRSystem()
+        self.sampler = PoseSampler(self.backend, device_change_callback=self.refresh_tracker_indices)
+        if params.TRACKING_MAX_SAMPLES > self.sampler.buffer_length:
+            self.logger.warning('TRACKING_MAX_SAMPLES ({}) exceeds the {} poses that are buffered per tracker, so at most '
+                                '{} poses are averaged.'.format(params.TRACKING_MAX_SAMPLES, self.sampler.buffer_length,
+                                                                self.sampler.buffer_length))
 
-        self.tracker_idx_rcv = None
-        self.tracker_idx_src = None
+        # without a calibration, poses are returned in the standing tracking universe
+        self.calibration = None
+
+    def _scan_serial_numbers(self):
+        self._serial_indices = {self.backend.get_serial_number(i): i for i in self.backend.get_connected_trackers()}
+
+    def connect_trackers(self):
+        """
+        Connects the trackers of all robots in TRACKER_SERIALS at once.
+        """
+        for tracker_type in self.tracker_serials:
+            self.connect_tracker(tracker_type)
 
     def connect_tracker(self, tracker_type):
-        if tracker_type != params.ROBOT_TYPE_RECEIVER and tracker_type != params.ROBOT_TYPE_SOURCE:
-            self.logger.error('Tracker type must be either \'{}\' or \'{}\', but I got \'{}\'.'
+        if tracker_type not in self.tracker_serials and tracker_type != params.ROBOT_TYPE_RECEIVER and \
+                tracker_type != params.ROBOT_TYPE_SOURCE:
+            self.logger.error('Tracker type must be either \'{}\', \'{}\' or in TRACKER_SERIALS, but I got \'{}\'.'
                               .format(params.ROBOT_TYPE_SOURCE, params.ROBOT_TYPE_RECEIVER, tracker_type))
-            raise PositionTrackingError('Tracker type must be either \'{}\' or \'{}\', but I got \'{}\'.'
-                                        .format(params.ROBOT_TYPE_SOURCE, params.ROBOT_TYPE_RECEIVER,
-                                                tracker_type))
-
-        # get pose (i.e. status of all connected VR devices) to check which device is the tracker. Pose is an array,
-        # where each device is represented by one entry
-        pose = self.vr_system.getDeviceToAbsoluteTrackingPose(openvr.TrackingUniverseStanding, 0,
-                                                              openvr.k_unMaxTrackedDeviceCount)
-
-        # Search for new active Trackers and write them to a list (ideally, this should only have one element, because
-        # we can only add one tracker at a time to keep track of which one is source and receiver)
-        n_active_trackers = 0
-        active_index = []
-        for i in range(openvr.k_unMaxTrackedDeviceCount):
-            # only append devices if they are connected
-            if pose[i].bDeviceIsConnected:
-                device_type = self.vr_system.getTrackedDeviceClass(i)
-
-                # only append devices of type Tracker
-                if device_type == openvr.TrackedDeviceClass_GenericTracker:
-                    # only append trackers that are not connected yet
-                    if i == self.tracker_idx_rcv or i == self.tracker_idx_src:
-                        pass
-                    else:
-                        active_index.append(i)
-                        n_active_trackers += 1
+            raise PositionTrackingError('Tracker type must be either \'{}\', \'{}\' or in TRACKER_SERIALS, but I '
+                                        'got \'{}\'.'.format(params.ROBOT_TYPE_SOURCE, params.ROBOT_TYPE_RECEIVER,
+                                                              tracker_type))
+        if not tracker_type.isascii() or len(tracker_type) > trajectory_log.MAX_TRACKER_TYPE_LENGTH:
+            self.logger.error('Tracker type must consist of at most {} ASCII characters, but I got \'{}\'.'
+                              .format(trajectory_log.MAX_TRACKER_TYPE_LENGTH, tracker_type))
+            raise PositionTrackingError('Tracker type must consist of at most {} ASCII characters, but I got \'{}\'.'
+                                        .format(trajectory_log.MAX_TRACKER_TYPE_LENGTH, tracker_type))
+
+        # Recorded and synthetic trackers are known by the backend, trackers with a configured serial number are found
+        # by it, so both do not have to be switched on one by one
+        known_index = self.backend.get_tracker_index(tracker_type)
+        if known_index is not None:
+            active_index = [known_index]
+        elif tracker_type in self.tracker_serials:
+            serial_number = self.tracker_serials[tracker_type]
+            if self._serial_indices is None or serial_number not in self._serial_indices:
+                self._scan_serial_numbers()
+            if serial_number not in self._serial_indices:
+                self.logger.error('The tracker {} of the {} robot is not connected. Please turn it on in order to '
+                                  'proceed.'.format(serial_number, tracker_type))
+                raise PositionTrackingError('The tracker {} of the {} robot is not connected. Please turn it on in '
+                                            'order to proceed.'.format(serial_number, tracker_type))
+            active_index = [self._serial_indices[serial_number]]
+        else:
+            # Search for new active Trackers (ideally, this should only be one, because we can only add one tracker at a
+            # time to keep track of which one is source and receiver)
+            active_index = [i for i in self.backend.get_connected_trackers() if i not in self.tracker_indices.values()]
+        n_active_trackers = len(active_index)
 
         if n_active_trackers == 0:
             self.logger.error('No new active tracking device. Please turn on a tracker in order to proceed.')
@@ -71,45 +410,194 @@ class PositionTracker:
                                         'trackers. Please turn {} of them off again.'.format(n_active_trackers,
                                                                                              n_active_trackers-1))
         else:
-            if tracker_type == params.ROBOT_TYPE_RECEIVER:
-                self.tracker_idx_rcv = active_index[0]
-            elif tracker_type == params.ROBOT_TYPE_SOURCE:
-                self.tracker_idx_src = active_index[0]
+            self.tracker_indices[tracker_type] = active_index[0]
+            self.sampler.add_tracker(tracker_type, active_index[0])
+            self.logger.info('Connected the tracker of the {} robot at device index {}.'.format(tracker_type,
+                                                                                               active_index[0]))
+
+    def get_tracker_serials(self):
+        """
+        :return: serial numbers of the connected trackers per robot, with which the trackers are connected again when a
+        session is resumed
+        """
+        return {tracker_type: self.backend.get_serial_number(tracker_idx)
+                for tracker_type, tracker_idx in self.tracker_indices.items()}
+
+    def refresh_tracker_indices(self):
+        """
+        Scans the serial numbers again after devices were activated or deactivated, e.g., when a tracker reconnected
+        with another device index.
+        """
+        self._scan_serial_numbers()
+        for tracker_type, serial_number in self.tracker_serials.items():
+            tracker_idx = self._serial_indices.get(serial_number)
+            if tracker_type in self.tracker_indices and tracker_idx is not None and \
+                    tracker_idx != self.tracker_indices[tracker_type]:
+                self.logger.info('The tracker of the {} robot moved to device index {}.'.format(tracker_type,
+                                                                                               tracker_idx))
+                self.tracker_indices[tracker_type] = tracker_idx
+                self.sampler.update_tracker_index(tracker_type, tracker_idx)
+
+    def start_trajectory_log(self, session_name, overwrite=False):
+        """
+        :param overwrite: if True, the trajectory file of a previous run of the session is replaced, otherwise the
+        poses are appended to it, e.g., when the session is resumed
+        """
+        self.sampler.start_trajectory_log(trajectory_log.get_trajectory_filename(session_name), overwrite)
 
-    def measure_positions(self, n_averages=1):
-        avg_position_rcv = orientation_rcv = avg_position_src = orientation_src = [0, 0, 0]
-        for avg_idx in range(n_averages):
-            pose = self.vr_system.getDeviceToAbsoluteTrackingPose(openvr.TrackingUniverseStanding, 0,
-                                                                  openvr.k_unMaxTrackedDeviceCount)
+    def set_measurement_id(self, measurement_id):
+        self.sampler.set_measurement_id(measurement_id)
+        metrics.set_measurement_id(measurement_id)
 
-            position_rcv, orientation_rcv = self.pose_to_position(pose[self.tracker_idx_rcv].mDeviceToAbsoluteTracking)
-            position_src, orientation_src = self.pose_to_position(pose[self.tracker_idx_src].mDeviceToAbsoluteTracking)
+    def set_calibration(self, calibration):
+        """
+        :param calibration: RoomCalibration, which transforms all subsequently measured poses into room coordinates,
+        or None to measure in the tracking universe again
+        """
+        self.calibration = calibration
 
-            avg_position_rcv += (1 / n_averages) * position_rcv
-            avg_position_src += (1 / n_averages) * position_src
+    def _get_poses(self, tracker_type, n_samples):
+        poses = self.sampler.get_window(tracker_type, n_samples)
+        if self.calibration is not None:
+            poses = self.calibration.apply(poses)
+        return poses
+
+    def close(self):
+        self.sampler.stop()
+        self.sampler.stop_trajectory_log()
+        self.backend.shutdown()
+
+    def _average_window(self, tracker_type, n_averages):
+        poses = self._get_poses(tracker_type, n_averages)
+        poses = poses[~np.any(np.isnan(poses), axis=(1, 2))]
+        if len(poses) == 0:
+            self.logger.error('The tracker of the {} robot did not return any valid poses.'.format(tracker_type))
+            raise PositionTrackingError('The tracker of the {} robot did not return any valid '
+                                        'poses.'.format(tracker_type))
+
+        tracked_position = average_poses(poses, room_frame=self.calibration is not None)
+        tracked_position.n_rejected = len(poses) - tracked_position.n_samples
+        return tracked_position
+
+    def measure_positions(self, n_averages=1, adaptive=False):
+        """
+        Averages the poses of the receiver and the source tracker that the background sampler acquires after the call.
+        The call blocks until n_averages new poses are sampled, so n_averages=1 returns the current positions after one
+        sampling period, e.g., for navigation feedback.
+
+        :param adaptive: if True, n_averages is ignored and new poses are averaged until the standard errors of both
+        positions fall below TRACKING_STANDARD_ERROR_TOLERANCE
+        """
+        tracked_positions = self.measure_all_positions(n_averages, adaptive,
+                                                       [params.ROBOT_TYPE_RECEIVER, params.ROBOT_TYPE_SOURCE])
+        return tracked_positions[params.ROBOT_TYPE_RECEIVER], tracked_positions[params.ROBOT_TYPE_SOURCE]
+
+    def measure_all_positions(self, n_averages=1, adaptive=False, tracker_types=None):
+        """
+        Like measure_positions, but for any number of trackers, which are all sampled by the same pose query.
+
+        :param tracker_types: robots whose positions are measured, by default all connected trackers
+        :return: dictionary with the tracked positions per tracker type
+        """
+        if tracker_types is None:
+            tracker_types = list(self.tracker_indices)
+
+        t_start = time.perf_counter()
+        if adaptive:
+            tracked_positions = self._measure_positions_adaptively(tracker_types)
+        else:
+            # only poses that are sampled after the call are averaged, e.g., none from before the robots stopped
+            self._wait_for_new_samples(self.sampler.n_samples, n_averages)
+            tracked_positions = {tracker_type: self._average_window(tracker_type, n_averages)
+                                 for tracker_type in tracker_types}
+        self.metrics.observe(metrics.PHASE_TRACK, time.perf_counter() - t_start)
+
+        for tracker_type, tracked_position in tracked_positions.items():
+            self.metrics.set_gauge('tracking_samples_{}'.format(tracker_type), tracked_position.n_samples)
+            self.metrics.inc('rejected_poses', tracked_position.n_rejected)
+            if tracked_position.n_rejected > 0:
+                self.logger.info('Rejected {} of {} poses of the {} robot as outliers.'
+                                 .format(tracked_position.n_rejected,
+                                         tracked_position.n_rejected + tracked_position.n_samples, tracker_type))
+        return tracked_positions
+
+    def _wait_for_new_samples(self, n_samples_start, n_samples):
+        # the sampling is slower than the tracking frequency, if the backend is slow, so TRACKING_MAX_TIME is added
+        timeout = n_samples / self.sampler.frequency + params.TRACKING_MAX_TIME
+        if not self.sampler.wait_for_samples(n_samples_start + n_samples, timeout):
+            self.logger.error('The tracker poses were not sampled within {:.1f} s.'.format(timeout))
+            raise PositionTrackingError('The tracker poses were not sampled within {:.1f} s.'.format(timeout))
+
+    def _measure_positions_adaptively(self, tracker_types, tolerance=params.TRACKING_STANDARD_ERROR_TOLERANCE,
+                                      min_samples=params.TRACKING_MIN_SAMPLES, max_samples=params.TRACKING_MAX_SAMPLES,
+                                      max_time=params.TRACKING_MAX_TIME):
+        # older poses are overwritten in the ring buffers, so more samples than buffered could never be averaged
+        max_samples = min(max_samples, self.sampler.buffer_length)
+        min_samples = min(min_samples, max_samples)
+        n_samples_start = self.sampler.n_samples
+        n_samples = min_samples
+        t_start = time.time()
+        while True:
+            self._wait_for_new_samples(n_samples_start, n_samples)
+            tracked_positions = {tracker_type: self._average_window(tracker_type, n_samples)
+                                 for tracker_type in tracker_types}
+
+            standard_error = max(tracked_position.standard_error for tracked_position in tracked_positions.values())
+            if standard_error <= tolerance:
+                self.logger.info('Standard error of {:.2f} mm reached after {} samples.'
+                                 .format(1000 * standard_error, n_samples))
+                break
+            if n_samples >= max_samples or time.time() - t_start >= max_time:
+                self.logger.warning('The standard error of the tracked positions is {:.2f} mm after {} samples, but '
+                                    'should be below {:.2f} mm. The tracking might be disturbed.'
+                                    .format(1000 * standard_error, n_samples, 1000 * tolerance))
+                break
+
+            # the required number of samples scales with the square of the ratio of the standard errors
+            n_samples = int(np.clip(n_samples * (standard_error / tolerance) ** 2, n_samples + 1, max_samples))
+
+        return tracked_positions
+
+    def wait_until_settled(self, timeout=params.SETTLE_TIMEOUT):
+        """
+        Polls the poses of all connected trackers until none of them moves anymore, e.g., until the robots have stopped
+        shaking after a movement.
+
+        :param timeout: maximal waiting time [in seconds]
+        :return: True if all trackers have settled, False if the timeout was reached
+        """
+        detector = SettleDetector()
+
+        # only poses that were sampled after the call are considered
+        n_samples_start = self.sampler.n_samples
+        t_start = time.time()
+        while time.time() - t_start < timeout:
+            if not self.sampler.wait_for_samples(n_samples_start + detector.window_length,
+                                                 timeout=timeout - (time.time() - t_start)):
+                break
+
+            if all(self._is_tracker_settled(detector, tracker_type) for tracker_type in self.tracker_indices):
+                self.logger.info('Trackers settled after {:.2f} s.'.format(time.time() - t_start))
+                self.metrics.observe(metrics.PHASE_SETTLE, time.time() - t_start)
+                return True
 
             time.sleep(1/params.TRACKING_FREQUENCY)
 
-        position_rcv = types.SimpleNamespace()
-        position_src = types.SimpleNamespace()
+        self.logger.warning('Trackers did not settle within {} s.'.format(timeout))
+        self.metrics.observe(metrics.PHASE_SETTLE, time.time() - t_start)
+        self.metrics.inc('settle_timeouts')
+        return False
+
+    def _is_tracker_settled(self, detector, tracker_type):
+        poses = self._get_poses(tracker_type, detector.window_length)
+        if np.any(np.isnan(poses)):
+            return False
 
-        position_rcv.position = avg_position_rcv
-        position_rcv.orientation = orientation_rcv
-        position_src.position = avg_position_src
-        position_src.orientation = orientation_src
-        return position_rcv, position_src
+        return detector.is_window_settled(*poses_to_positions(poses, room_frame=self.calibration is not None))
 
     @staticmethod
     def pose_to_position(pose):
-        x = pose[0][3]
-        y = pose[2][3]
-        z = pose[1][3]
-
-        yaw = 180 / np.pi * np.arctan2(pose[1][0], pose[0][0])
-        pitch = 180 / np.pi * np.arctan2(pose[2][0], pose[0][0])
-        roll = 180 / np.pi * np.arctan2(pose[2][1], pose[2][2])
-
-        position = np.array([x, y, z])
-        orientation = np.array([yaw, pitch, roll])
-        return position, orientation
+        pose = np.array([[pose[row][col] for col in range(4)] for row in range(3)])
+        positions, orientations = poses_to_positions(pose[np.newaxis])
+        return positions[0], orientations[0]
 
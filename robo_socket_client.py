@@ -1,18 +1,39 @@
-import time
-
 import robot_socket as robsock
 import position_tracking as tracking
+import occupancy_map as occupancy
+import battery_monitor as battery
+import room_calibration as calibration
+import session_metadata as metadata
+import session_checkpoint as checkpointing
+import metrics
+import time
 
 import measurement_utils as utils
 import measurement_params as parameters
 
-session_name, overwrite_flag = utils.initialize_session_env()
+session_name, overwrite_flag, resume_flag = utils.initialize_session_env()
 
 # Start logging server
 logging_server = utils.start_logging_server()
 
 logger = utils.init_logger('Main', add_logserver_handler=False)
 
+# The phase durations and other metrics of all hosts are received by the logging server and written into the metrics
+# file of the session
+metrics_writer = metrics.add_session_writer(session_name)
+main_metrics = metrics.get_metrics('Main')
+
+# A resumed session continues after the last measurement that was completed before the session was interrupted
+checkpoint = checkpointing.SessionCheckpoint.load(session_name) if resume_flag else None
+if checkpoint is not None:
+    logger.info('Resuming session "{}" after measurement {}, which was completed at {}.'
+                .format(session_name, checkpoint.last_measurement_id, checkpoint.timestamp))
+else:
+    if resume_flag:
+        logger.warning('Session "{}" has no checkpoint, so it is started from the first '
+                       'measurement.'.format(session_name))
+    checkpoint = checkpointing.SessionCheckpoint(session_name)
+
 # Initialize OpenVR for position tracking of robots
 tracking_controller = tracking.PositionTracker()
 
@@ -27,49 +48,165 @@ with robsock.RobotClient(raspberry_id=1, robot_type=parameters.ROBOT_TYPE_RECEIV
     src_robot.settimeout(120)
 
     # Init session on robots as well, i.e., create measurement folders etc.
-    rcv_robot.init_session(session_name, overwrite_flag)
-    src_robot.init_session(session_name, overwrite_flag)
+    rcv_robot.init_session(session_name, overwrite_flag, resume_flag)
+    src_robot.init_session(session_name, overwrite_flag, resume_flag)
 
     rcv_robot.init_robot()
     src_robot.init_robot()
 
-    input('Please go and turn on the tracker on the receiver robot. After that you can continue by pressing any key.')
-    tracking_controller.connect_tracker(parameters.ROBOT_TYPE_RECEIVER)
-    input('Please go and turn on the tracker on the source robot. After that you can continue by pressing any key.')
-    tracking_controller.connect_tracker(parameters.ROBOT_TYPE_SOURCE)
-    time.sleep(5)
-
-    metadata_frame = utils.init_metadata_frame()
+    # the recordings of a resumed session are normalized with the calibration factor of its first measurement
+    if checkpoint.calibration_factor is not None:
+        rcv_robot.set_calibration_factor(checkpoint.calibration_factor)
+
+    # the trackers of a resumed session are bound to the robots by the serial numbers of the checkpoint
+    tracking_controller.tracker_serials.update(checkpoint.tracker_serials)
+    if tracking_controller.tracker_serials:
+        # the trackers are identified by their serial numbers, so they can be turned on in any order
+        input('Please go and turn on the trackers on all robots. After that you can continue by pressing any key.')
+        tracking_controller.connect_trackers()
+    else:
+        input('Please go and turn on the tracker on the receiver robot. After that you can continue by pressing any '
+              'key.')
+        tracking_controller.connect_tracker(parameters.ROBOT_TYPE_RECEIVER)
+        input('Please go and turn on the tracker on the source robot. After that you can continue by pressing any '
+              'key.')
+        tracking_controller.connect_tracker(parameters.ROBOT_TYPE_SOURCE)
+    # the poses that are sampled before the loop starts belong to the first measurement of this run instead of the
+    # measurement ID 0, which would be out of order in the trajectory log of a resumed session
+    tracking_controller.set_measurement_id(checkpoint.next_measurement_id)
+    if parameters.TRACKING_LOG_TRAJECTORY:
+        # an overwritten session starts a new trajectory file, a resumed session continues the existing one
+        tracking_controller.start_trajectory_log(session_name, overwrite=overwrite_flag and not resume_flag)
+
+    # Poses are measured in room coordinates, if the room has been calibrated with calibrate_room.py. The trajectory log
+    # keeps the poses of the tracking universe, which can be transformed with the calibration of the session.
+    room_calibration = calibration.RoomCalibration.load_for_room(parameters.ROOM_NAME)
+    if room_calibration is not None:
+        tracking_controller.set_calibration(room_calibration)
+        room_calibration.save_with_session(session_name)
+    else:
+        logger.warning('Room "{}" has not been calibrated yet, so the poses are measured in the tracking '
+                       'universe.'.format(parameters.ROOM_NAME))
+    tracking_controller.wait_until_settled()
+
+    metadata.truncate_metadata(session_name, checkpoint.last_measurement_id)
+    metadata_writer = metadata.MetadataWriter(session_name)
+
+    # The occupancy map of previous sessions in the same room is reused, so that known obstacles are avoided from the
+    # beginning
+    occupancy_map = occupancy.OccupancyMap.load_for_room(parameters.ROOM_NAME)
+    previous_map_pose_rcv = checkpoint.map_poses.get(parameters.ROBOT_TYPE_RECEIVER)
+    previous_map_pose_src = checkpoint.map_poses.get(parameters.ROBOT_TYPE_SOURCE)
+
+    def save_checkpoint(completed_measurement_id, map_poses):
+        # the measurement is complete as soon as its RIRs are written, so a session that is interrupted from now on
+        # resumes with the next one
+        rcv_robot.wait_for_processing()
+        if checkpoint.calibration_factor is None:
+            checkpoint.calibration_factor = rcv_robot.get_calibration_factor()
+        checkpoint.update(completed_measurement_id, checkpoint.calibration_factor,
+                          tracking_controller.get_tracker_serials(), map_poses)
+        checkpoint.save()
+
+    # In the pipelined measurement cycle, the receiver writes the RIRs of a measurement in the background, while the
+    # robots move and the positions of the next measurement are tracked. Only then, the measurement is checkpointed.
+    completed_measurement = None
 
     # Start measurement loop
-    for measurement_id in range(1, parameters.MEASUREMENTS_PER_SESSION + 1):
+    for measurement_id in range(checkpoint.next_measurement_id, parameters.MEASUREMENTS_PER_SESSION + 1):
+        t_cycle_start = time.perf_counter()
         rcv_robot.set_measurement_id(measurement_id)
         src_robot.set_measurement_id(measurement_id)
+        tracking_controller.set_measurement_id(measurement_id)
+
+        # Park the robots before their batteries are depleted, instead of noticing it when a robot powers off
+        battery_rcv = rcv_robot.get_battery_status()
+        battery_src = src_robot.get_battery_status()
+        for robot_type, battery_status in [(parameters.ROBOT_TYPE_RECEIVER, battery_rcv),
+                                           (parameters.ROBOT_TYPE_SOURCE, battery_src)]:
+            if battery_status is not None and not battery_status['reachable']:
+                logger.warning('The battery telemetry of the {} robot could not be read. The robot might have powered '
+                               'off.'.format(robot_type))
+            elif battery_status is not None:
+                logger.info('Battery of the {} robot: {} mAh of {} mAh, {} mV, {} mA, predicted remaining '
+                            'measurements: {}.'.format(robot_type, battery_status['charge'],
+                                                       battery_status['capacity'], battery_status['voltage'],
+                                                       battery_status['current'],
+                                                       battery_status['remaining_measurements']))
+
+        if battery.needs_charging(battery_rcv) or battery.needs_charging(battery_src):
+            logger.warning('The robots are parked, because their batteries are about to be depleted or their battery '
+                           'telemetry could not be read.')
+            rcv_robot.park()
+            src_robot.park()
+            input('Please charge the robots and put them back to their positions. After that you can continue by '
+                  'pressing any key.')
+            rcv_robot.init_robot()
+            src_robot.init_robot()
+            tracking_controller.wait_until_settled()
+
+            # the charge at the beginning of this measurement is sampled again after charging
+            rcv_robot.set_measurement_id(measurement_id)
+            src_robot.set_measurement_id(measurement_id)
 
         time_obj = utils.get_current_localtime_obj()
 
-        position_rcv, position_src = tracking_controller.measure_positions(parameters.TRACKING_N_AVERAGES)
+        t_tracking_start = time.time()
+        position_rcv, position_src = tracking_controller.measure_positions(
+            parameters.TRACKING_N_AVERAGES, adaptive=parameters.TRACKING_ADAPTIVE)
+        tracking_duration = time.time() - t_tracking_start
         logger.info('Receiver is currently located at {} and has the orientation {}.'.format(position_rcv.position,
                                                                                              position_rcv.orientation))
         logger.info('Source is currently located at {} and has the orientation {}.'.format(position_src.position,
                                                                                            position_src.orientation))
 
-        metadata_frame = utils.add_measurement_to_frame(metadata_frame, measurement_id, time_obj,
-                                                        position_rcv, position_src)
-
         # Save metadata
-        utils.save_metadata(metadata_frame, session_name)
+        metadata_writer.add_measurement(measurement_id, time_obj, {parameters.ROBOT_TYPE_RECEIVER: position_rcv,
+                                                                   parameters.ROBOT_TYPE_SOURCE: position_src},
+                                        tracking_duration)
+
+        if completed_measurement is not None:
+            save_checkpoint(*completed_measurement)
 
         rcv_robot.start_recording()
         src_robot.playback_sweep()
         rcv_robot.stop_recording()
 
         # Move to next positions
-        rcv_robot.move_randomly()
-        src_robot.move_randomly()
+        map_pose_rcv = occupancy.tracked_pose_to_map_pose(position_rcv)
+        map_pose_src = occupancy.tracked_pose_to_map_pose(position_src)
+        if parameters.USE_OCCUPANCY_MAP:
+            # the robots drove straight from their previous to their current positions, so these cells are free
+            if previous_map_pose_rcv is not None:
+                occupancy_map.add_traversal(previous_map_pose_rcv, map_pose_rcv)
+                occupancy_map.add_traversal(previous_map_pose_src, map_pose_src)
+            previous_map_pose_rcv, previous_map_pose_src = map_pose_rcv, map_pose_src
+
+            # both robots move at the same time on paths that do not cross each other
+            robsock.move_robots_avoiding_obstacles([rcv_robot, src_robot], occupancy_map, [position_rcv, position_src],
+                                                   in_parallel=parameters.PIPELINE_MEASUREMENTS)
+            occupancy_map.save_with_session(session_name)
+        elif parameters.PIPELINE_MEASUREMENTS:
+            robsock.call_in_parallel(rcv_robot.move_randomly, src_robot.move_randomly)
+        else:
+            rcv_robot.move_randomly()
+            src_robot.move_randomly()
 
         # wait for robots to stop shaking
-        time.sleep(2)
+        tracking_controller.wait_until_settled()
+
+        completed_measurement = (measurement_id, {parameters.ROBOT_TYPE_RECEIVER: map_pose_rcv,
+                                                  parameters.ROBOT_TYPE_SOURCE: map_pose_src})
+        main_metrics.observe('cycle', time.perf_counter() - t_cycle_start)
+
+    if completed_measurement is not None:
+        save_checkpoint(*completed_measurement)
+    metadata_writer.close()
+
+metrics.send_counters()
+metrics.log_summary(logger)
 
+tracking_controller.close()
 logging_server.shutdown()
 logging_server.server_close()
+metrics_writer.close()
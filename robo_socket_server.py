@@ -1,13 +1,49 @@
 import argparse
+import importlib
+import time
 
-import robot_socket as robosock
 import measurement_params as parameters
 
+# Modules of the RobotServer in the order of their dependencies, so that the import time of every module only includes
+# the modules that were not imported before
+STARTUP_MODULES = ['numpy', 'measurement_utils', 'irobot.robots.create2', 'robot_controller', 'battery_monitor',
+                   'occupancy_map', 'sounddevice', 'session_store', 'sweep_measurement', 'robot_socket']
+
+
+def benchmark_startup():
+    t_start = time.perf_counter()
+    for module_name in STARTUP_MODULES:
+        t_module = time.perf_counter()
+        importlib.import_module(module_name)
+        print('import {:<24} {:8.1f} ms'.format(module_name, 1000 * (time.perf_counter() - t_module)))
+
+    import robot_socket as robosock
+    import sweep_measurement as sweep
+
+    t_init = time.perf_counter()
+    robosock.RobotServer().close()
+    print('init   {:<24} {:8.1f} ms'.format('RobotServer', 1000 * (time.perf_counter() - t_init)))
+    t_ready = time.perf_counter() - t_start
+
+    # the sweep controller is created when the client connects, so it is not part of the time until the server is ready
+    t_init = time.perf_counter()
+    sweep.SweepMeasurement(nfft=parameters.SWEEP_LENGTH * parameters.SWEEP_FS, fs=parameters.SWEEP_FS)
+    print('init   {:<24} {:8.1f} ms'.format('SweepMeasurement', 1000 * (time.perf_counter() - t_init)))
+
+    print('The RobotServer is ready to accept a connection after {:.1f} ms.'.format(1000 * t_ready))
+
+
 parser = argparse.ArgumentParser(description='Starts a robot server on the specified RaspberryPi.')
 parser.add_argument('raspberry_idx', metavar='i', type=int, nargs='?',
                     help='An index that specifies which RaspberryPi runs this script')
+parser.add_argument('--benchmark-startup', action='store_true',
+                    help='Reports the import and init times of the RobotServer modules instead of starting the server')
 args = parser.parse_args()
 
+if args.benchmark_startup:
+    benchmark_startup()
+    raise SystemExit
+
 if args.raspberry_idx == 1:
     server_address = parameters.IP_RASPBERRY1
 elif args.raspberry_idx == 2:
@@ -15,6 +51,8 @@ elif args.raspberry_idx == 2:
 else:
     raise SystemExit('RaspberryIdx must be either 1 or 2, but I got {}.'.format(args.raspberry_idx))
 
+import robot_socket as robosock
+
 with robosock.RobotServer() as rs:
     connection = rs.wait_for_connection(host_address=server_address)
     connection.start_receiver_loop()
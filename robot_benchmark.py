@@ -0,0 +1,85 @@
+import argparse
+import gc
+import time
+import numpy as np
+from irobot.robots.simulator import Create2Simulator
+
+import measurement_params as parameters
+
+# there is no logging server when benchmarking, so log records are sent to localhost, where they are dropped right away
+parameters.IP_MAIN = '127.0.0.1'
+
+import robot_controller as rc  # noqa: E402, the logging address has to be changed before the import
+
+parser = argparse.ArgumentParser(description='Benchmarks the RobotController on a simulated Create 2 robot.')
+parser.add_argument('--duration', type=float, default=5,
+                    help='Duration of the control loop rate measurement [in seconds]')
+parser.add_argument('--runs', type=int, default=3, help='Number of runs per movement for the stop accuracy')
+parser.add_argument('--room-size', type=float, default=6, help='Edge length of the square room [in m]')
+parser.add_argument('--no-latency', action='store_true', help='Disable the simulated serial transmission times')
+args = parser.parse_args()
+
+
+def measure_loop_rate(controller, duration):
+    """
+    Measures how many sensor snapshots the control loops of the RobotController can read per second while driving.
+    """
+    controller.rob.drive_straight(parameters.SPEED_APPROACH)
+    n_iterations = 0
+    t_start = time.time()
+    while time.time() - t_start < duration:
+        controller._read_sensor_snapshot()
+        n_iterations += 1
+    controller.rob.drive_straight(0)
+    return n_iterations / (time.time() - t_start)
+
+
+def measure_straight_errors(controller, simulator, distances, n_runs):
+    """
+    :return: differences between the driven and the requested distances [in mm]
+    """
+    errors = []
+    for distance in distances:
+        for run in range(n_runs):
+            simulator.pose = (0, 0, 0)
+            controller.move_robot_straight(distance / 1000)
+            controller._wait_until_wheels_stopped()
+            x, y, _ = simulator.pose
+            errors.append(np.hypot(x, y) - distance)
+    return np.array(errors)
+
+
+def measure_spin_errors(controller, simulator, angles, n_runs):
+    """
+    :return: differences between the spun and the requested angles [in degrees]
+    """
+    errors = []
+    for angle in angles:
+        for run in range(n_runs):
+            simulator.pose = (0, 0, 0)
+            controller.spin_robot(angle)
+            controller._wait_until_wheels_stopped()
+            errors.append(simulator.pose[2] - angle)
+    return np.array(errors)
+
+
+half_size = args.room_size * 1000 / 2
+room = [(-half_size, -half_size), (half_size, -half_size), (half_size, half_size), (-half_size, half_size)]
+
+with Create2Simulator(room=room, latency=not args.no_latency) as sim:
+    controller = rc.RobotController(port=sim.port)
+    controller.start_robot()
+
+    loop_rate = measure_loop_rate(controller, args.duration)
+    straight_errors = measure_straight_errors(controller, sim, [250, 500, 1000], args.runs)
+    spin_errors = measure_spin_errors(controller, sim, [45, 90, 180], args.runs)
+
+    # Create2 stops the robot when it is garbage collected, which has to happen while the simulator is still running
+    del controller
+    gc.collect()
+
+print('Control loop rate: {:.1f} Hz'.format(loop_rate))
+print('Straight drive stop error: mean {:.1f} mm, max {:.1f} mm'.format(np.mean(straight_errors),
+                                                                      np.max(np.abs(straight_errors))))
+print('Spin stop error: mean {:.2f} degrees, max {:.2f} degrees'.format(np.mean(spin_errors),
+                                                                       np.max(np.abs(spin_errors))))
@@ -7,16 +7,24 @@ STRAIGHTMOVE = 'STRAIGHT_MOVE_'
 STRAIGHTMOVE_BACKWARDS = 'STRAIGHT_MOVE_BW_'
 SPIN = 'SPIN_'
 SPIN_CLOCKWISE = 'SPIN_CW_'
+PARK = 'PARK'
 
 MEASURE = 'MEASURE'  # playrec with source and receiver on the same robot
 PLAYBACK_SWEEP = 'PLAYBACK_SWEEP'
 START_RECORDING = 'START_RECORDING'
 STOP_RECORDING = 'STOP_RECORDING'
+BATTERY_STATUS = 'BATTERY_STATUS'
+CALIBRATION_FACTOR = 'CALIBRATION_FACTOR'
+SET_CALIBRATION_FACTOR = 'SET_CALIBRATION_FACTOR'
+WAIT_PROCESSING = 'WAIT_PROCESSING'  # waits until the RIRs of all recordings have been written
 
 ACK = 'ACK'
+ACK_PAYLOAD_SEPARATOR = '_'  # the ACK can carry a JSON payload with the results of a command, e.g., bump events
+ACK_TERMINATOR = '\n'
 
 TYPE_ROBOT = 'r'
 TYPE_META = 'm'
 
-ROBOT_COMMANDS = [START, RANDMOVE, GLORIENTTES, STRAIGHTMOVE, STRAIGHTMOVE_BACKWARDS, SPIN, SPIN_CLOCKWISE]
-META_COMMANDS = [INIT_SESSION, SET_MEASUREMENT_ID, MEASURE, PLAYBACK_SWEEP, START_RECORDING, STOP_RECORDING]
+ROBOT_COMMANDS = [START, RANDMOVE, GLORIENTTES, STRAIGHTMOVE, STRAIGHTMOVE_BACKWARDS, SPIN, SPIN_CLOCKWISE, PARK]
+META_COMMANDS = [INIT_SESSION, SET_MEASUREMENT_ID, MEASURE, PLAYBACK_SWEEP, START_RECORDING, STOP_RECORDING,
+                 BATTERY_STATUS, CALIBRATION_FACTOR, SET_CALIBRATION_FACTOR, WAIT_PROCESSING]
@@ -1,36 +1,38 @@
 import irobot.robots.create2 as crt2
 import irobot.openinterface.constants as roboconsts
+import irobot.openinterface.response_parsers as roboparsers
 import numpy as np
 import math
 import glob
 import time
+import types
+
+import metrics
 
 import measurement_params as parameters
 import measurement_utils as utils
 
 
+# bumps and wheel drops, left and right encoder counts, and the six light bump signals
+SENSOR_SNAPSHOT_PACKETS = [7, 43, 44, 46, 47, 48, 49, 50, 51]
+
+
 class RobotInitError(Exception):
     pass
 
 
 class RobotController(object):
-    def __init__(self):
+    def __init__(self, port=None):
+        """
+        :param port: serial port of the robot, e.g. the port of a Create2Simulator. By default, the first USB serial
+        port is used.
+        """
         self.logger = utils.init_logger('RobotController')
-
-        # determine correct port to connect to
-        this_os = utils.get_operating_system()
-        if this_os == 'linux':
-            ports = glob.glob('/dev/tty[A-Za-z]*')
-        elif this_os == 'mac':
-            ports = glob.glob('/dev/tty.*')
-        else:
-            self.logger.error('Unsupported platform.')
-            raise SystemExit('This platform is not supported yet.')
-        usb_port_idx = [i for i, x in enumerate([port.lower().find('usb') for port in ports]) if x > 0]
+        self.metrics = metrics.get_metrics('RobotController')
 
         try:
             # init robot
-            self.port = ports[usb_port_idx[0]]
+            self.port = port if port is not None else self._find_robot_port()
 
             self.rob = crt2.Create2(self.port)
         except Exception as e:
@@ -41,6 +43,28 @@ class RobotController(object):
 
         self.logger.info('Initialized the robot successfully.')
 
+        # bump events of the current movement, which are reported to the client to build an occupancy map
+        self.bump_events = []
+        self._last_bumps_and_wheel_drops = None
+
+        # dead-reckoning odometry relative to the start of the current movement: x [mm] in the initial driving
+        # direction, y [mm] to the left of it and heading [rad], positive values are counterclockwise
+        self._odometry_pose = [0., 0., 0.]
+        self._odometry_encoder_counts = None
+
+    def _find_robot_port(self):
+        # determine correct port to connect to
+        this_os = utils.get_operating_system()
+        if this_os == 'linux':
+            ports = glob.glob('/dev/tty[A-Za-z]*')
+        elif this_os == 'mac':
+            ports = glob.glob('/dev/tty.*')
+        else:
+            self.logger.error('Unsupported platform.')
+            raise SystemExit('This platform is not supported yet.')
+        usb_port_idx = [i for i, x in enumerate([port.lower().find('usb') for port in ports]) if x > 0]
+        return ports[usb_port_idx[0]]
+
     def start_robot(self):
         # start the robot
         if self.rob.oi_mode == roboconsts.MODES.OFF:
@@ -54,7 +78,18 @@ class RobotController(object):
         self.rob.oi_mode = roboconsts.MODES.FULL
         self.logger.info('Robot is now in full mode.')
 
-    def _get_angle(self):
+    def park_robot(self):
+        # stop the wheels and switch to passive mode, in which the robot draws the least current and can be charged
+        self.rob.drive_straight(0)
+        self.rob.oi_mode = roboconsts.MODES.PASSIVE
+        self.logger.info('Parked the robot in passive mode.')
+
+    def _get_encoder_counts(self, snapshot=None):
+        if snapshot is None:
+            return self.rob.left_encoder_counts, self.rob.right_encoder_counts
+        return snapshot.left_encoder_counts, snapshot.right_encoder_counts
+
+    def _get_angle(self, snapshot=None):
         """
         Implementation of get_angle is wrong in Roomba firmware. Therefore, angle has to be calculated over other
         sensors. For more information check those links:
@@ -63,12 +98,13 @@ class RobotController(object):
 
         TODO: Firmware update, so this becomes obsolete
         """
-        dist_left_wheel = self.rob.left_encoder_counts * (1 / 508.8) * (math.pi * 72)
-        dist_right_wheel = self.rob.right_encoder_counts * (1 / 508.8) * (math.pi * 72)
+        left_encoder_counts, right_encoder_counts = self._get_encoder_counts(snapshot)
+        dist_left_wheel = left_encoder_counts * (1 / 508.8) * (math.pi * 72)
+        dist_right_wheel = right_encoder_counts * (1 / 508.8) * (math.pi * 72)
         angle = ((dist_right_wheel - dist_left_wheel) / 235) * 180 / math.pi
         return angle
 
-    def _get_straight_distance(self):
+    def _get_straight_distance(self, snapshot=None):
         """
         Implementation of get_distance is wrong in Roomba firmware. Therefore, angle has to be calculated over other
         sensors. For more information check those links:
@@ -77,31 +113,182 @@ class RobotController(object):
 
         TODO: Firmware update, so this becomes obsolete
         """
-        distance = self.rob.left_encoder_counts * (1 / 508.8) * (math.pi * 72)
+        if snapshot is None:
+            left_encoder_counts = self.rob.left_encoder_counts
+        else:
+            left_encoder_counts = snapshot.left_encoder_counts
+        distance = left_encoder_counts * (1 / 508.8) * (math.pi * 72)
         return distance
 
-    def has_hit_obstacle(self):
+    @staticmethod
+    def _encoder_difference(counts, previous_counts):
+        # encoder counts are signed 16 bit values that roll over
+        return ((counts - previous_counts + 32768) % 65536) - 32768
+
+    def _start_movement(self):
+        self.bump_events = []
+        self._odometry_pose = [0., 0., 0.]
+        self._odometry_encoder_counts = (self.rob.left_encoder_counts, self.rob.right_encoder_counts)
+
+    def _update_odometry(self):
+        """
+        Integrates the wheel encoder counts since the last update into the odometry pose. The robot either spins in
+        place or drives straight between two updates, so the midpoint integration is sufficient.
+        """
+        left_counts = self.rob.left_encoder_counts
+        right_counts = self.rob.right_encoder_counts
+        if self._odometry_encoder_counts is None:
+            self._odometry_encoder_counts = (left_counts, right_counts)
+            return
+
+        dist_left_wheel = self._encoder_difference(left_counts, self._odometry_encoder_counts[0]) * \
+            roboconsts.ROBOT.TICK_TO_DISTANCE
+        dist_right_wheel = self._encoder_difference(right_counts, self._odometry_encoder_counts[1]) * \
+            roboconsts.ROBOT.TICK_TO_DISTANCE
+        self._odometry_encoder_counts = (left_counts, right_counts)
+
+        distance = (dist_left_wheel + dist_right_wheel) / 2
+        delta_heading = (dist_right_wheel - dist_left_wheel) / roboconsts.ROBOT.WHEEL_BASE
+        x, y, heading = self._odometry_pose
+        self._odometry_pose = [x + distance * math.cos(heading + delta_heading / 2),
+                               y + distance * math.sin(heading + delta_heading / 2),
+                               heading + delta_heading]
+
+    def _record_bump_event(self, light_bump=False):
+        self._update_odometry()
+        bd = self._last_bumps_and_wheel_drops
+        x, y, heading = self._odometry_pose
+        self.metrics.inc('light_bump_events' if light_bump else 'bump_events')
+        self.bump_events.append({'time': time.time(),
+                                 'bump_left': bool(bd is not None and bd.bump_left),
+                                 'bump_right': bool(bd is not None and bd.bump_right),
+                                 'light_bump': light_bump,
+                                 'left_encoder_counts': self._odometry_encoder_counts[0],
+                                 'right_encoder_counts': self._odometry_encoder_counts[1],
+                                 'x': x, 'y': y, 'heading': math.degrees(heading)})
+        self.logger.info('Recorded bump event at x={:.0f} mm, y={:.0f} mm and heading={:.1f} degrees relative to the '
+                         'start of the movement.'.format(x, y, math.degrees(heading)))
+
+    def _finish_primitive(self, obstacle_hit, obstacle_ahead, ignore_obstacles):
+        # stop movement
+        self.rob.drive_straight(0)
+
+        if obstacle_hit and not ignore_obstacles:
+            self._record_bump_event()
+        elif obstacle_ahead:
+            self._record_bump_event(light_bump=True)
+        else:
+            self._update_odometry()
+
+    def _handle_sensor_error(self):
+        self.logger.info('There was a problem with determining the sensor state. The robot might have '
+                         'disconnected.')
+        self.metrics.inc('sensor_errors')
+        if self.rob.oi_mode == roboconsts.MODES.OFF:
+            self.logger.info('Robot was turned off, so I will start it again.')
+            self.rob.start()
+        self.rob.oi_mode = roboconsts.MODES.FULL
+
+    def _read_sensor_snapshot(self):
+        """
+        Reads the bump sensors, the wheel encoders and the light bump signals with a single Query List command, so that
+        the control loops only need one serial round trip per iteration.
+        :return: namespace with the sensor values or None, if the sensors could not be read
+        """
         try:
-            bd = self.rob.bumps_and_wheel_drops
-
-            if bd.bump_left:
-                # This sensor seems to fire when the loose plastic part in front of Roomba is hit on left
-                self.logger.info('Left bump sensor activated.')
-                return True
-            elif bd.bump_right:
-                # This sensor seems to fire when the loose plastic part in front of Roomba is hit on right
-                self.logger.info('Right bump sensor activated.')
-                return True
-            else:
-                return False
+            packets = self.rob.read_sensor_list(SENSOR_SNAPSHOT_PACKETS)
         except:
-            self.logger.info('There was a problem with determining the sensor state. The robot might have '
-                             'disconnected.')
-            if self.rob.oi_mode == roboconsts.MODES.OFF:
-                self.logger.info('Robot was turned off, so I will start it again.')
-                self.rob.start()
-            self.rob.oi_mode = roboconsts.MODES.FULL
+            self._handle_sensor_error()
+            return None
+
+        snapshot = types.SimpleNamespace()
+        snapshot.bumps_and_wheel_drops = roboparsers.BumpsAndWheelDrop(packets[0])
+        snapshot.left_encoder_counts = roboparsers.short_response(packets[1])
+        snapshot.right_encoder_counts = roboparsers.short_response(packets[2])
+        snapshot.light_bump_signals = [roboparsers.unsigned_short_response(packet) for packet in packets[3:]]
+        return snapshot
+
+    def has_hit_obstacle(self):
+        return self._has_hit_obstacle(self._read_sensor_snapshot())
+
+    def _has_hit_obstacle(self, snapshot):
+        self._last_bumps_and_wheel_drops = None
+        if snapshot is None:
+            # the sensor state could not be determined, so better assume that there was an obstacle
+            return True
+
+        bd = snapshot.bumps_and_wheel_drops
+        self._last_bumps_and_wheel_drops = bd
+
+        if bd.bump_left:
+            # This sensor seems to fire when the loose plastic part in front of Roomba is hit on left
+            self.logger.info('Left bump sensor activated.')
+            return True
+        elif bd.bump_right:
+            # This sensor seems to fire when the loose plastic part in front of Roomba is hit on right
+            self.logger.info('Right bump sensor activated.')
             return True
+        else:
+            return False
+
+    def _approach_obstacles_slowly(self, snapshot, speed, current_speed, radius=roboconsts.DRIVE.STRAIGHT):
+        """
+        Ramps the driving speed down as the light bump signals rise, i.e., as the robot approaches an obstacle in front
+        of it, so that it can stop before touching the obstacle.
+        :param snapshot: sensor snapshot of the current control loop iteration
+        :param speed: desired speed of the forward movement [in mm/s]
+        :param current_speed: speed that was last sent to the robot [in mm/s]
+        :param radius: radius of the current movement [in mm]
+        :return: the speed that the robot is driving with now [in mm/s], 0 if it has to stop in front of an obstacle
+        """
+        max_signal = max(snapshot.light_bump_signals)
+        if max_signal >= parameters.LIGHT_BUMP_SIGNAL_STOP:
+            self.logger.info('Light bump signal of {} indicates an obstacle right in front of the robot.'
+                             .format(max_signal))
+            return 0
+
+        if max_signal <= parameters.LIGHT_BUMP_SIGNAL_SLOWDOWN:
+            new_speed = speed
+        else:
+            scale = (parameters.LIGHT_BUMP_SIGNAL_STOP - max_signal) / \
+                    (parameters.LIGHT_BUMP_SIGNAL_STOP - parameters.LIGHT_BUMP_SIGNAL_SLOWDOWN)
+            new_speed = int(max(speed * scale, min(parameters.SPEED_APPROACH, speed)))
+
+        # only send a new drive command if the speed changes noticeably, in order to keep the serial traffic low
+        if abs(new_speed - current_speed) >= parameters.SPEED_RAMP_STEP:
+            self.logger.debug('Changing speed to {} mm/s due to a light bump signal of {}.'.format(new_speed,
+                                                                                                 max_signal))
+            self.rob.drive(new_speed, radius)
+            return new_speed
+        return current_speed
+
+    def _wait_until_wheels_stopped(self, timeout=parameters.SETTLE_ENCODER_TIMEOUT):
+        """
+        Waits until the wheel encoders do not change anymore, i.e., until the robot has come to rest after it was
+        stopped. This replaces a fixed waiting time before the robot reverses a movement.
+        :param timeout: maximal waiting time [in seconds]
+        """
+        t_end = time.time() + timeout
+        previous_counts = None
+        n_equal_reads = 0
+        while time.time() < t_end:
+            try:
+                counts = self._get_encoder_counts()
+            except Exception:
+                # without the encoders, the robot is given the whole timeout to come to rest
+                self._handle_sensor_error()
+                time.sleep(max(t_end - time.time(), 0))
+                return
+            if counts == previous_counts:
+                n_equal_reads += 1
+                if n_equal_reads >= parameters.SETTLE_ENCODER_READS:
+                    return
+            else:
+                n_equal_reads = 0
+            previous_counts = counts
+            time.sleep(0.02)
+
+        self.logger.info('Wheels did not come to rest within {} s.'.format(timeout))
 
     def _spin_timed(self, t_interval, speed=parameters.SPEED_SPIN, ignore_obstacles=False):
         """
@@ -133,8 +320,7 @@ class RobotController(object):
                 time_when_hit = time.time() - (t_end - t_interval)
                 break
 
-        # stop movement
-        self.rob.drive_straight(0)
+        self._finish_primitive(obstacle_hit, False, ignore_obstacles)
 
         return (not obstacle_hit), time_when_hit
 
@@ -163,14 +349,15 @@ class RobotController(object):
 
         # keep spinning until angle difference is reached or an obstacle is hit
         # TODO: the angle "measurement" is not really accurate, is there a better way?
-        while abs(self._get_angle() - start_angle) < angle:
-            obstacle_hit = self.has_hit_obstacle()
+        snapshot = self._read_sensor_snapshot()
+        while abs(self._get_angle(snapshot) - start_angle) < angle:
+            obstacle_hit = self._has_hit_obstacle(snapshot)
             if obstacle_hit and not ignore_obstacles:
                 angle_when_hit = abs(self._get_angle() - start_angle)
                 break
+            snapshot = self._read_sensor_snapshot()
 
-        # stop movement
-        self.rob.drive_straight(0)
+        self._finish_primitive(obstacle_hit, False, ignore_obstacles)
 
         return (not obstacle_hit), angle_when_hit
 
@@ -188,23 +375,33 @@ class RobotController(object):
             speed = max(speed, -parameters.SPEED_MOVE)  # limit speed, because there is no backwards wall sensor
 
         obstacle_hit = False
+        obstacle_ahead = False
         time_when_hit = []
 
         t_end = time.time() + t_interval
 
         # start driving with given speed
         self.rob.drive_straight(speed)
+        current_speed = speed
 
         # keep driving for specified time interval or until an obstacle is hit
         while time.time() < t_end:
-            obstacle_hit = self.has_hit_obstacle()
+            snapshot = self._read_sensor_snapshot()
+            obstacle_hit = self._has_hit_obstacle(snapshot)
             if obstacle_hit and not ignore_obstacles:
                 self.logger.debug('Obstacle was hit. Will stop the drive now.')
                 time_when_hit = time.time() - (t_end - t_interval)
                 break
 
-        # stop movement
-        self.rob.drive_straight(0)
+            # the light bumpers only look forward
+            if speed > 0 and not ignore_obstacles:
+                current_speed = self._approach_obstacles_slowly(snapshot, speed, current_speed)
+                if current_speed == 0:
+                    self.logger.debug('Obstacle is right in front of the robot. Will stop the drive now.')
+                    obstacle_ahead = True
+                    break
+
+        self._finish_primitive(obstacle_hit, obstacle_ahead, ignore_obstacles)
 
         return (not obstacle_hit), time_when_hit
 
@@ -222,23 +419,35 @@ class RobotController(object):
             speed = max(speed, -parameters.SPEED_MOVE)  # limit speed to 150, because there is no backwards wall sensor
 
         self.logger.info('Driving straight for {:.3f} m with a speed of {} mm/s.'.format(distance, speed))
+
         obstacle_hit = False
+        obstacle_ahead = False
         distance_when_hit = []
 
         start_distance = self._get_straight_distance()
 
         # start driving with given speed
         self.rob.drive_straight(speed)
+        current_speed = speed
 
         # keep driving until specified distance is reached or until an obstacle is hit
-        while abs(self._get_straight_distance() - start_distance) < distance:
-            obstacle_hit = self.has_hit_obstacle()
+        snapshot = self._read_sensor_snapshot()
+        while abs(self._get_straight_distance(snapshot) - start_distance) < distance:
+            obstacle_hit = self._has_hit_obstacle(snapshot)
             if obstacle_hit and not ignore_obstacles:
                 distance_when_hit = abs(self._get_straight_distance() - start_distance)
                 break
 
-        # stop movement
-        self.rob.drive_straight(0)
+            # the light bumpers only look forward
+            if speed > 0 and not ignore_obstacles:
+                current_speed = self._approach_obstacles_slowly(snapshot, speed, current_speed)
+                if current_speed == 0:
+                    self.logger.debug('Obstacle is right in front of the robot. Will stop the drive now.')
+                    obstacle_ahead = True
+                    break
+            snapshot = self._read_sensor_snapshot()
+
+        self._finish_primitive(obstacle_hit, obstacle_ahead, ignore_obstacles)
 
         return (not obstacle_hit), distance_when_hit
 
@@ -258,26 +467,37 @@ class RobotController(object):
             speed = max(speed, -parameters.SPEED_MOVE)  # limit speed to 150, because there is no backwards wall sensor
 
         obstacle_hit = False
+        obstacle_ahead = False
         time_when_hit = []
 
         t_end = time.time() + t_interval
 
         # start driving on specified circle with specified speed
         self.rob.drive(speed, radius)
+        current_speed = speed
 
         # keep driving for specified time interval or until obstacle is hit
         while time.time() < t_end:
-            obstacle_hit = self.has_hit_obstacle()
+            snapshot = self._read_sensor_snapshot()
+            obstacle_hit = self._has_hit_obstacle(snapshot)
             if obstacle_hit and not ignore_obstacles:
                 time_when_hit = time.time() - (t_end - t_interval)
                 break
 
-        # stop movement
-        self.rob.drive_straight(0)
+            # the light bumpers only look forward
+            if speed > 0 and not ignore_obstacles:
+                current_speed = self._approach_obstacles_slowly(snapshot, speed, current_speed, radius)
+                if current_speed == 0:
+                    obstacle_ahead = True
+                    break
+
+        self._finish_primitive(obstacle_hit, obstacle_ahead, ignore_obstacles)
 
         return (not obstacle_hit), time_when_hit
 
     def move_robot_randomly(self):
+        self._start_movement()
+
         # Determine a random spin time
         random_spin_time = np.random.uniform(parameters.MIN_RAND_SPIN_TIME, parameters.MAX_RAND_SPIN_TIME)
         self.logger.info('Random spin time: {:.3f}'.format(random_spin_time))
@@ -286,7 +506,7 @@ class RobotController(object):
         spin_successful, time_when_hit = self._spin_timed(random_spin_time, parameters.SPEED_SPIN)
 
         if not spin_successful:
-            time.sleep(1)
+            self._wait_until_wheels_stopped()
             self._drive_straight_timed(1, -1 * parameters.SPEED_MOVE, ignore_obstacles=True)
 
         # Determine a random drive time
@@ -297,11 +517,13 @@ class RobotController(object):
         move_successful, time_when_hit = self._drive_straight_timed(random_drive_time, parameters.SPEED_MOVE)
 
         if not move_successful:
-            time.sleep(1)
+            self._wait_until_wheels_stopped()
             time_to_drive_backwards = np.min([3, random_drive_time])
             self._drive_straight_timed(time_to_drive_backwards, -1 * parameters.SPEED_MOVE, ignore_obstacles=True)
 
     def move_robot_straight(self, distance, backwards=False):
+        self._start_movement()
+
         if not backwards:
             self.logger.info('{} m long straight forward movement of the robot was initiated.'.format(distance))
             speed = parameters.SPEED_MOVE
@@ -316,10 +538,12 @@ class RobotController(object):
 
         if not move_successful:
             self.logger.info('Obstacle was hit. Therefore the robot will move back to its original position.')
-            time.sleep(1)
+            self._wait_until_wheels_stopped()
             self._drive_straight_distance(distance_when_hit, -1 * speed, ignore_obstacles=True)
 
     def spin_robot(self, angle, clockwise=False):
+        self._start_movement()
+
         if not clockwise:
             self.logger.info('{} degree counterclockwise spin of robot was initiated.'.format(angle))
             speed_spin = parameters.SPEED_SPIN
@@ -332,7 +556,7 @@ class RobotController(object):
 
         if not move_succesful:
             self.logger.info('Obstacle was hit. Therefore the robot will move back to its original position.')
-            time.sleep(1)
+            self._wait_until_wheels_stopped()
             self._spin_angle(angle_when_hit, -1 * speed_spin, ignore_obstacles=True)
 
     def play_glorienttes_song(self):
@@ -1,11 +1,15 @@
 import socket
 import _socket
+import concurrent.futures
 import re
+import json
 import pathlib
-import threading
 
 import robot_controller as robcon
+import battery_monitor as battery
 import robot_commands as robcmd
+import occupancy_map as occupancy
+import metrics
 
 import sweep_measurement as sweep
 
@@ -21,6 +25,7 @@ class RobotServer(socket.socket):
             self.logger = utils.init_logger('RobotServer')
         else:
             self.logger = utils.get_logger('RobotServer')
+        self.metrics = metrics.get_metrics('RobotServer')
 
         super().__init__(family=family, type=socket_type, *args, **kwargs)
 
@@ -31,6 +36,7 @@ class RobotServer(socket.socket):
             # a robot controller should only be created if the user wishes to init a robot
             if self.init_robot:
                 self.rob = robcon.RobotController()
+                self.battery_monitor = battery.BatteryMonitor(self.rob.rob)
 
             self.sweep_controller = sweep.SweepMeasurement(nfft=parameters.SWEEP_LENGTH * parameters.SWEEP_FS,
                                                            fs=parameters.SWEEP_FS)
@@ -76,13 +82,24 @@ class RobotServer(socket.socket):
                     except ValueError:
                         break
 
-    def acknowledge_action_complete(self):
-        command = robcmd.ACK.encode('utf-8')
-        self.sendall(command)
+            # the RIRs of the last measurement might still be written in the background when the client disconnects
+            self.sweep_controller.wait_for_processing()
+
+            # the counters of the last measurement are sent when the client has finished the session
+            metrics.send_counters()
+            metrics.log_summary(self.logger)
+
+    def acknowledge_action_complete(self, payload=None):
+        command = robcmd.ACK
+        if payload is not None:
+            command += robcmd.ACK_PAYLOAD_SEPARATOR + json.dumps(payload)
+        command += robcmd.ACK_TERMINATOR
+        self.sendall(command.encode('utf-8'))
 
     def process_command(self, data):
         data = data.decode('utf-8')
         self.logger.info('RobotServer received the following command: ' + data)
+        self.metrics.inc('commands')
 
         # split received data into the following parts: (command type: robot or evoke)_(command)_(numerical params)
         regex_obj = re.match(r'([rem])_([\D\d]+)', data)
@@ -92,14 +109,15 @@ class RobotServer(socket.socket):
         self.logger.info('Disassembled the command into the following parts. Command type=\"{}\", '
                          'command=\"{}\".'.format(command_type, command))
 
+        payload = None
         if command_type == robcmd.TYPE_ROBOT:
-            self.process_robot_command(command)
+            payload = self.process_robot_command(command)
         elif command_type == robcmd.TYPE_META:
-            self.process_meta_command(command)
+            payload = self.process_meta_command(command)
         else:
             self.logger.error('The command type \"{}\" is unknown.'.format(command_type))
 
-        self.acknowledge_action_complete()
+        self.acknowledge_action_complete(payload)
 
     def process_robot_command(self, command):
         if not self.init_robot:
@@ -113,7 +131,25 @@ class RobotServer(socket.socket):
 
         if command == robcmd.START:
             self.rob.start_robot()
-        elif command == robcmd.RANDMOVE:
+            return None
+        elif command == robcmd.GLORIENTTES:
+            self.rob.play_glorienttes_song()
+            return None
+        elif command == robcmd.PARK:
+            self.rob.park_robot()
+            return None
+
+        with self.metrics.time(metrics.PHASE_MOVE):
+            self.move_robot(command, param)
+
+        # movements draw the most current, so the battery is sampled after each of them
+        self.battery_monitor.sample(self.sweep_controller.measurement_id)
+
+        # report the bump events of movements to the client, so that it can build an occupancy map of the room
+        return {'bump_events': self.rob.bump_events}
+
+    def move_robot(self, command, param):
+        if command == robcmd.RANDMOVE:
             self.rob.move_robot_randomly()
         elif command == robcmd.STRAIGHTMOVE:
             distance = float(param)
@@ -127,8 +163,6 @@ class RobotServer(socket.socket):
         elif command == robcmd.SPIN_CLOCKWISE:
             angle = int(param)
             self.rob.spin_robot(angle, clockwise=True)
-        elif command == robcmd.GLORIENTTES:
-            self.rob.play_glorienttes_song()
         else:
             self.logger.error('The command \"{}\" is unknown.'.format(command))
             raise ValueError('The command \"{}\" is unknown.'.format(command))
@@ -147,39 +181,67 @@ class RobotServer(socket.socket):
         self.logger.info('Detected the meta command \"{}\".'.format(matched_command))
 
         if matched_command == robcmd.INIT_SESSION:
-            # Get overwrite tag and path for the session folder
-            regex_obj = re.search(r'o_([ft])_([\D\d]+)', command)
-            overwrite = regex_obj.group(1)
-            if overwrite == 't':
-                overwrite = True
-            elif overwrite == 'f':
-                overwrite = False
-            pathname = regex_obj.group(2)
-
-            self.logger.info('\"{}\" has the following parameters: overwrite={}, '
-                             'pathname={}'.format(matched_command, overwrite, pathname))
-
-            self.init_session(pathname, overwrite)
+            # Get overwrite and resume tags and path for the session folder
+            regex_obj = re.search(r'o_([ft])_r_([ft])_([\D\d]+)', command)
+            overwrite = regex_obj.group(1) == 't'
+            resume = regex_obj.group(2) == 't'
+            pathname = regex_obj.group(3)
+
+            self.logger.info('\"{}\" has the following parameters: overwrite={}, resume={}, '
+                             'pathname={}'.format(matched_command, overwrite, resume, pathname))
+
+            self.init_session(pathname, overwrite, resume)
         elif matched_command == robcmd.SET_MEASUREMENT_ID:
             pattern = r'({})_(\d+)'.format(robcmd.SET_MEASUREMENT_ID)
             regex_obj = re.search(pattern, command)
 
             measurement_id = int(regex_obj.group(2))
             self.sweep_controller.set_measurement_id(measurement_id)
+
+            if self.init_robot:
+                self.battery_monitor.sample(measurement_id, measurement_start=True)
+                self.save_battery_telemetry()
+
+                battery_status = self.battery_monitor.get_status()
+                if battery_status is not None and battery_status['reachable']:
+                    self.metrics.set_gauge('battery_charge', battery_status['charge'])
         elif matched_command == robcmd.MEASURE:
             self.sweep_controller.conduct_measurement(playback=True)
         elif matched_command == robcmd.PLAYBACK_SWEEP:
             self.sweep_controller.play_sweep()
         elif matched_command == robcmd.START_RECORDING:
-            self.sweep_controller.set_sweep_playback_complete(False)
-            t_recording = threading.Thread(target=self.sweep_controller.record_until_stopped)
-            t_recording.start()
+            self.sweep_controller.start_recording()
             time.sleep(0.5)
         elif matched_command == robcmd.STOP_RECORDING:
-            self.sweep_controller.set_sweep_playback_complete(True)
-            self.sweep_controller.blockwiserecording2rirs()
+            # with a pipelined measurement cycle, the stop is acknowledged as soon as the recording is complete and the
+            # RIRs are deconvolved and written while the robots move to their next positions
+            self.sweep_controller.stop_recording(process_in_background=parameters.PIPELINE_MEASUREMENTS)
+        elif matched_command == robcmd.WAIT_PROCESSING:
+            self.sweep_controller.wait_for_processing()
+        elif matched_command == robcmd.BATTERY_STATUS:
+            if not self.init_robot:
+                return {'battery': None}
+
+            self.battery_monitor.sample(self.sweep_controller.measurement_id)
+            return {'battery': self.battery_monitor.get_status()}
+        elif matched_command == robcmd.CALIBRATION_FACTOR:
+            # the calibration factor is set by the conversion of the first recording
+            self.sweep_controller.wait_for_processing()
+            return {'calibration_factor': self.sweep_controller.calibration_factor}
+        elif matched_command == robcmd.SET_CALIBRATION_FACTOR:
+            pattern = r'({})_([\d.eE+-]+)'.format(robcmd.SET_CALIBRATION_FACTOR)
+            regex_obj = re.search(pattern, command)
 
-    def init_session(self, session_name, overwrite):
+            self.sweep_controller.set_calibration_factor(float(regex_obj.group(2)))
+
+    def save_battery_telemetry(self):
+        if not self.sweep_controller.session_path:
+            return
+
+        filename = pathlib.Path(self.sweep_controller.session_path, 'battery_telemetry.csv')
+        self.battery_monitor.save(filename)
+
+    def init_session(self, session_name, overwrite, resume=False):
         session_path = pathlib.Path('..', '..', 'measurements', session_name)
         session_path_str = str(session_path)
         try:
@@ -196,10 +258,11 @@ class RobotServer(socket.socket):
             # whether the directory shall be overwritten
             if overwrite:
                 session_path.mkdir(exist_ok=True, parents=True)
-                self.logger.warning('Overwriting the session directory \"{}\" on the '
-                                    'RaspberryPi'.format(session_path_str))
+                self.logger.warning('{} the session directory \"{}\" on the '
+                                    'RaspberryPi'.format('Resuming' if resume else 'Overwriting', session_path_str))
 
-                self.sweep_controller.set_session_path(session_path_str)
+                # the RIRs of a resumed session are kept, the ones of an overwritten session are measured again
+                self.sweep_controller.set_session_path(session_path_str, overwrite=not resume)
             else:
                 self.logger.error('The user specified that no data shall be overwritten. Therefore, the script will '
                                   'exit now.')
@@ -232,23 +295,27 @@ class RobotClient(socket.socket):
         command = command.encode('utf-8')
 
         self.sendall(command)
-        self._wait_for_ack()
+        return self._wait_for_ack()
 
     def _wait_for_ack(self):
+        data = ''
         while True:
-            data = self.recv(1024)
-
-            data = data.decode('utf-8')
+            chunk = self.recv(1024)
+            if not chunk:
+                raise ConnectionError('The RobotServer closed the connection before acknowledging the command.')
+            data += chunk.decode('utf-8')
 
             # waiting is finished as soon as server acknowledges that requested action is done
-            if data == robcmd.ACK:
+            if data.endswith(robcmd.ACK_TERMINATOR):
                 break
 
-    def init_session(self, session_name, overwrite=False):
-        if overwrite:
-            command_params = 'o_t_{}'.format(session_name)
-        else:
-            command_params = 'o_f_{}'.format(session_name)
+        data = data[:-len(robcmd.ACK_TERMINATOR)]
+        if data.startswith(robcmd.ACK + robcmd.ACK_PAYLOAD_SEPARATOR):
+            return json.loads(data[len(robcmd.ACK + robcmd.ACK_PAYLOAD_SEPARATOR):])
+        return None
+
+    def init_session(self, session_name, overwrite=False, resume=False):
+        command_params = 'o_{}_r_{}_{}'.format('t' if overwrite else 'f', 't' if resume else 'f', session_name)
 
         command = '{}_{}'.format(robcmd.INIT_SESSION, command_params)
         self._send_command(command, robcmd.TYPE_META)
@@ -278,22 +345,99 @@ class RobotClient(socket.socket):
     def init_robot(self):
         self._send_command(robcmd.START, robcmd.TYPE_ROBOT)
 
+    def park(self):
+        self._send_command(robcmd.PARK, robcmd.TYPE_ROBOT)
+
+    def get_battery_status(self):
+        """
+        :return: battery status of the robot as returned by BatteryMonitor.get_status or None, if the robot is not
+        initialized
+        """
+        response = self._send_command(robcmd.BATTERY_STATUS, robcmd.TYPE_META)
+        return response['battery']
+
+    def get_calibration_factor(self):
+        response = self._send_command(robcmd.CALIBRATION_FACTOR, robcmd.TYPE_META)
+        return response['calibration_factor']
+
+    def set_calibration_factor(self, calibration_factor):
+        command = '{}_{!r}'.format(robcmd.SET_CALIBRATION_FACTOR, float(calibration_factor))
+        self._send_command(command, robcmd.TYPE_META)
+
+    def wait_for_processing(self):
+        """
+        Blocks until the receiver has written the RIRs of all recordings, which are converted in the background if
+        PIPELINE_MEASUREMENTS is enabled.
+        """
+        if self.robot_type == parameters.ROBOT_TYPE_RECEIVER:
+            self._send_command(robcmd.WAIT_PROCESSING, robcmd.TYPE_META)
+        else:
+            self.logger.error('You have to call wait for processing on the receiver robot.')
+
     def move_randomly(self):
-        self._send_command(robcmd.RANDMOVE, robcmd.TYPE_ROBOT)
+        response = self._send_command(robcmd.RANDMOVE, robcmd.TYPE_ROBOT)
+        return response['bump_events']
 
     def move_straight(self, distance):
         distance = float(round(distance, 2))
         if distance > 0:
-            self._send_command(robcmd.STRAIGHTMOVE + str(distance), robcmd.TYPE_ROBOT)
+            response = self._send_command(robcmd.STRAIGHTMOVE + str(distance), robcmd.TYPE_ROBOT)
         else:
-            self._send_command(robcmd.STRAIGHTMOVE_BACKWARDS + str(abs(distance)), robcmd.TYPE_ROBOT)
+            response = self._send_command(robcmd.STRAIGHTMOVE_BACKWARDS + str(abs(distance)), robcmd.TYPE_ROBOT)
+        return response['bump_events']
 
     def spin(self, angle):
         angle = int(round(angle))
         if angle > 0:
-            self._send_command(robcmd.SPIN + str(angle), robcmd.TYPE_ROBOT)
+            response = self._send_command(robcmd.SPIN + str(angle), robcmd.TYPE_ROBOT)
         else:
-            self._send_command(robcmd.SPIN_CLOCKWISE + str(abs(angle)), robcmd.TYPE_ROBOT)
+            response = self._send_command(robcmd.SPIN_CLOCKWISE + str(abs(angle)), robcmd.TYPE_ROBOT)
+        return response['bump_events']
+
+    def move_avoiding_obstacles(self, occupancy_map, tracked_position, avoid_positions=()):
+        """
+        Plans a random movement on the client that avoids the known obstacles of the occupancy map and executes it as
+        a spin followed by a straight movement. All bump events of the movement are added to the occupancy map.
+
+        :param occupancy_map: occupancy map of the room
+        :param tracked_position: current position of this robot as returned by PositionTracker.measure_positions
+        :param avoid_positions: (x, y) map positions of other robots, which are avoided, but not added to the map
+        """
+        planned_move = self.plan_move(occupancy_map, tracked_position, avoid_positions)
+        for start_pose, bump_event in self.execute_move(planned_move):
+            occupancy_map.add_bump_event(start_pose, bump_event, avoid_positions)
+
+    def plan_move(self, occupancy_map, tracked_position, avoid_positions=()):
+        """
+        Plans a random movement like move_avoiding_obstacles without executing it, e.g., to move several robots at the
+        same time.
+
+        :return: start pose on the map, spin angle [in degrees] and drive distance [in m]
+        """
+        start_pose = occupancy.tracked_pose_to_map_pose(tracked_position)
+        spin_angle, distance = occupancy_map.plan_random_move(start_pose, avoid_positions)
+        self.logger.info('Planned a spin of {:.1f} degrees followed by a {:.2f} m long straight movement.'
+                         .format(spin_angle, distance))
+        return start_pose, spin_angle, distance
+
+    def execute_move(self, planned_move):
+        """
+        Executes a movement of plan_move as a spin followed by a straight movement. The occupancy map is not changed, so
+        that the movements of several robots can be executed in parallel threads.
+
+        :return: list of the bump events of the movement together with the map poses at which their odometry starts
+        """
+        start_pose, spin_angle, distance = planned_move
+
+        bump_events = []
+        if int(round(spin_angle)) != 0:
+            bump_events += [(start_pose, bump_event) for bump_event in self.spin(spin_angle)]
+
+        # the straight movement starts after the spin, so its odometry has to be related to the new heading
+        drive_start_pose = (start_pose[0], start_pose[1], start_pose[2] + spin_angle)
+        if round(distance, 2) > 0:
+            bump_events += [(drive_start_pose, bump_event) for bump_event in self.move_straight(distance)]
+        return bump_events
 
     def play_song(self):
         self._send_command(robcmd.GLORIENTTES, robcmd.TYPE_ROBOT)
@@ -301,3 +445,51 @@ class RobotClient(socket.socket):
     def measure(self):
         time.sleep(1)
         self._send_command(robcmd.MEASURE, robcmd.TYPE_ROBOT)
+
+
+def call_in_parallel(*functions):
+    """
+    Calls the functions in parallel threads, e.g., to send commands to several robots at the same time, and waits until
+    all of them have returned.
+
+    :return: list with the return values of the functions
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(functions)) as executor:
+        futures = [executor.submit(function) for function in functions]
+        return [future.result() for future in futures]
+
+
+def move_robots_avoiding_obstacles(robots, occupancy_map, tracked_positions, in_parallel=True):
+    """
+    Plans random movements of several robots that avoid the known obstacles of the occupancy map and each other, and
+    executes them. The movements are planned one after the other: every robot avoids the current positions of the
+    robots that are planned after it and the whole paths of the robots that were planned before it, so that the robots
+    can move at the same time without crossing their paths.
+
+    :param robots: RobotClients of the robots
+    :param tracked_positions: current positions of the robots as returned by PositionTracker.measure_positions
+    :param in_parallel: if True, all robots move at the same time, otherwise one after the other
+    """
+    start_positions = [occupancy.tracked_pose_to_map_pose(tracked_position)[0:2]
+                       for tracked_position in tracked_positions]
+    planned_moves = []
+    paths = []
+    for robot_idx, (robot, tracked_position) in enumerate(zip(robots, tracked_positions)):
+        avoid_positions = [position for path in paths for position in path] + start_positions[robot_idx + 1:]
+        planned_move = robot.plan_move(occupancy_map, tracked_position, avoid_positions)
+        planned_moves.append(planned_move)
+        paths.append(occupancy.get_move_path(*planned_move))
+
+    move_functions = [lambda robot=robot, planned_move=planned_move: robot.execute_move(planned_move)
+                      for robot, planned_move in zip(robots, planned_moves)]
+    if in_parallel:
+        bump_events = call_in_parallel(*move_functions)
+    else:
+        bump_events = [move_function() for move_function in move_functions]
+
+    # the other robots might have been anywhere on their paths, so bumps close to these paths are not added to the map
+    for robot_idx, robot_bump_events in enumerate(bump_events):
+        other_positions = [position for path_idx, path in enumerate(paths) if path_idx != robot_idx
+                           for position in path]
+        for start_pose, bump_event in robot_bump_events:
+            occupancy_map.add_bump_event(start_pose, bump_event, other_positions)
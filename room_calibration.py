@@ -0,0 +1,128 @@
+import pathlib
+import numpy as np
+
+import measurement_params as params
+import measurement_utils as utils
+
+
+class RoomCalibrationError(Exception):
+    pass
+
+
+def solve_rigid_transform(source_points, target_points):
+    """
+    Solves the rotation and translation that map the source points onto the target points in the least-squares sense
+    with the Kabsch algorithm, i.e., from the singular value decomposition of the cross-covariance matrix.
+
+    :param source_points: array of shape (N, 3) with N >= 3 points that are not collinear
+    :param target_points: array of shape (N, 3)
+    :return: rotation matrix of shape (3, 3) and translation of shape (3,), such that target = rotation @ source +
+    translation
+    """
+    source_points = np.asarray(source_points, dtype=float)
+    target_points = np.asarray(target_points, dtype=float)
+    source_centroid = np.mean(source_points, axis=0)
+    target_centroid = np.mean(target_points, axis=0)
+
+    covariance = (source_points - source_centroid).T @ (target_points - target_centroid)
+    u, singular_values, vt = np.linalg.svd(covariance)
+    if singular_values[1] < 1e-6 * singular_values[0]:
+        raise RoomCalibrationError('The reference points are collinear, so the rotation is ambiguous.')
+
+    # flip the axis of the smallest singular value if the solution would be a reflection
+    d = np.sign(np.linalg.det(vt.T @ u.T))
+    rotation = vt.T @ np.diag([1, 1, d]) @ u.T
+    translation = target_centroid - rotation @ source_centroid
+    return rotation, translation
+
+
+def tracked_positions_to_universe(positions):
+    """
+    Reverts the axis swap of poses_to_positions, i.e., converts tracked positions back into coordinates of the
+    standing tracking universe, where the y-axis points upwards.
+    """
+    return np.asarray(positions, dtype=float)[..., [0, 2, 1]]
+
+
+class RoomCalibration(object):
+    """
+    Rigid transform from the standing tracking universe of the HTC Vive into the room coordinate system. The room
+    coordinate system is right-handed with the z-axis pointing upwards, and it is defined by reference points with known
+    room coordinates, at which the trackers were placed.
+    """
+    def __init__(self, rotation, translation, room_name=params.ROOM_NAME, rms_error=None):
+        self.logger = utils.get_logger('RoomCalibration')
+
+        self.room_name = room_name
+        self.rotation = np.asarray(rotation, dtype=float)
+        self.translation = np.asarray(translation, dtype=float)
+        self.rms_error = rms_error
+
+    @classmethod
+    def from_reference_points(cls, tracked_positions, room_points, room_name=params.ROOM_NAME):
+        """
+        :param tracked_positions: positions of the tracker at the reference points as returned by
+        PositionTracker.measure_positions without a calibration, array of shape (N, 3) [in m]
+        :param room_points: room coordinates of the reference points, array of shape (N, 3) [in m]
+        """
+        universe_points = tracked_positions_to_universe(tracked_positions)
+        rotation, translation = solve_rigid_transform(universe_points, room_points)
+
+        residuals = universe_points @ rotation.T + translation - np.asarray(room_points, dtype=float)
+        rms_error = float(np.sqrt(np.mean(np.sum(residuals ** 2, axis=1))))
+
+        calibration = cls(rotation, translation, room_name=room_name, rms_error=rms_error)
+        calibration.logger.info('Calibrated the room coordinate system from {} reference points with an RMS error of '
+                                '{:.1f} mm.'.format(len(universe_points), 1000 * rms_error))
+        return calibration
+
+    def apply(self, poses):
+        """
+        Transforms stacked 3x4 pose matrices of the tracking universe into the room coordinate system, including their
+        orientations.
+
+        :param poses: array of shape (..., 3, 4)
+        :return: array of the same shape with room poses, i.e., the rotations of the trackers relative to the room axes
+        in the first three columns and the room coordinates of the trackers in the last column
+        """
+        poses = np.asarray(poses, dtype=float)
+        room_poses = self.rotation @ poses
+        room_poses[..., 3] += self.translation
+        return room_poses
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as data:
+            calibration = cls(data['rotation'], data['translation'], room_name=str(data['room_name']),
+                              rms_error=float(data['rms_error']))
+        calibration.logger.info('Loaded the calibration of room \"{}\" from \"{}\".'.format(calibration.room_name,
+                                                                                           filename))
+        return calibration
+
+    @classmethod
+    def load_for_room(cls, room_name=params.ROOM_NAME):
+        """
+        :return: the calibration of the room or None, if the room has not been calibrated yet
+        """
+        filename = cls.get_room_filename(room_name)
+        if filename.exists():
+            return cls.load(str(filename))
+        return None
+
+    @staticmethod
+    def get_room_filename(room_name):
+        return pathlib.Path('..', '..', 'measurements', 'rooms', '{}_room_calibration.npz'.format(room_name))
+
+    def save(self, filename):
+        np.savez(filename, room_name=self.room_name, rotation=self.rotation, translation=self.translation,
+                 rms_error=np.nan if self.rms_error is None else self.rms_error)
+
+    def save_for_room(self):
+        room_filename = self.get_room_filename(self.room_name)
+        room_filename.parent.mkdir(parents=True, exist_ok=True)
+        self.save(str(room_filename))
+
+    def save_with_session(self, session_name):
+        session_filename = pathlib.Path('..', '..', 'measurements', session_name,
+                                        '{}_room_calibration.npz'.format(session_name))
+        self.save(str(session_filename))
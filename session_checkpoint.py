@@ -0,0 +1,67 @@
+import json
+import os
+import pathlib
+import time
+
+
+def get_checkpoint_filename(session_name):
+    return pathlib.Path('..', '..', 'measurements', session_name, '{}_checkpoint.json'.format(session_name))
+
+
+class SessionCheckpoint(object):
+    """
+    State of the measurement loop after the last completed measurement, from which an interrupted session can be
+    resumed: the calibration factor of the receiver, which was set from the first measurement, the serial numbers of the
+    trackers per robot and the map poses of the robots at the last measurement, which are needed for the traversals of
+    the occupancy map.
+    """
+    def __init__(self, session_name, last_measurement_id=0, calibration_factor=None, tracker_serials=None,
+                 map_poses=None):
+        self.session_name = session_name
+        self.last_measurement_id = last_measurement_id
+        self.calibration_factor = calibration_factor
+        self.tracker_serials = dict(tracker_serials) if tracker_serials is not None else {}
+        self.map_poses = dict(map_poses) if map_poses is not None else {}
+        self.timestamp = None
+
+    @property
+    def next_measurement_id(self):
+        return self.last_measurement_id + 1
+
+    def update(self, measurement_id, calibration_factor, tracker_serials, map_poses):
+        self.last_measurement_id = measurement_id
+        self.calibration_factor = calibration_factor
+        self.tracker_serials = dict(tracker_serials)
+        self.map_poses = {robot_type: None if map_pose is None else [float(value) for value in map_pose]
+                          for robot_type, map_pose in map_poses.items()}
+
+    def save(self):
+        """
+        Replaces the checkpoint file atomically, so that a crash while saving leaves the previous checkpoint intact.
+        """
+        self.timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())
+        filename = get_checkpoint_filename(self.session_name)
+        tmp_filename = filename.with_name(filename.name + '.tmp')
+        with open(str(tmp_filename), 'w') as checkpoint_file:
+            json.dump({'session_name': self.session_name, 'last_measurement_id': self.last_measurement_id,
+                       'calibration_factor': self.calibration_factor, 'tracker_serials': self.tracker_serials,
+                       'map_poses': self.map_poses, 'timestamp': self.timestamp}, checkpoint_file, indent=2)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(str(tmp_filename), str(filename))
+
+    @classmethod
+    def load(cls, session_name):
+        """
+        :return: the checkpoint of the session or None, if no measurement of the session has been completed yet
+        """
+        filename = get_checkpoint_filename(session_name)
+        if not filename.exists():
+            return None
+
+        with open(str(filename)) as checkpoint_file:
+            data = json.load(checkpoint_file)
+        checkpoint = cls(session_name, data['last_measurement_id'], data['calibration_factor'],
+                         data['tracker_serials'], data['map_poses'])
+        checkpoint.timestamp = data['timestamp']
+        return checkpoint
@@ -0,0 +1,140 @@
+import csv
+import os
+import pathlib
+import time
+import numpy as np
+
+import measurement_params as parameters
+
+
+ROBOT_LABELS = {parameters.ROBOT_TYPE_RECEIVER: 'Receiver', parameters.ROBOT_TYPE_SOURCE: 'Source'}
+
+POSITION_AXES = ['X', 'Y', 'Z']
+ORIENTATION_ANGLES = ['Yaw', 'Pitch', 'Roll']
+
+
+def get_metadata_filename(session_name):
+    return pathlib.Path('..', '..', 'measurements', session_name, '{}_metadata.csv'.format(session_name))
+
+
+def get_robot_columns(robot_type):
+    """
+    :return: names and dtypes of the metadata columns of one robot
+    """
+    label = ROBOT_LABELS.get(robot_type, robot_type)
+    columns = [('Position_{}_{}'.format(axis, label), 'float64') for axis in POSITION_AXES]
+    columns += [('Orientation_{}_{}'.format(angle, label), 'float64') for angle in ORIENTATION_ANGLES]
+    columns += [('Position_Std_{}_{}'.format(axis, label), 'float64') for axis in POSITION_AXES]
+    columns += [('Orientation_Std_{}_{}'.format(angle, label), 'float64') for angle in ORIENTATION_ANGLES]
+    columns += [('N_Samples_{}'.format(label), 'int64'), ('Standard_Error_{}'.format(label), 'float64')]
+    return columns
+
+
+def get_columns(robot_types=(parameters.ROBOT_TYPE_RECEIVER, parameters.ROBOT_TYPE_SOURCE)):
+    columns = [('Measurement_ID', 'int64'), ('Timestamp', 'datetime64[ns]'), ('Room_Frame', 'bool'),
+               ('Tracking_Duration', 'float64')]
+    for robot_type in robot_types:
+        columns += get_robot_columns(robot_type)
+    return columns
+
+
+class MetadataWriter(object):
+    """
+    Appends one row per measurement to the metadata CSV of a session. Rows are written as they come, so the cost of a
+    measurement does not grow with the session length, and the file is synced to the disk every fsync_interval rows, so
+    that a crash loses at most these rows.
+    """
+    def __init__(self, session_name, robot_types=(parameters.ROBOT_TYPE_RECEIVER, parameters.ROBOT_TYPE_SOURCE),
+                 fsync_interval=parameters.METADATA_FSYNC_INTERVAL):
+        self.filename = get_metadata_filename(session_name)
+        self.robot_types = list(robot_types)
+        self.columns = [name for name, _ in get_columns(self.robot_types)]
+        self.fsync_interval = fsync_interval
+
+        # the header is only written to new files, so that a session can be continued
+        write_header = not self.filename.exists() or self.filename.stat().st_size == 0
+        self._file = open(str(self.filename), 'a', newline='')
+        self._writer = csv.writer(self._file)
+        if write_header:
+            self._writer.writerow(self.columns)
+            self._sync()
+        self._n_unsynced_rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add_measurement(self, measurement_id, localtime_obj, tracked_positions, tracking_duration=np.nan):
+        """
+        :param localtime_obj: time of the measurement as returned by get_current_localtime_obj
+        :param tracked_positions: dictionary with the tracked positions as returned by PositionTracker.measure_positions
+        per robot type
+        :param tracking_duration: time that the position measurement took [in seconds]
+        """
+        room_frame = all(getattr(tracked_positions[robot_type], 'room_frame', False)
+                         for robot_type in self.robot_types)
+        row = [measurement_id, time.strftime('%Y-%m-%d %H:%M:%S', localtime_obj), room_frame, tracking_duration]
+        for robot_type in self.robot_types:
+            tracked_position = tracked_positions[robot_type]
+            row += list(tracked_position.position) + list(tracked_position.orientation)
+            row += list(tracked_position.position_std) + list(tracked_position.orientation_std)
+            row += [tracked_position.n_samples, tracked_position.standard_error]
+
+        self._writer.writerow([float(value) if isinstance(value, np.floating) else value for value in row])
+
+        self._n_unsynced_rows += 1
+        if self._n_unsynced_rows >= self.fsync_interval:
+            self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._n_unsynced_rows = 0
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._sync()
+        self._file.close()
+
+
+def truncate_metadata(session_name, last_measurement_id):
+    """
+    Removes the rows of measurements after the last completed one, which were written before the session was
+    interrupted, so that a resumed session does not contain duplicate rows.
+    """
+    filename = get_metadata_filename(session_name)
+    if not filename.exists():
+        return
+
+    with open(str(filename), newline='') as metadata_file:
+        rows = list(csv.reader(metadata_file))
+    kept_rows = rows[:1] + [row for row in rows[1:] if row and int(row[0]) <= last_measurement_id]
+    if len(kept_rows) == len(rows):
+        return
+
+    tmp_filename = filename.with_name(filename.name + '.tmp')
+    with open(str(tmp_filename), 'w', newline='') as metadata_file:
+        csv.writer(metadata_file).writerows(kept_rows)
+        metadata_file.flush()
+        os.fsync(metadata_file.fileno())
+    os.replace(str(tmp_filename), str(filename))
+
+
+def load_metadata(filename):
+    """
+    Loads a metadata CSV that was written by the MetadataWriter into a DataFrame with typed columns.
+    """
+    import pandas as pd
+
+    header = pd.read_csv(filename, nrows=0).columns
+    robot_labels = [column[len('N_Samples_'):] for column in header if column.startswith('N_Samples_')]
+    label_types = {label: robot_type for robot_type, label in ROBOT_LABELS.items()}
+    dtypes = dict(get_columns([label_types.get(label, label) for label in robot_labels]))
+
+    timestamp_dtype = dtypes.pop('Timestamp')
+    frame = pd.read_csv(filename, dtype=dtypes, parse_dates=['Timestamp'], engine='c')
+    frame['Timestamp'] = frame['Timestamp'].astype(timestamp_dtype)
+    return frame
@@ -0,0 +1,297 @@
+import csv
+import json
+import os
+import pathlib
+import re
+import numpy as np
+
+import session_metadata as metadata
+
+import measurement_params as parameters
+
+
+MANIFEST_FILENAME = 'manifest.json'
+INDEX_FILENAME = 'index.csv'
+RIR_FILENAME_PATTERN = re.compile(r'(\d{5})_(\d{4})_(\d{2})_(\d{2})_(\d{2})_(\d{2})_(\d{2})_RIRs\.wav$')
+
+
+class SessionStoreError(Exception):
+    pass
+
+
+def get_store_path(session_path):
+    return pathlib.Path(session_path, 'rir_store')
+
+
+class SessionStore(object):
+    """
+    Stores the RIRs of a session as one (measurement x samples x channels) float32 array, which is split into chunks of
+    .npy files that are memory-mapped. A JSON manifest keeps the shape of the array, and an append-only CSV index keeps
+    the measurement ID, timestamp and length of every row, so RIRs can be appended during the session without
+    rewriting the manifest and a measurement is found without scanning the directory. A replaced measurement is appended
+    to the index again and its last entry is valid. Metadata columns are stored alongside as one .npy file per column,
+    in the same order as the RIRs.
+    """
+    def __init__(self, path, n_samples=None, n_channels=None, fs=parameters.SWEEP_FS,
+                 chunk_size=parameters.SESSION_STORE_CHUNK_SIZE):
+        """
+        Opens the store at the given path or creates a new one, if n_samples and n_channels are given.
+
+        :param n_samples: number of samples per RIR, shorter RIRs are padded with zeros
+        :param n_channels: number of channels per RIR
+        :param chunk_size: number of measurements per chunk file
+        """
+        self.path = pathlib.Path(path)
+        self._chunks = {}
+
+        manifest_path = self.path / MANIFEST_FILENAME
+        if manifest_path.exists():
+            with open(str(manifest_path)) as manifest_file:
+                self.manifest = json.load(manifest_file)
+        elif n_samples is not None and n_channels is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.manifest = {'fs': fs, 'n_samples': n_samples, 'n_channels': n_channels, 'chunk_size': chunk_size,
+                             'metadata_columns': []}
+            self._write_manifest()
+        else:
+            raise SessionStoreError('There is no session store at \"{}\".'.format(self.path))
+
+        self._rows = {}
+        self._measurement_ids = []
+        self._timestamps = []
+        self._lengths = []
+        self._read_index()
+
+    def __len__(self):
+        return len(self._measurement_ids)
+
+    def __contains__(self, measurement_id):
+        return measurement_id in self._rows
+
+    def __getitem__(self, measurement_id):
+        return self.get_rirs(measurement_id)
+
+    @property
+    def fs(self):
+        return self.manifest['fs']
+
+    @property
+    def measurement_ids(self):
+        return np.array(self._measurement_ids, dtype=np.int64)
+
+    def _write_manifest(self):
+        # the manifest is replaced atomically, so that it is never left half written
+        tmp_path = self.path / (MANIFEST_FILENAME + '.tmp')
+        with open(str(tmp_path), 'w') as manifest_file:
+            json.dump(self.manifest, manifest_file)
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+        os.replace(str(tmp_path), str(self.path / MANIFEST_FILENAME))
+
+    def _read_index(self):
+        index_path = self.path / INDEX_FILENAME
+        if not index_path.exists():
+            return
+
+        with open(str(index_path), 'r+b') as index_file:
+            content = index_file.read()
+            # a line that was interrupted while writing it is removed, so that the next entry starts on a new line
+            end = content.rfind(b'\n') + 1
+            if end < len(content):
+                index_file.truncate(end)
+
+        for measurement_id, timestamp, length in csv.reader(content[:end].decode().splitlines()):
+            self._set_row(int(measurement_id), timestamp or None, int(length))
+
+    def _set_row(self, measurement_id, timestamp, length):
+        row = self._rows.get(measurement_id)
+        if row is None:
+            row = len(self)
+            self._rows[measurement_id] = row
+            self._measurement_ids.append(measurement_id)
+            self._timestamps.append(timestamp)
+            self._lengths.append(length)
+        else:
+            self._timestamps[row] = timestamp
+            self._lengths[row] = length
+
+    def _write_index_entry(self, measurement_id, timestamp, length):
+        # the RIRs are flushed before, so that every entry of the index refers to complete RIRs
+        with open(str(self.path / INDEX_FILENAME), 'a', newline='') as index_file:
+            csv.writer(index_file, lineterminator='\n').writerow([measurement_id, timestamp or '', length])
+            index_file.flush()
+            os.fsync(index_file.fileno())
+        self._set_row(measurement_id, timestamp, length)
+
+    def _get_chunk(self, chunk_idx, writable=False):
+        chunk_path = self.path / 'rirs_{:05}.npy'.format(chunk_idx)
+        chunk = self._chunks.get(chunk_idx)
+        if chunk is not None and (not writable or chunk.mode == 'r+'):
+            return chunk
+
+        if chunk_path.exists():
+            chunk = np.load(str(chunk_path), mmap_mode='r+' if writable else 'r')
+        elif writable:
+            chunk = np.lib.format.open_memmap(str(chunk_path), mode='w+', dtype=np.float32,
+                                              shape=(self.manifest['chunk_size'], self.manifest['n_samples'],
+                                                     self.manifest['n_channels']))
+        else:
+            raise SessionStoreError('The chunk file \"{}\" is missing.'.format(chunk_path))
+        self._chunks[chunk_idx] = chunk
+        return chunk
+
+    def append(self, measurement_id, rirs, timestamp=None):
+        """
+        :param rirs: array of shape (samples, channels)
+        :param timestamp: time of the measurement, e.g., a pandas Timestamp or a string like '2020-01-31 12:00:00'
+        """
+        if measurement_id in self._rows:
+            raise SessionStoreError('The RIRs of measurement {} are already stored.'.format(measurement_id))
+        if rirs.shape[1] != self.manifest['n_channels']:
+            raise SessionStoreError('The RIRs have {} channels, but the store has {}.'
+                                    .format(rirs.shape[1], self.manifest['n_channels']))
+
+        length = self._write_row(len(self), rirs)
+        self._write_index_entry(int(measurement_id), None if timestamp is None else str(timestamp), length)
+
+    def replace(self, measurement_id, rirs, timestamp=None):
+        """
+        Overwrites the RIRs of a stored measurement, e.g., when a resumed session repeats an interrupted measurement.
+        """
+        if measurement_id not in self._rows:
+            raise SessionStoreError('There are no RIRs of measurement {}.'.format(measurement_id))
+        if rirs.shape[1] != self.manifest['n_channels']:
+            raise SessionStoreError('The RIRs have {} channels, but the store has {}.'
+                                    .format(rirs.shape[1], self.manifest['n_channels']))
+
+        length = self._write_row(self._rows[measurement_id], rirs)
+        self._write_index_entry(int(measurement_id), None if timestamp is None else str(timestamp), length)
+
+    def _write_row(self, row, rirs):
+        chunk = self._get_chunk(row // self.manifest['chunk_size'], writable=True)
+        length = min(len(rirs), self.manifest['n_samples'])
+        chunk[row % self.manifest['chunk_size'], :length] = rirs[:length]
+        chunk[row % self.manifest['chunk_size'], length:] = 0
+        chunk.flush()
+        return length
+
+    def get_rirs(self, measurement_id):
+        """
+        :return: read-only memory-mapped view of the RIRs of the measurement with shape (samples, channels)
+        """
+        try:
+            row = self._rows[measurement_id]
+        except KeyError:
+            raise SessionStoreError('There are no RIRs of measurement {}.'.format(measurement_id)) from None
+
+        chunk = self._get_chunk(row // self.manifest['chunk_size'])
+        return chunk[row % self.manifest['chunk_size'], :self._lengths[row]]
+
+    def get_rirs_array(self, measurement_ids=None):
+        """
+        :return: array of shape (measurements, samples, channels) with the RIRs of the given measurements, by default of
+        all measurements in the order of the store
+        """
+        if measurement_ids is None:
+            measurement_ids = self._measurement_ids
+
+        rirs = np.zeros((len(measurement_ids), self.manifest['n_samples'], self.manifest['n_channels']),
+                        dtype=np.float32)
+        for i, measurement_id in enumerate(measurement_ids):
+            measurement_rirs = self.get_rirs(measurement_id)
+            rirs[i, :len(measurement_rirs)] = measurement_rirs
+        return rirs
+
+    def set_metadata(self, frame):
+        """
+        Stores the columns of a metadata frame, whose rows are matched with the RIRs by their Measurement_ID. Rows of
+        measurements without RIRs are dropped, missing rows are filled with NaN.
+        """
+        frame = frame.set_index('Measurement_ID').reindex(self._measurement_ids)
+        metadata_path = self.path / 'metadata'
+        metadata_path.mkdir(exist_ok=True)
+        for column in frame.columns:
+            values = frame[column].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            np.save(str(metadata_path / '{}.npy'.format(column)), values)
+
+        self.manifest['metadata_columns'] = list(frame.columns)
+        self._write_manifest()
+
+    def get_metadata(self, columns=None):
+        """
+        :return: DataFrame with the stored metadata columns in the order of the RIRs
+        """
+        import pandas as pd
+
+        if columns is None:
+            columns = self.manifest['metadata_columns']
+
+        metadata_path = self.path / 'metadata'
+        frame = pd.DataFrame({column: np.load(str(metadata_path / '{}.npy'.format(column)), mmap_mode='r')
+                              for column in columns})
+        frame.insert(0, 'Measurement_ID', self.measurement_ids)
+        return frame
+
+
+def _load_legacy_metadata(filename):
+    """
+    Loads a metadata CSV of older sessions, where positions and orientations were stored as stringified arrays, and
+    flattens these into the columns of the MetadataWriter.
+    """
+    import pandas as pd
+
+    frame = pd.read_csv(filename, parse_dates=['Timestamp'])
+    for label in ['Receiver', 'Source']:
+        for quantity, components in [('Position', metadata.POSITION_AXES),
+                                     ('Orientation', metadata.ORIENTATION_ANGLES)]:
+            column = '{}_{}'.format(quantity, label)
+            if column not in frame:
+                continue
+            values = np.stack([np.array(value.strip('[]').split(), dtype=float) for value in frame.pop(column)])
+            for i, component in enumerate(components):
+                frame['{}_{}_{}'.format(quantity, component, label)] = values[:, i]
+    return frame
+
+
+def convert_session(session_path, metadata_filename=None):
+    """
+    Converts a session directory with individual RIR wav files into a SessionStore, including the metadata CSV of the
+    session, if there is one.
+
+    :return: the SessionStore
+    """
+    # pandas and the wav reader are only needed for the conversion on the measurement laptop, not on the RaspberryPi
+    import pandas as pd
+    import scipy.io.wavfile as wav
+
+    session_path = pathlib.Path(session_path)
+    rir_files = []
+    for rir_file in session_path.iterdir():
+        match = RIR_FILENAME_PATTERN.match(rir_file.name)
+        if match is not None:
+            measurement_id = int(match.group(1))
+            timestamp = pd.Timestamp(*[int(group) for group in match.groups()[1:]])
+            rir_files.append((measurement_id, timestamp, rir_file))
+    if not rir_files:
+        raise SessionStoreError('There are no RIR files in \"{}\".'.format(session_path))
+    rir_files.sort()
+
+    fs, rirs = wav.read(str(rir_files[0][2]))
+    store = SessionStore(get_store_path(session_path), n_samples=parameters.MAX_RIR_LENGTH * fs,
+                         n_channels=rirs.shape[1], fs=fs)
+    for measurement_id, timestamp, rir_file in rir_files:
+        if measurement_id not in store:
+            _, rirs = wav.read(str(rir_file))
+            store.append(measurement_id, rirs.astype(np.float32), timestamp)
+
+    if metadata_filename is None:
+        metadata_filename = session_path / '{}_metadata.csv'.format(session_path.name)
+    if pathlib.Path(metadata_filename).exists():
+        frame = pd.read_csv(metadata_filename, nrows=0)
+        if 'Position_Receiver' in frame.columns:
+            store.set_metadata(_load_legacy_metadata(metadata_filename))
+        else:
+            store.set_metadata(metadata.load_metadata(metadata_filename))
+    return store
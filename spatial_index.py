@@ -0,0 +1,160 @@
+import pickle
+import numpy as np
+import scipy.spatial as spatial
+
+import session_metadata as metadata
+import session_store
+
+import measurement_params as parameters
+import measurement_utils as utils
+
+
+SPACES = ['receiver', 'source', 'joint']
+INDEX_FILENAME = 'spatial_index.pkl'
+
+
+class SpatialIndexError(Exception):
+    pass
+
+
+def get_position_columns(robot_type):
+    label = metadata.ROBOT_LABELS[robot_type]
+    return ['Position_{}_{}'.format(axis, label) for axis in metadata.POSITION_AXES]
+
+
+class QueryResult(object):
+    """
+    Measurements that were found by a query of the SpatialIndex, sorted by their distance to the query point. The RIRs
+    are only read from the session store when they are accessed.
+    """
+    def __init__(self, store, measurement_ids, distances, receiver_positions, source_positions):
+        self.store = store
+        self.measurement_ids = measurement_ids
+        self.distances = distances
+        self.receiver_positions = receiver_positions
+        self.source_positions = source_positions
+
+    def __len__(self):
+        return len(self.measurement_ids)
+
+    def __iter__(self):
+        """
+        :return: iterator over the measurement IDs and the memory-mapped RIRs of the found measurements
+        """
+        for measurement_id in self.measurement_ids:
+            yield measurement_id, self.store.get_rirs(measurement_id)
+
+    def get_rirs(self, i):
+        return self.store.get_rirs(self.measurement_ids[i])
+
+    def get_rirs_array(self):
+        return self.store.get_rirs_array(self.measurement_ids)
+
+
+class SpatialIndex(object):
+    """
+    KD-trees over the tracked positions of a session store, which answer radius, nearest neighbor and box queries over
+    the receiver positions, the source positions or the joint 6-D source/receiver configurations. The trees are cached
+    in the session store and rebuilt when measurements or metadata were added.
+    """
+    def __init__(self, store):
+        """
+        :param store: SessionStore with metadata or the path of one
+        """
+        self.logger = utils.get_logger('SpatialIndex')
+
+        if not isinstance(store, session_store.SessionStore):
+            store = session_store.SessionStore(store)
+        self.store = store
+
+        columns = get_position_columns(parameters.ROBOT_TYPE_RECEIVER) + \
+            get_position_columns(parameters.ROBOT_TYPE_SOURCE)
+        missing_columns = [column for column in columns if column not in store.manifest['metadata_columns']]
+        if missing_columns:
+            self.logger.error('The session store has no metadata columns {}.'.format(missing_columns))
+            raise SpatialIndexError('The session store has no metadata columns {}.'.format(missing_columns))
+
+        frame = store.get_metadata(columns)
+        positions = frame[columns].to_numpy(dtype=float)
+        self.measurement_ids = frame['Measurement_ID'].to_numpy()
+        self.receiver_positions = positions[:, :3]
+        self.source_positions = positions[:, 3:]
+
+        # measurements without valid positions, e.g., without a metadata row, are not indexed
+        self.points = {'receiver': self.receiver_positions, 'source': self.source_positions, 'joint': positions}
+        self.rows = {space: np.flatnonzero(np.all(np.isfinite(points), axis=1))
+                     for space, points in self.points.items()}
+        self.trees = self._load_or_build_trees()
+
+    def _load_or_build_trees(self):
+        index_path = self.store.path / INDEX_FILENAME
+        if index_path.exists():
+            with open(str(index_path), 'rb') as index_file:
+                cache = pickle.load(index_file)
+            if np.array_equal(cache['measurement_ids'], self.measurement_ids) and \
+                    all(np.array_equal(cache['points'][space], self.points[space]) for space in SPACES):
+                return cache['trees']
+            self.logger.info('The session store changed since the spatial index was cached, rebuilding it.')
+
+        trees = {space: spatial.cKDTree(self.points[space][self.rows[space]]) for space in SPACES}
+        with open(str(index_path), 'wb') as index_file:
+            pickle.dump({'measurement_ids': self.measurement_ids, 'points': self.points, 'trees': trees}, index_file)
+        self.logger.info('Built the spatial index over {} measurements.'.format(len(self.rows['joint'])))
+        return trees
+
+    def _get_query_point(self, point, space):
+        if space not in SPACES:
+            raise ValueError('Unknown space \"{}\". Must be one of {}.'.format(space, SPACES))
+
+        point = np.asarray(point, dtype=float)
+        if point.shape != (self.points[space].shape[1],):
+            raise ValueError('The query point of the {} space must have {} coordinates.'
+                             .format(space, self.points[space].shape[1]))
+        return point
+
+    def _get_result(self, space, tree_rows, distances):
+        order = np.argsort(distances, kind='stable')
+        rows = self.rows[space][np.asarray(tree_rows, dtype=int)[order]]
+        return QueryResult(self.store, self.measurement_ids[rows], np.asarray(distances)[order],
+                           self.receiver_positions[rows], self.source_positions[rows])
+
+    def query_radius(self, point, radius, space='receiver'):
+        """
+        :param point: query position [in m], 3 coordinates for the receiver and source space or the receiver position
+        followed by the source position for the joint space
+        :param radius: maximum euclidean distance to the query point [in m]
+        """
+        point = self._get_query_point(point, space)
+        tree = self.trees[space]
+        tree_rows = np.asarray(tree.query_ball_point(point, radius), dtype=int)
+        distances = np.linalg.norm(tree.data[tree_rows] - point, axis=1)
+        return self._get_result(space, tree_rows, distances)
+
+    def query_nearest(self, point, k=1, space='joint'):
+        """
+        :return: the k measurements that are closest to the query point, fewer if the session has less measurements
+        """
+        point = self._get_query_point(point, space)
+        tree = self.trees[space]
+        k = min(k, tree.n)
+        if k == 0:
+            return self._get_result(space, [], [])
+
+        distances, tree_rows = tree.query(point, k=k)
+        return self._get_result(space, np.atleast_1d(tree_rows), np.atleast_1d(distances))
+
+    def query_box(self, lower, upper, space='receiver'):
+        """
+        :return: the measurements with lower <= position <= upper in all coordinates, sorted by their distance to the
+        center of the box
+        """
+        lower = self._get_query_point(lower, space)
+        upper = self._get_query_point(upper, space)
+        center = (lower + upper) / 2
+
+        # the ball of the maximum norm around the center contains the box, the candidates are then cut to the box
+        tree = self.trees[space]
+        tree_rows = np.asarray(tree.query_ball_point(center, np.max(upper - center), p=np.inf), dtype=int)
+        tree_rows = tree_rows[np.all((tree.data[tree_rows] >= lower) & (tree.data[tree_rows] <= upper), axis=1)]
+        distances = np.linalg.norm(tree.data[tree_rows] - center, axis=1)
+        return self._get_result(space, tree_rows, distances)
@@ -1,11 +1,13 @@
 import numpy as np
-import scipy.signal as sig
-import matplotlib.pyplot as plt
 import sounddevice as sd
-import scipy.io.wavfile as wav
 import pathlib
 import queue
+import shutil
 import threading
+import time
+
+import metrics
+import session_store
 
 import measurement_utils as utils
 import measurement_params as parameters
@@ -15,20 +17,33 @@ class SweepMeasurementError(Exception):
     pass
 
 
+def get_sweep_cache_filename(nfft, fs, fstart, fstop, timew, amplw, end_delay):
+    return pathlib.Path('..', '..', 'measurements', 'cache',
+                        'sweep_{}_{}_{}_{}_{}_{}_{}.npz'.format(nfft, fs, fstart, fstop, timew, amplw, end_delay))
+
+
 class SweepMeasurement(object):
     def __init__(self, nfft, fs=48000, fstart=10, fstop=24000, timew=0, amplw=0, end_delay=0.4):
         self.logger = utils.init_logger('SweepMeasurement')
+        self.metrics = metrics.get_metrics('SweepMeasurement')
 
         self.fs = fs
         self.session_path = ''
+        self.session_store = None
 
         self.measurement_id = None
 
         self.recording_lock = threading.Lock()
         self.recording_blocks = []
+        self.recording_thread = None
         self.sweep_playback_complete = False
 
-        sweep, deconv_filter, nsweep, pre_delay, post_delay = self.init_sweep(nfft, fstart, fstop, timew, amplw,
+        # recordings that are converted into RIRs in the background, in the order of their measurements
+        self.processing_queue = queue.Queue()
+        self.processing_thread = None
+        self.processing_error = None
+
+        sweep, deconv_filter, nsweep, pre_delay, post_delay = self.load_sweep(nfft, fstart, fstop, timew, amplw,
                                                                               end_delay)
         self.sweep = sweep
         self.deconv_filter = deconv_filter
@@ -38,14 +53,52 @@ class SweepMeasurement(object):
 
         self.calibration_factor = 1
 
-    def set_session_path(self, session_path):
+    def load_sweep(self, nfft, fstart=10, fstop=24000, timew=0, amplw=0, end_delay=0.4):
+        """
+        Loads the sweep and its deconvolution filter from the cache, so that they are only computed once per set of
+        sweep parameters. The cache file of the parameters is created on the first call, delete it if init_sweep
+        changes.
+        """
+        cache_filename = get_sweep_cache_filename(nfft, self.fs, fstart, fstop, timew, amplw, end_delay)
+        if parameters.SWEEP_CACHE_ENABLED and cache_filename.exists():
+            with np.load(str(cache_filename)) as data:
+                self.logger.info('Loaded the sweep from "{}".'.format(cache_filename))
+                return data['sweep'], data['deconv_filter'], int(data['nsweep']), int(data['pre_delay']), \
+                    int(data['post_delay'])
+
+        sweep, deconv_filter, nsweep, pre_delay, post_delay = self.init_sweep(nfft, fstart, fstop, timew, amplw,
+                                                                              end_delay)
+        if parameters.SWEEP_CACHE_ENABLED:
+            cache_filename.parent.mkdir(parents=True, exist_ok=True)
+            np.savez(str(cache_filename), sweep=sweep, deconv_filter=deconv_filter, nsweep=nsweep,
+                     pre_delay=pre_delay, post_delay=post_delay)
+            self.logger.info('Saved the sweep to "{}".'.format(cache_filename))
+        return sweep, deconv_filter, nsweep, pre_delay, post_delay
+
+    def set_session_path(self, session_path, overwrite=False):
+        """
+        :param overwrite: if True, the session store of a previous run of the session is deleted, like the metadata and
+        the trajectories of an overwritten session
+        """
         self.session_path = session_path
+        self.session_store = None
+
+        store_path = session_store.get_store_path(session_path)
+        if overwrite and store_path.exists():
+            shutil.rmtree(str(store_path))
+            self.logger.warning('Deleted the session store \"{}\" of the previous run.'.format(store_path))
         self.logger.info('Set the session path for the sweep recordings to \"{}\"'.format(session_path))
 
     def set_measurement_id(self, measurement_id):
         self.measurement_id = measurement_id
+        metrics.set_measurement_id(measurement_id)
         self.logger.info('Set the measurement ID to \"{}\".'.format(measurement_id))
 
+    def set_calibration_factor(self, calibration_factor):
+        # a resumed session continues with the calibration factor of its first measurement
+        self.calibration_factor = calibration_factor
+        self.logger.info('Set calibration factor to {}.'.format(calibration_factor))
+
     def set_sweep_playback_complete(self, sweep_playback_complete):
         self.sweep_playback_complete = sweep_playback_complete
         self.logger.info('Switched the sweep_playback_complete flag to {}'.format(sweep_playback_complete))
@@ -67,7 +120,8 @@ class SweepMeasurement(object):
 
         try:
             self.logger.info('Playing back sweep now.')
-            sd.play(self.sweep, samplerate=self.fs, device=devices[1], blocking=True)
+            with self.metrics.time('playback'):
+                sd.play(self.sweep, samplerate=self.fs, device=devices[1], blocking=True)
             self.logger.info('Sweep playback ended.')
         except ValueError as e:
             self.logger.error('The sweep playback was not successful, because there was a problem with the sound '
@@ -96,6 +150,7 @@ class SweepMeasurement(object):
         """
         if status:
             self.logger.info(status)
+            self.metrics.inc('stream_status_flags')
 
         # block is added to the recording
         with self.recording_lock:
@@ -106,17 +161,70 @@ class SweepMeasurement(object):
 
         self.recording_blocks = []
 
-        with sd.InputStream(samplerate=self.fs, device=devices[0], channels=4, callback=self.recording_callback):
+        with self.metrics.time(metrics.PHASE_RECORD), \
+                sd.InputStream(samplerate=self.fs, device=devices[0], channels=4, callback=self.recording_callback):
             self.logger.info('Starting to record.')
             while not self.sweep_playback_complete:
                 # do nothing, because the callback function does the work. we just have to wait until the sweep has
-                # played entirely
-                pass
+                # played entirely. The short sleep leaves the CPU to the conversion of the previous recording.
+                time.sleep(0.001)
 
         self.logger.info('Recording finished.')
 
+    def start_recording(self):
+        self.set_sweep_playback_complete(False)
+        self.recording_thread = threading.Thread(target=self.record_until_stopped)
+        self.recording_thread.start()
+
+    def stop_recording(self, process_in_background=False):
+        """
+        Stops the recording of start_recording and converts it into RIRs.
+
+        :param process_in_background: if True, the recording is only queued for the conversion, so that the robots can
+        already move to their next positions while the RIRs are deconvolved and written, see wait_for_processing
+        """
+        self.set_sweep_playback_complete(True)
+        if self.recording_thread is not None:
+            self.recording_thread.join()
+            self.recording_thread = None
+
+        recording = self.get_blockwise_recording()
+        if not process_in_background:
+            self.recording2rirs(recording)
+            return
+
+        if self.processing_thread is None:
+            self.processing_thread = threading.Thread(target=self._processing_loop, name='RecordingProcessing',
+                                                      daemon=True)
+            self.processing_thread.start()
+        self.processing_queue.put((recording, self.measurement_id))
+        self.logger.info('Queued the recording of measurement {} for the conversion into RIRs.'
+                         .format(self.measurement_id))
+
+    def _processing_loop(self):
+        while True:
+            recording, measurement_id = self.processing_queue.get()
+            try:
+                self.recording2rirs(recording, measurement_id)
+            except BaseException as e:
+                # e.g. the SystemExit of a clipping recording is raised again by wait_for_processing on the server
+                self.processing_error = e
+            finally:
+                self.processing_queue.task_done()
+
+    def wait_for_processing(self):
+        """
+        Blocks until all recordings that were queued by stop_recording are converted into RIRs and raises the error of
+        a failed conversion.
+        """
+        self.processing_queue.join()
+        if self.processing_error is not None:
+            error, self.processing_error = self.processing_error, None
+            raise error
+
     def conduct_measurement(self, playback=False):
         devices = self.get_audio_devices()
+        t_record = time.perf_counter()
         try:
             if playback:
                 # simultaneous playback and recording (only possible when both input and output device are operated by
@@ -134,25 +242,37 @@ class SweepMeasurement(object):
             raise SweepMeasurementError('The measurement was not successful, because there was a problem with the '
                                         'sound device. Maybe check the sound-device names with sd.query_devices() and '
                                         'adjust them in the measurement parameters.') from e
+        self.metrics.observe(metrics.PHASE_RECORD, time.perf_counter() - t_record)
 
         self.recording2rirs(recording)
 
     def blockwiserecording2rirs(self):
-        recording = np.concatenate(self.recording_blocks, axis=0)
+        self.recording2rirs(self.get_blockwise_recording())
+
+    def get_blockwise_recording(self):
+        with self.recording_lock:
+            recording = np.concatenate(self.recording_blocks, axis=0)
 
         # pad the recording to an integer number of seconds (fft runs faster for lengths of power of 2 and apparently
         # in numpy also for multiples of 48000, which seemed to be even faster than for 'normal' even numbers?)
         n_secs = int(np.floor(len(recording)/48000))
         recording = np.append(recording, np.zeros(((n_secs+1)*48000-len(recording), 4)), 0)
         self.logger.info('Converted block-wise recording to a single recording with shape {}.'.format(recording.shape))
-        self.recording2rirs(recording)
+        return recording
+
+    def recording2rirs(self, recording, measurement_id=None):
+        """
+        :param measurement_id: ID of the measurement of the recording, by default the current measurement ID. Recordings
+        that are converted in the background keep the ID that was set when they were recorded.
+        """
+        if measurement_id is None:
+            measurement_id = self.measurement_id
 
-    def recording2rirs(self, recording):
         # The first measurement should be conducted from positions exhibiting the smallest possible distance between
         # source and receiver. From this measurement, the microphone recordings are normalized such that their amplitude
         # is at most 0.9 when an amplitude as high as the maximum amplitude of the first measurement is obtained. This
         # effectively ensures a high level of the recordings and it should prevent clipping
-        if self.measurement_id == 1:
+        if measurement_id == 1:
             max_val_recording = np.max(np.abs(recording))
             if max_val_recording == 1:
                 self.logger.error('The recording seems to clip. Please reduce the gain of the microphone.')
@@ -168,32 +288,63 @@ class SweepMeasurement(object):
                                 'Clipping may occur.')
 
         # Deconvolve sweep for all channels
+        t_deconvolve = time.perf_counter()
         rirs = np.zeros_like(recording)
         for cIdx, channel in enumerate(recording.T):
             self.logger.info('Deconvolving RIR {}.'.format(cIdx))
             # window the fluctuations before and after the actual sweep
-            w = sig.windows.hann(2 * self.pre_delay)
+            w = np.hanning(2 * self.pre_delay)
             channel[0:self.pre_delay] = channel[0:self.pre_delay] * w[0:self.pre_delay]
-            w = sig.windows.hann(2 * self.post_delay)
+            w = np.hanning(2 * self.post_delay)
             channel[-self.post_delay:None] = channel[-self.post_delay:None] * w[self.post_delay:None]
 
             # deconvolve
             rirs[:, cIdx] = self.deconvolve_sweep(channel)
         self.logger.info('RIRs deconvolved.')
+        self.metrics.observe(metrics.PHASE_DECONVOLVE, time.perf_counter() - t_deconvolve,
+                             measurement_id=measurement_id)
 
         # Cut RIRs to maximal length
         rirs = rirs[:parameters.MAX_RIR_LENGTH * self.fs, :]
 
-        # Save to wav file
+        # Save to wav file. The wav writer is imported here, because scipy.io delays the startup of the RobotServer.
+        import scipy.io.wavfile as wav
+
+        t_write = time.perf_counter()
         year, month, day = utils.get_current_date()
         hour, minute, second = utils.get_current_time()
-        filename = '{:05}_{}_{:02}_{:02}_{:02}_{:02}_{:02}_RIRs.wav'.format(self.measurement_id, year, month, day,
+        filename = '{:05}_{}_{:02}_{:02}_{:02}_{:02}_{:02}_RIRs.wav'.format(measurement_id, year, month, day,
                                                                             hour, minute, second)
         path = str(pathlib.Path(self.session_path, filename))
         rec_path = str(pathlib.Path(self.session_path, 'rec_' + filename))
         wav.write(rec_path, self.fs, recording)
         wav.write(path, self.fs, rirs)
 
+        if parameters.SESSION_STORE_ENABLED:
+            timestamp = '{}-{:02}-{:02} {:02}:{:02}:{:02}'.format(year, month, day, hour, minute, second)
+            self.append_to_session_store(rirs, timestamp, measurement_id)
+        self.metrics.observe(metrics.PHASE_WRITE, time.perf_counter() - t_write, measurement_id=measurement_id)
+
+    def append_to_session_store(self, rirs, timestamp, measurement_id=None):
+        if measurement_id is None:
+            measurement_id = self.measurement_id
+
+        if self.session_store is None:
+            store_path = session_store.get_store_path(self.session_path)
+            try:
+                self.session_store = session_store.SessionStore(store_path)
+            except session_store.SessionStoreError:
+                self.session_store = session_store.SessionStore(store_path,
+                                                                n_samples=parameters.MAX_RIR_LENGTH * self.fs,
+                                                                n_channels=rirs.shape[1], fs=self.fs)
+
+        if measurement_id in self.session_store:
+            self.logger.warning('Replacing the RIRs of measurement {} in the session store, which were measured before '
+                                'the session was resumed.'.format(measurement_id))
+            self.session_store.replace(measurement_id, rirs.astype(np.float32), timestamp)
+        else:
+            self.session_store.append(measurement_id, rirs.astype(np.float32), timestamp)
+
     def init_sweep(self, nfft, fstart=10, fstop=24000, timew=0, amplw=0, end_delay=0.4):
         """
         Original MATLAB-based code by Juha Merimaa, 2003.
@@ -218,6 +369,8 @@ class SweepMeasurement(object):
         :return: s: sweep, H: deconvolution filter, nsweep: number of samples in sweep, pre_delay: delay before sweep,
         post_delay: delay after sweep
         """
+        import scipy.signal as sig
+
         if self.fs != 48000 and fstop == 24000:
             fstop = self.fs / 2
 
@@ -0,0 +1,288 @@
+import bisect
+import threading
+import time
+import numpy as np
+
+import trajectory_log
+
+import measurement_params as params
+import measurement_utils as utils
+
+try:
+    import openvr
+except ImportError:  # the replay and synthetic backends also work without the OpenVR bindings
+    openvr = None
+
+
+class TrackingBackend(object):
+    """
+    Interface between the PositionTracker and the source of the tracker poses.
+    """
+    def get_poses(self, device_indices):
+        """
+        :param device_indices: indices of the requested devices
+        :return: pose matrices of shape (N, 3, 4) in the standing tracking universe and two boolean arrays of shape (N,)
+        that tell whether the poses are valid and whether the devices are connected
+        """
+        raise NotImplementedError
+
+    def get_connected_trackers(self):
+        """
+        :return: indices of all connected devices that are trackers
+        """
+        raise NotImplementedError
+
+    def get_tracker_index(self, tracker_type):
+        """
+        :return: device index of the tracker of the given robot type, if the backend knows it, otherwise None
+        """
+        return None
+
+    def get_serial_number(self, device_idx):
+        raise NotImplementedError
+
+    def poll_device_events(self):
+        """
+        :return: True if devices were activated or deactivated since the last call, so the device indices might have
+        changed
+        """
+        return False
+
+    def shutdown(self):
+        pass
+
+
+class OpenVRBackend(TrackingBackend):
+    def __init__(self):
+        self.logger = utils.get_logger('OpenVRBackend')
+
+        if openvr is None:
+            self.logger.error('The OpenVR bindings are not installed.')
+            raise ImportError('The OpenVR bindings are not installed.')
+
+        try:
+            openvr.init(openvr.VRApplication_Other)
+        except openvr.error_code.InitError:
+            self.logger.error('Could not init OpenVR. Please make sure that the Link box and HMD is connected and the '
+                              'Link box is powered on.')
+            raise
+        self.logger.info('Successfully initialized OpenVR for the position tracking.')
+
+        # get the VR System, that is an object to access all connected VR devices
+        self.vr_system = openvr.VRSystem()
+
+    def get_poses(self, device_indices):
+        # only the devices up to the highest requested index are requested from OpenVR instead of all 64
+        device_poses = self.vr_system.getDeviceToAbsoluteTrackingPose(openvr.TrackingUniverseStanding, 0,
+                                                                      max(device_indices) + 1)
+
+        poses = np.empty((len(device_indices), 3, 4))
+        pose_is_valid = np.empty(len(device_indices), dtype=bool)
+        device_is_connected = np.empty(len(device_indices), dtype=bool)
+        for i, device_idx in enumerate(device_indices):
+            device_pose = device_poses[device_idx]
+            poses[i] = np.ctypeslib.as_array(device_pose.mDeviceToAbsoluteTracking.m)
+            pose_is_valid[i] = device_pose.bPoseIsValid
+            device_is_connected[i] = device_pose.bDeviceIsConnected
+        return poses, pose_is_valid, device_is_connected
+
+    def get_connected_trackers(self):
+        device_poses = self.vr_system.getDeviceToAbsoluteTrackingPose(openvr.TrackingUniverseStanding, 0,
+                                                                      openvr.k_unMaxTrackedDeviceCount)
+        return [i for i in range(openvr.k_unMaxTrackedDeviceCount) if device_poses[i].bDeviceIsConnected and
+                self.vr_system.getTrackedDeviceClass(i) == openvr.TrackedDeviceClass_GenericTracker]
+
+    def get_serial_number(self, device_idx):
+        return self.vr_system.getStringTrackedDeviceProperty(device_idx, openvr.Prop_SerialNumber_String)
+
+    def poll_device_events(self):
+        event = openvr.VREvent_t()
+        devices_changed = False
+        while self.vr_system.pollNextEvent(event):
+            if event.eventType in [openvr.VREvent_TrackedDeviceActivated, openvr.VREvent_TrackedDeviceDeactivated]:
+                devices_changed = True
+        return devices_changed
+
+    def shutdown(self):
+        openvr.shutdown()
+
+
+class ReplayBackend(TrackingBackend):
+    """
+    Serves the poses of a trajectory file that was recorded by the PoseSampler. The poses are replayed in real time,
+    i.e., every request returns the recorded sample that corresponds to the time since the backend was created.
+    """
+    def __init__(self, filename, speed=1, loop=True):
+        """
+        :param speed: factor by which the replay is faster than the recording
+        :param loop: restart the replay at the end of the recording, otherwise the last sample is held
+        """
+        self.logger = utils.get_logger('ReplayBackend')
+
+        self.reader = trajectory_log.TrajectoryReader(filename)
+        if len(self.reader) == 0:
+            self.logger.error('The trajectory file \"{}\" is empty.'.format(filename))
+            raise ValueError('The trajectory file \"{}\" is empty.'.format(filename))
+
+        self.records = self.reader.records
+        self.timestamps = self.records['timestamp']
+        self.speed = speed
+        self.loop = loop
+
+        # the first record of every tracker type tells the device index of the tracker
+        self.tracker_indices = {}
+        for tracker_type, tracker_idx in zip(*np.unique(self.records['tracker_type'], return_index=True)):
+            self.tracker_indices[tracker_type.decode('ascii')] = int(self.records['tracker_index'][tracker_idx])
+
+        self.t_start = time.time()
+        self.logger.info('Replaying {} records of the trackers {} from \"{}\".'
+                         .format(len(self.records), sorted(self.tracker_indices), filename))
+
+    def _get_replay_timestamp(self):
+        t_recording_start = self.timestamps[0]
+        duration = self.timestamps[-1] - t_recording_start
+        t_elapsed = (time.time() - self.t_start) * self.speed
+        if self.loop and duration > 0:
+            t_elapsed %= duration
+        return t_recording_start + min(t_elapsed, duration)
+
+    def get_poses(self, device_indices):
+        # all records of a sampling instant share the timestamp and are stored next to each other
+        end = bisect.bisect_right(self.timestamps, self._get_replay_timestamp())
+        start = bisect.bisect_left(self.timestamps, self.timestamps[end - 1])
+        records = self.records[start:end]
+
+        poses = np.full((len(device_indices), 3, 4), np.nan)
+        pose_is_valid = np.zeros(len(device_indices), dtype=bool)
+        device_is_connected = np.zeros(len(device_indices), dtype=bool)
+        for i, device_idx in enumerate(device_indices):
+            matches = np.flatnonzero(records['tracker_index'] == device_idx)
+            if len(matches) > 0:
+                record = records[matches[0]]
+                poses[i] = record['pose']
+                pose_is_valid[i] = record['pose_is_valid']
+                device_is_connected[i] = record['device_is_connected']
+        return poses, pose_is_valid, device_is_connected
+
+    def get_connected_trackers(self):
+        return sorted(self.tracker_indices.values())
+
+    def get_tracker_index(self, tracker_type):
+        return self.tracker_indices.get(tracker_type)
+
+    def get_serial_number(self, device_idx):
+        return 'REPLAY-{}'.format(device_idx)
+
+
+class SyntheticBackend(TrackingBackend):
+    """
+    Generates noisy tracker poses of robots that move on the floor. The robot poses come from pose sources, e.g., the
+    pose of a Create2Simulator, or from a kinematic model of a differential drive robot, which can be steered with
+    set_velocities.
+    """
+    def __init__(self, pose_sources=None, position_noise=params.TRACKING_SYNTHETIC_NOISE,
+                 tracker_height=params.TRACKING_SYNTHETIC_HEIGHT):
+        """
+        :param pose_sources: dictionary of callables per tracker type, which return the map pose of the robot, i.e.,
+        x [in mm], y [in mm] and heading [in degrees]. By default, a kinematic model is used for the receiver and the
+        source robot.
+        :param position_noise: standard deviation of the tracked positions [in m]
+        :param tracker_height: height of the trackers above the origin of the tracking universe [in m]
+        """
+        self.logger = utils.get_logger('SyntheticBackend')
+
+        if pose_sources is None:
+            pose_sources = {params.ROBOT_TYPE_RECEIVER: KinematicRobotModel(pose=(-500, 0, 0)).get_pose,
+                            params.ROBOT_TYPE_SOURCE: KinematicRobotModel(pose=(500, 0, 180)).get_pose}
+        self.pose_sources = pose_sources
+        self.position_noise = position_noise
+        self.tracker_height = tracker_height
+
+        # device index 0 is the HMD in OpenVR, so the trackers start at index 1
+        self.tracker_indices = {tracker_type: idx + 1 for idx, tracker_type in enumerate(pose_sources)}
+        self._tracker_types = {idx: tracker_type for tracker_type, idx in self.tracker_indices.items()}
+        self._rng = np.random.default_rng()
+
+    def get_poses(self, device_indices):
+        poses = np.full((len(device_indices), 3, 4), np.nan)
+        pose_is_valid = np.zeros(len(device_indices), dtype=bool)
+        for i, device_idx in enumerate(device_indices):
+            if device_idx in self._tracker_types:
+                x, y, heading = self.pose_sources[self._tracker_types[device_idx]]()
+                poses[i] = self.map_pose_to_universe(x / 1000, y / 1000, heading)
+                pose_is_valid[i] = True
+
+        poses[:, :, 3] += self._rng.normal(scale=self.position_noise, size=(len(device_indices), 3))
+        return poses, pose_is_valid, pose_is_valid.copy()
+
+    def map_pose_to_universe(self, x, y, heading):
+        """
+        Inverts tracked_pose_to_map_pose of the occupancy map: map x is universe x, map y is the negative universe z and
+        the heading is a rotation around the vertical y-axis of the universe.
+        """
+        heading = np.deg2rad(heading - params.TRACKER_HEADING_OFFSET)
+        c, s = np.cos(heading), np.sin(heading)
+        return np.array([[c, 0, s, x],
+                         [0, 1, 0, self.tracker_height],
+                         [-s, 0, c, -y]])
+
+    def get_connected_trackers(self):
+        return sorted(self.tracker_indices.values())
+
+    def get_tracker_index(self, tracker_type):
+        return self.tracker_indices.get(tracker_type)
+
+    def get_serial_number(self, device_idx):
+        return 'SYNTHETIC-{}'.format(device_idx)
+
+
+class KinematicRobotModel(object):
+    """
+    Integrates the pose of a differential drive robot from its linear and angular velocity.
+    """
+    def __init__(self, pose=(0, 0, 0)):
+        """
+        :param pose: x [in mm], y [in mm] and heading [in degrees]
+        """
+        self.pose = np.array(pose, dtype=float)
+        self.velocity = 0.  # mm/s
+        self.angular_velocity = 0.  # degrees/s
+        self._t_last = time.time()
+
+        # the pose is integrated by the sampler thread, while the velocities are set by the caller
+        self._lock = threading.Lock()
+
+    def set_velocities(self, velocity, angular_velocity):
+        with self._lock:
+            self._integrate()
+            self.velocity = velocity
+            self.angular_velocity = angular_velocity
+
+    def get_pose(self):
+        with self._lock:
+            self._integrate()
+            return tuple(self.pose)
+
+    def _integrate(self):
+        t = time.time()
+        dt = t - self._t_last
+        self._t_last = t
+
+        heading = np.deg2rad(self.pose[2])
+        self.pose[0] += self.velocity * dt * np.cos(heading)
+        self.pose[1] += self.velocity * dt * np.sin(heading)
+        self.pose[2] += self.angular_velocity * dt
+
+
+def create_backend(backend_name=params.TRACKING_BACKEND):
+    """
+    Creates the tracking backend that is configured in the measurement parameters.
+    """
+    if backend_name == 'openvr':
+        return OpenVRBackend()
+    elif backend_name == 'replay':
+        return ReplayBackend(params.TRACKING_REPLAY_FILE)
+    elif backend_name == 'synthetic':
+        return SyntheticBackend()
+    raise ValueError('Unknown tracking backend \"{}\". Must be either \'openvr\', \'replay\' or '
+                     '\'synthetic\'.'.format(backend_name))
@@ -0,0 +1,62 @@
+import argparse
+import time
+import numpy as np
+
+import measurement_params as parameters
+
+# there is no logging server when benchmarking, so log records are sent to localhost, where they are dropped right away
+parameters.IP_MAIN = '127.0.0.1'
+
+import position_tracking as tracking  # noqa: E402, the logging address has to be changed before the import
+import tracking_backends  # noqa: E402
+
+parser = argparse.ArgumentParser(description='Benchmarks the PositionTracker without VR hardware.')
+parser.add_argument('--replay', metavar='FILE', default=None,
+                    help='Trajectory file that is replayed, by default synthetic robots are tracked')
+parser.add_argument('--duration', type=float, default=5, help='Duration of the sampling rate measurement [in seconds]')
+parser.add_argument('--runs', type=int, default=20, help='Number of position measurements')
+args = parser.parse_args()
+
+
+def measure_sampling_rate(tracker, duration):
+    """
+    :return: rate at which the background sampler acquires poses [in Hz]
+    """
+    n_samples_start = tracker.sampler.n_samples
+    time.sleep(duration)
+    return (tracker.sampler.n_samples - n_samples_start) / duration
+
+
+def measure_latencies(measure, n_runs):
+    """
+    :return: durations of the calls [in ms]
+    """
+    latencies = []
+    for run in range(n_runs):
+        t_start = time.perf_counter()
+        measure()
+        latencies.append(1000 * (time.perf_counter() - t_start))
+    return np.array(latencies)
+
+
+if args.replay is not None:
+    backend = tracking_backends.ReplayBackend(args.replay)
+else:
+    backend = tracking_backends.SyntheticBackend()
+
+tracker = tracking.PositionTracker(backend=backend)
+tracker.connect_tracker(parameters.ROBOT_TYPE_RECEIVER)
+tracker.connect_tracker(parameters.ROBOT_TYPE_SOURCE)
+tracker.sampler.wait_for_samples(parameters.TRACKING_BUFFER_LENGTH)
+
+sampling_rate = measure_sampling_rate(tracker, args.duration)
+fixed_latencies = measure_latencies(lambda: tracker.measure_positions(parameters.TRACKING_N_AVERAGES), args.runs)
+adaptive_latencies = measure_latencies(lambda: tracker.measure_positions(adaptive=True), args.runs)
+settle_latencies = measure_latencies(tracker.wait_until_settled, args.runs)
+tracker.close()
+
+print('Sampling rate: {:.1f} Hz (target {} Hz)'.format(sampling_rate, parameters.TRACKING_FREQUENCY))
+for name, latencies in [('measure_positions({})'.format(parameters.TRACKING_N_AVERAGES), fixed_latencies),
+                        ('measure_positions(adaptive=True)', adaptive_latencies),
+                        ('wait_until_settled()', settle_latencies)]:
+    print('{}: median {:.2f} ms, max {:.2f} ms'.format(name, np.median(latencies), np.max(latencies)))
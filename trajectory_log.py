@@ -0,0 +1,157 @@
+import bisect
+import pathlib
+import numpy as np
+
+
+MAX_TRACKER_TYPE_LENGTH = 16  # maximal number of ASCII characters of the robot names, e.g., in TRACKER_SERIALS
+
+# Fixed-size records of the trajectory file. Every record holds one pose sample of one tracker, the records of a
+# sampling instant share the same timestamp.
+TRAJECTORY_DTYPE = np.dtype([('timestamp', '<f8'),
+                             ('measurement_id', '<i4'),
+                             ('tracker_index', '<u1'),
+                             ('tracker_type', 'S{}'.format(MAX_TRACKER_TYPE_LENGTH)),
+                             ('pose_is_valid', '?'),
+                             ('device_is_connected', '?'),
+                             ('pose', '<f4', (3, 4))])
+
+
+def get_trajectory_filename(session_name):
+    return pathlib.Path('..', '..', 'measurements', session_name, '{}_trajectory.bin'.format(session_name))
+
+
+class TrajectoryWriter(object):
+    """
+    Appends pose samples to a binary file of TRAJECTORY_DTYPE records. Samples are collected in a preallocated buffer
+    and written in blocks, so that the file only ever grows and stays readable while the session is running.
+
+    The TrajectoryReader and the ReplayBackend search the records by their timestamps, so the writer never writes a
+    timestamp that is smaller than the last one in the file, e.g., if the system clock is set back.
+    """
+    def __init__(self, filename, overwrite=False, buffer_length=1000):
+        """
+        :param overwrite: if True, the records of a previous run are deleted, e.g., when a session is measured again
+        from the beginning. Otherwise, the new records are appended.
+        """
+        self.filename = str(filename)
+        self._last_timestamp = -np.inf
+        if not overwrite:
+            self._last_timestamp = self._read_last_timestamp()
+        self._file = open(self.filename, 'wb' if overwrite else 'ab')
+
+        self._buffer = np.zeros(buffer_length, dtype=TRAJECTORY_DTYPE)
+        self._n_buffered = 0
+
+    def _read_last_timestamp(self):
+        path = pathlib.Path(self.filename)
+        if not path.exists() or path.stat().st_size < TRAJECTORY_DTYPE.itemsize:
+            return -np.inf
+
+        with open(self.filename, 'rb') as trajectory_file:
+            # a partially written record at the end of the file is ignored like by the reader
+            n_records = path.stat().st_size // TRAJECTORY_DTYPE.itemsize
+            trajectory_file.seek((n_records - 1) * TRAJECTORY_DTYPE.itemsize)
+            last_record = np.frombuffer(trajectory_file.read(TRAJECTORY_DTYPE.itemsize), dtype=TRAJECTORY_DTYPE)[0]
+        return float(last_record['timestamp'])
+
+    def append(self, timestamp, measurement_id, tracker_index, tracker_type, pose, pose_is_valid,
+               device_is_connected=True):
+        record = self._buffer[self._n_buffered]
+        self._last_timestamp = max(timestamp, self._last_timestamp)
+        record['timestamp'] = self._last_timestamp
+        record['measurement_id'] = measurement_id
+        record['tracker_index'] = tracker_index
+        record['tracker_type'] = tracker_type
+        record['pose_is_valid'] = pose_is_valid
+        record['device_is_connected'] = device_is_connected
+        record['pose'] = pose
+
+        self._n_buffered += 1
+        if self._n_buffered == len(self._buffer):
+            self.flush()
+
+    def flush(self):
+        self._file.write(self._buffer[:self._n_buffered].tobytes())
+        self._file.flush()
+        self._n_buffered = 0
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+
+class TrajectoryReader(object):
+    """
+    Reads a trajectory file through a memory map. Timestamps increase monotonically, so time ranges are found by binary
+    search and only the requested records are loaded from the disk. The search uses bisect instead of np.searchsorted,
+    which would copy the whole strided column into memory first.
+
+    Measurement IDs are not monotonic, because a resumed session repeats the measurements after its last checkpoint.
+    Therefore, the runs of equal measurement IDs are indexed on the first request of a measurement.
+    """
+    def __init__(self, filename, calibration=None):
+        """
+        :param calibration: RoomCalibration, which is applied to the poses of all returned records
+        """
+        self.filename = str(filename)
+        self.calibration = calibration
+
+        n_records = pathlib.Path(self.filename).stat().st_size // TRAJECTORY_DTYPE.itemsize
+        if n_records > 0:
+            self.records = np.memmap(self.filename, dtype=TRAJECTORY_DTYPE, mode='r', shape=(n_records,))
+        else:
+            self.records = np.zeros(0, dtype=TRAJECTORY_DTYPE)
+        self._measurement_runs = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def get_time_range(self, t_start, t_end, tracker_type=None):
+        """
+        :return: records with t_start <= timestamp < t_end [in seconds since the epoch]
+        """
+        start, end = self._search('timestamp', t_start, t_end)
+        return self._select_tracker(self.records[start:end], tracker_type)
+
+    def get_measurement(self, measurement_id, tracker_type=None):
+        """
+        :return: records that were sampled while the measurement with the given ID was conducted, including the
+        movement to the next position. If a resumed session repeated the measurement, the records of all attempts are
+        returned in the order in which they were sampled.
+        """
+        runs = self._get_measurement_runs().get(measurement_id, [])
+        if len(runs) == 1:
+            records = self.records[runs[0][0]:runs[0][1]]
+        else:
+            records = np.concatenate([self.records[start:end] for start, end in runs]) if runs else self.records[0:0]
+        return self._select_tracker(records, tracker_type)
+
+    def _get_measurement_runs(self):
+        """
+        :return: dictionary with the (start, end) record indices of all runs of equal measurement IDs per ID
+        """
+        if self._measurement_runs is None:
+            measurement_ids = np.array(self.records['measurement_id'])
+            boundaries = np.concatenate([[0], np.flatnonzero(np.diff(measurement_ids)) + 1, [len(measurement_ids)]])
+
+            self._measurement_runs = {}
+            if len(measurement_ids) == 0:
+                return self._measurement_runs
+            for start, end in zip(boundaries[:-1], boundaries[1:]):
+                self._measurement_runs.setdefault(int(measurement_ids[start]), []).append((int(start), int(end)))
+        return self._measurement_runs
+
+    def _search(self, field, value_start, value_end):
+        column = self.records[field]
+        return bisect.bisect_left(column, value_start), bisect.bisect_left(column, value_end)
+
+    def _select_tracker(self, records, tracker_type):
+        if tracker_type is not None:
+            records = records[records['tracker_type'] == tracker_type.encode('ascii')]
+
+        records = np.array(records)
+        if self.calibration is not None:
+            records['pose'] = self.calibration.apply(records['pose'])
+        return records